@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+批次走法驗證效能測試
+比較逐筆呼叫 is_*_move_legal 與 NumPy 批次驗證的吞吐量
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+
+from src.analysis.batch import encode_board, validate_moves_batch
+from src.chinesechess import INITIAL_FEN, ChineseChessBoard
+
+SQUARES = [(row, col) for row in range(1, 11) for col in range(1, 10)]
+
+
+def build_cases(count: int, seed: int = 1):
+    """從開局隨機走幾步產生盤面，每個盤面搭配隨機的 (起點, 終點)"""
+    rng = random.Random(seed)
+    boards, cases = [], []
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    while len(cases) < count:
+        board.set_fen(INITIAL_FEN)
+        for _ in range(rng.randint(0, 40)):
+            moves = board.generate_legal_move_codes(board.side)
+            if not moves:
+                break
+            board.make_move(rng.choice(moves))
+        snapshot = board.copy()
+        occupied = list(snapshot.pieces)
+        for _ in range(min(500, count - len(cases))):
+            boards.append(snapshot)
+            cases.append((rng.choice(occupied), rng.choice(SQUARES)))
+    return boards, cases
+
+
+def bench_scalar(boards, cases) -> float:
+    start = time.perf_counter()
+    for board, (from_pos, to_pos) in zip(boards, cases):
+        piece = board.get_piece(from_pos)
+        board._get_rule_func(piece.piece_type)(piece, to_pos)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批次走法驗證效能測試")
+    parser.add_argument("--count", type=int, default=200_000, help="驗證的走法數量")
+    args = parser.parse_args()
+
+    boards, cases = build_cases(args.count)
+    encoded = {}
+    boards_array = np.stack([encoded.setdefault(id(b), encode_board(b)) for b in boards])
+    moves_array = np.array([from_pos + to_pos for from_pos, to_pos in cases], dtype=np.int8)
+
+    scalar = bench_scalar(boards, cases)
+    start = time.perf_counter()
+    validate_moves_batch(boards_array, moves_array)
+    batch = time.perf_counter() - start
+    start = time.perf_counter()
+    validate_moves_batch(boards_array, moves_array, full_rules=True)
+    batch_full = time.perf_counter() - start
+
+    print(f"🔄 {len(cases):,} move validations")
+    print(f"  {'scalar is_*_move_legal':<26} {len(cases) / scalar:>12,.0f} checks/s  x1.00")
+    print(f"  {'numpy batch':<26} {len(cases) / batch:>12,.0f} checks/s  x{scalar / batch:.2f}")
+    print(f"  {'numpy batch (full_rules)':<26} {len(cases) / batch_full:>12,.0f} checks/s  x{scalar / batch_full:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+棋盤走法驗證效能測試
+比較陣列棋盤（src/chinesechess.py）與舊版 dict 棋盤的走法驗證吞吐量，
+以及樹狀走訪時每節點複製棋盤與 make/unmake、逐子擺盤與 FEN 載入、葉節點評估重算與增量的差異，
+和前端查詢可走目標格時逐格檢查與 LRU 快取的差異
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.chinesechess import ChineseChessBoard, Color, PieceType, INITIAL_FEN, INITIAL_POSITION
+
+
+class LegacyDictBoard:
+    """舊版以 Dict[(row, col), Piece] 表示的棋盤，只保留驗證走法所需的部分"""
+
+    def __init__(self):
+        self.pieces = {}
+
+    def add_piece(self, piece_type, color, position):
+        self.pieces[position] = (piece_type, color, position)
+
+    def is_move_legal(self, from_pos, to_pos):
+        piece_type, color, _ = self.pieces[from_pos]
+        (fr, fc), (tr, tc) = from_pos, to_pos
+        if piece_type in (PieceType.GENERAL, PieceType.GUARD):
+            rows = (1, 3) if color == Color.RED else (8, 10)
+            if not (rows[0] <= tr <= rows[1] and 4 <= tc <= 6):
+                return False
+            if piece_type == PieceType.GENERAL:
+                return abs(fr - tr) + abs(fc - tc) == 1
+            return abs(fr - tr) == 1 and abs(fc - tc) == 1
+        if piece_type in (PieceType.ROOK, PieceType.CANNON):
+            if fr != tr and fc != tc:
+                return False
+            count = 0
+            if fr == tr:
+                step = 1 if tc > fc else -1
+                for col in range(fc + step, tc, step):
+                    if (fr, col) in self.pieces:
+                        count += 1
+            else:
+                step = 1 if tr > fr else -1
+                for row in range(fr + step, tr, step):
+                    if (row, fc) in self.pieces:
+                        count += 1
+            if piece_type == PieceType.ROOK:
+                return count == 0
+            if to_pos in self.pieces:
+                return count == 1
+            return count == 0
+        if piece_type == PieceType.HORSE:
+            dr, dc = abs(fr - tr), abs(fc - tc)
+            if (dr, dc) == (2, 1):
+                leg = (fr + (1 if tr > fr else -1), fc)
+            elif (dr, dc) == (1, 2):
+                leg = (fr, fc + (1 if tc > fc else -1))
+            else:
+                return False
+            return leg not in self.pieces
+        if piece_type == PieceType.ELEPHANT:
+            if abs(fr - tr) != 2 or abs(fc - tc) != 2:
+                return False
+            if color == Color.RED and tr > 5 or color == Color.BLACK and tr < 6:
+                return False
+            return ((fr + tr) // 2, (fc + tc) // 2) not in self.pieces
+        dr, dc = tr - fr, abs(tc - fc)
+        if abs(dr) + dc != 1:
+            return False
+        if color == Color.RED:
+            return dr != 1 if fr >= 6 else (dr == -1 and dc == 0)
+        return dr != -1 if fr <= 5 else (dr == 1 and dc == 0)
+
+
+TARGETS = [(row, col) for row in range(1, 11) for col in range(1, 10)]
+
+
+def bench_legacy(rounds: int) -> float:
+    board = LegacyDictBoard()
+    for piece_type, color, position in INITIAL_POSITION:
+        board.add_piece(piece_type, color, position)
+    origins = list(board.pieces)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for from_pos in origins:
+            for to_pos in TARGETS:
+                board.is_move_legal(from_pos, to_pos)
+    return time.perf_counter() - start
+
+
+def bench_array(rounds: int) -> float:
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    origins = [(board.get_piece(pos), pos) for pos in board.pieces]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for piece, _ in origins:
+            rule = board._get_rule_func(piece.piece_type)
+            for to_pos in TARGETS:
+                rule(piece, to_pos)
+    return time.perf_counter() - start
+
+
+def bench_array_squares(rounds: int) -> float:
+    """陣列索引介面（move_piece 內部使用的路徑）"""
+    from src.chinesechess import ON_BOARD, BLACK_FLAG, TYPE_MASK
+
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    cells = board.cells
+    origins = [(sq, board._rules[cells[sq] & TYPE_MASK], cells[sq] & BLACK_FLAG)
+               for side in board.piece_squares for sq in side]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for from_sq, rule, black in origins:
+            for to_sq in ON_BOARD:
+                rule(from_sq, to_sq, black)
+    return time.perf_counter() - start
+
+
+def walk_with_copies(board: ChineseChessBoard, depth: int) -> int:
+    """舊作法：每個節點複製一份棋盤"""
+    if depth == 0:
+        return 1
+    nodes = 0
+    for move in board.generate_move_codes(board.side):
+        child = board.copy()
+        child.make_move(move)
+        nodes += walk_with_copies(child, depth - 1)
+    return nodes
+
+
+def walk_with_make_unmake(board: ChineseChessBoard, depth: int) -> int:
+    if depth == 0:
+        return 1
+    nodes = 0
+    for move in board.generate_move_codes(board.side):
+        board.make_move(move)
+        nodes += walk_with_make_unmake(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def bench_tree_walk(depth: int):
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    results = []
+    for name, walk in (("copy per node", walk_with_copies), ("make/unmake", walk_with_make_unmake)):
+        start = time.perf_counter()
+        nodes = walk(board, depth)
+        results.append((name, nodes, time.perf_counter() - start))
+    return results
+
+
+def bench_setup(rounds: int):
+    """以字串 add_piece 逐子擺盤與以 set_fen 重設同一個棋盤的比較"""
+    setup = [(pt.value, color.value, pos) for pt, color, pos in INITIAL_POSITION]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        board = ChineseChessBoard()
+        for piece_type, color, pos in setup:
+            board.add_piece(piece_type, color, pos)
+    per_piece = time.perf_counter() - start
+    board = ChineseChessBoard()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        board.set_fen(INITIAL_FEN)
+    return per_piece, time.perf_counter() - start
+
+
+def walk_with_evaluation(board: ChineseChessBoard, depth: int, evaluate) -> int:
+    if depth == 0:
+        evaluate(board)
+        return 1
+    nodes = 0
+    for move in board.generate_move_codes(board.side):
+        board.make_move(move)
+        nodes += walk_with_evaluation(board, depth - 1, evaluate)
+        board.unmake_move()
+    return nodes
+
+
+def bench_evaluation(depth: int):
+    """
+    每個葉節點從頭計算子力與位置分，與直接讀取增量維護的 board.score 比較；
+    另列完整 evaluate()（再加上需掃描盤面的機動性與將帥安全）作為參考
+    """
+    from src.engine.evaluation import evaluate
+
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    results = []
+    for name, evaluator in (
+        ("recomputed material+PST", ChineseChessBoard.compute_score),
+        ("incremental board.score", lambda b: b.score),
+        ("full evaluate()", evaluate),
+    ):
+        start = time.perf_counter()
+        nodes = walk_with_evaluation(board, depth, evaluator)
+        results.append((name, nodes, time.perf_counter() - start))
+    return results
+
+
+def hover_targets(board: ChineseChessBoard, position) -> set:
+    """前端原本的做法：對 90 個格子逐一呼叫 is_*_move_legal"""
+    piece = board.get_piece(position)
+    rule = board._get_rule_func(piece.piece_type)
+    targets = set()
+    for target in TARGETS:
+        occupant = board.get_piece(target)
+        if occupant is not None and occupant.color == piece.color:
+            continue
+        if rule(piece, target):
+            targets.add(target)
+    return targets
+
+
+def bench_hover(queries: int, positions: int = 50):
+    """模擬多名使用者在少數熱門局面上反覆查詢隨機棋子的目標格"""
+    import random
+    from src.analysis.move_cache import LegalMoveCache
+
+    rng = random.Random(1)
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    boards = []
+    for _ in range(positions):
+        boards.append(board.copy())
+        moves = board.generate_legal_move_codes(board.side)
+        if not moves:
+            break
+        board.make_move(rng.choice(moves))
+    requests = []
+    for _ in range(queries):
+        hot = boards[rng.randrange(len(boards))]
+        requests.append((hot, rng.choice(list(hot.pieces))))
+
+    start = time.perf_counter()
+    for hot, position in requests:
+        hover_targets(hot, position)
+    scan = time.perf_counter() - start
+
+    cache = LegalMoveCache()
+    start = time.perf_counter()
+    for hot, position in requests:
+        cache.targets(hot, position)
+    cached = time.perf_counter() - start
+    return scan, cached, cache.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="棋盤走法驗證效能測試")
+    parser.add_argument("--rounds", type=int, default=200, help="每種棋盤重複驗證開局所有走法的次數")
+    parser.add_argument("--walk-depth", type=int, default=3, help="走訪樹狀結構比較的深度")
+    args = parser.parse_args()
+
+    checks = args.rounds * len(INITIAL_POSITION) * len(TARGETS)
+    results = [
+        ("legacy dict board", bench_legacy(args.rounds)),
+        ("array board (Piece API)", bench_array(args.rounds)),
+        ("array board (square API)", bench_array_squares(args.rounds)),
+    ]
+    baseline = results[0][1]
+    print(f"🔄 {checks:,} move validations per backend")
+    for name, elapsed in results:
+        print(f"  {name:<26} {checks / elapsed:>12,.0f} checks/s  x{baseline / elapsed:.2f}")
+
+    walks = bench_tree_walk(args.walk_depth)
+    print(f"🔄 tree walk to depth {args.walk_depth}")
+    for name, nodes, elapsed in walks:
+        print(f"  {name:<26} {nodes / elapsed:>12,.0f} nodes/s  x{walks[0][2] / elapsed:.2f}")
+
+    setups = args.rounds * 10
+    per_piece, fen = bench_setup(setups)
+    print(f"🔄 {setups:,} position setups")
+    print(f"  {'add_piece per piece':<26} {setups / per_piece:>12,.0f} positions/s  x1.00")
+    print(f"  {'set_fen on reused board':<26} {setups / fen:>12,.0f} positions/s  x{per_piece / fen:.2f}")
+
+    evals = bench_evaluation(args.walk_depth)
+    print(f"🔄 tree walk to depth {args.walk_depth} with leaf evaluation")
+    for name, nodes, elapsed in evals:
+        print(f"  {name:<26} {nodes / elapsed:>12,.0f} nodes/s  x{evals[0][2] / elapsed:.2f}")
+
+    queries = args.rounds * 100
+    scan, cached, stats = bench_hover(queries)
+    print(f"🔄 {queries:,} target queries ({stats.hit_rate:.1%} cache hits)")
+    print(f"  {'scan 90 squares':<26} {queries / scan:>12,.0f} queries/s  x1.00")
+    print(f"  {'LRU cache':<26} {queries / cached:>12,.0f} queries/s  x{scan / cached:.2f}")
+
+
+if __name__ == "__main__":
+    main()
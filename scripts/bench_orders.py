@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+批次訂單計價效能測試
+隨機產生訂單欄位陣列，比較 OrderService.place_orders（向量化）與逐筆 place_order 的吞吐量，
+並以抽樣訂單驗證兩者結果逐位元相同
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+
+from src.promotions.examples import CategoryDiscountStrategy
+from src.services.batch_pricing import orders_from_batch
+from src.services.order_service import OrderService
+
+CATEGORIES = ["cosmetics", "electronics", "apparel", "food"]
+
+
+def generate_batch(orders: int, max_items: int, seed: int) -> dict:
+    """每筆訂單 1..max_items 個項目，項目順序打亂（同一訂單的項目不一定相鄰）"""
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(1, max_items + 1, orders)
+    order_ids = np.repeat(np.arange(orders, dtype=np.int64), sizes)
+    shuffle = rng.permutation(len(order_ids))
+    count = len(order_ids)
+    return {
+        "order_id": order_ids[shuffle],
+        "quantity": rng.integers(1, 16, count),
+        "unit_price": rng.integers(10, 5000, count),
+        "category": rng.integers(-1, len(CATEGORIES), count),
+    }
+
+
+def create_service() -> OrderService:
+    service = OrderService(
+        promotions=[{"threshold": 1000, "discount": 100}, {"threshold": 5000, "discount": 800}],
+        bogo_cosmetics_active=True,
+        double11_active=True,
+    )
+    service.add_promotion_strategy(CategoryDiscountStrategy("electronics", 0.15))
+    return service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批次訂單計價效能測試")
+    parser.add_argument("--orders", type=int, default=1_000_000, help="訂單數")
+    parser.add_argument("--max-items", type=int, default=5, help="每筆訂單最多項目數")
+    parser.add_argument("--sample", type=int, default=20_000, help="逐筆計價與驗證的抽樣訂單數")
+    parser.add_argument("--seed", type=int, default=1, help="亂數種子")
+    args = parser.parse_args()
+
+    batch = generate_batch(args.orders, args.max_items, args.seed)
+    service = create_service()
+    items = len(batch["order_id"])
+
+    start = time.perf_counter()
+    result = service.place_orders(batch, CATEGORIES)
+    vectorized = time.perf_counter() - start
+    print(f"🔄 {args.orders:,} orders, {items:,} items")
+    print(f"  {'place_orders (NumPy)':<24} {vectorized:>8.2f}s  {args.orders / vectorized:>12,.0f} orders/s")
+
+    # 逐筆路徑只跑抽樣的訂單，順便驗證結果
+    sampled = np.random.default_rng(args.seed + 1).choice(args.orders, min(args.sample, args.orders), replace=False)
+    mask = np.isin(batch["order_id"], sampled)
+    orders = orders_from_batch(batch["order_id"][mask], batch["quantity"][mask], batch["unit_price"][mask],
+                               batch["category"][mask], CATEGORIES)
+    start = time.perf_counter()
+    placed = {order_id: service.place_order(order_items) for order_id, order_items in orders.items()}
+    per_order = time.perf_counter() - start
+    rate = len(orders) / per_order
+    print(f"  {'place_order (per order)':<24} {args.orders / rate:>8.2f}s  {rate:>12,.0f} orders/s  "
+          f"(estimated from {len(orders):,} orders)  x{args.orders / rate / vectorized:.1f}")
+
+    index = np.searchsorted(result.order_ids, list(placed))
+    mismatches = sum(
+        (order.original_amount, order.discount, order.total_amount)
+        != (result.original_amount[i], result.discount[i], result.total_amount[i])
+        for order, i in zip(placed.values(), index)
+    )
+    if mismatches:
+        print(f"❌ {mismatches} of {len(placed):,} sampled orders differ from place_order")
+        return 1
+    print(f"✅ {len(placed):,} sampled orders identical to place_order")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+平行搜尋效能測試
+以單一行程的 Searcher 與不同 worker 數的 ParallelSearcher 搜尋相同的盤面到固定深度，
+回報每個盤面的平均搜尋時間（time-to-depth）、每秒節點數，以及相對單一行程的加速比
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.analysis.perft import load_reference
+from src.chinesechess import ChineseChessBoard
+from src.engine.parallel import ParallelSearcher
+from src.engine.search import Searcher
+
+
+def run(searcher, fens, depth: int):
+    """依序搜尋所有盤面，回傳 (耗時, 節點數)"""
+    nodes = 0
+    start = time.perf_counter()
+    for fen in fens:
+        searcher.tt.clear()
+        nodes += searcher.search(ChineseChessBoard.from_fen(fen), depth=depth).nodes
+    return time.perf_counter() - start, nodes
+
+
+def report(label: str, elapsed: float, nodes: int, positions: int, baseline: float) -> None:
+    print(f"  {label:<12} {elapsed / positions * 1000:>9.1f} ms/position  {nodes:>12,} nodes  "
+          f"{nodes / elapsed:>10,.0f} nodes/s  speedup x{baseline / elapsed:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="平行搜尋加速比測試")
+    parser.add_argument("--depth", type=int, default=4, help="搜尋深度（預設 4）")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="要比較的 worker 數")
+    parser.add_argument("--tt-size", type=float, default=32, help="共享置換表大小（MB）")
+    args = parser.parse_args()
+
+    fens = [entry["fen"] for entry in load_reference()]
+    print(f"🔄 {len(fens)} positions to depth {args.depth} ({os.cpu_count()} CPUs)")
+    elapsed, nodes = run(Searcher(tt_size_mb=args.tt_size), fens, args.depth)
+    baseline = elapsed
+    report("Searcher", elapsed, nodes, len(fens), baseline)
+    for workers in args.workers:
+        with ParallelSearcher(workers=workers, tt_size_mb=args.tt_size) as searcher:
+            # 先做一次小搜尋讓 worker 行程完成啟動
+            searcher.search(ChineseChessBoard.from_fen(fens[0]), depth=1)
+            elapsed, nodes = run(searcher, fens, args.depth)
+        report(f"{workers} workers", elapsed, nodes, len(fens), baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+開局庫建立工具
+讀取 ICCS 對局紀錄（每行一局），寫出排序後的二進位開局庫
+"""
+
+import argparse
+import fileinput
+import sys
+import time
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.engine.book import OpeningBook, build_book
+
+
+def main():
+    parser = argparse.ArgumentParser(description="由 ICCS 對局紀錄建立開局庫")
+    parser.add_argument("output", help="輸出的開局庫檔案")
+    parser.add_argument("inputs", nargs="*", help="對局紀錄檔（未指定時讀取 stdin）")
+    parser.add_argument("--max-ply", type=int, default=40, help="每局收錄的最大步數（預設 40）")
+    parser.add_argument("--chunk-entries", type=int, default=1_000_000, help="每個暫存排序區塊的 entry 數")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with fileinput.input(args.inputs, encoding="utf-8") as lines:
+        count = build_book(lines, args.output, max_ply=args.max_ply, chunk_entries=args.chunk_entries)
+    elapsed = time.perf_counter() - start
+    with OpeningBook(args.output) as book:
+        assert len(book) == count
+    print(f"✅ {count:,} entries written to {args.output} in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+訓練資料匯出工具
+讀取 FEN 局面檔（每行一個 FEN）或 32 bytes 局面編碼檔，串流寫出分塊的 NumPy 特徵平面
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+
+from src.analysis.features import DEFAULT_CHUNK_SIZE, FeatureWriter
+from src.analysis.packing import PACKED_SIZE
+from src.chinesechess import load_fen_file
+
+# 局面編碼檔每次讀入的局面數
+PACKED_READ = 1 << 16
+
+
+def main():
+    parser = argparse.ArgumentParser(description="局面匯出為 (N, 14, 10, 9) 特徵平面與合法走法遮罩")
+    parser.add_argument("output", help="輸出目錄（已有區塊時接續編號）")
+    parser.add_argument("inputs", nargs="+", help="FEN 局面檔；搭配 --packed 時為局面編碼檔")
+    parser.add_argument("--packed", action="store_true", help="輸入為 32 bytes 局面編碼檔")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="每個 .npy 區塊的局面數")
+    parser.add_argument("--no-masks", action="store_true", help="不產生合法走法遮罩")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with FeatureWriter(args.output, chunk_size=args.chunk_size, masks=not args.no_masks) as writer:
+        for path in args.inputs:
+            if args.packed:
+                # 以 memmap 分段讀取，不把整個檔案載入記憶體
+                data = np.memmap(path, dtype=np.uint8, mode="r")
+                step = PACKED_READ * PACKED_SIZE
+                for offset in range(0, len(data), step):
+                    writer.extend_packed(data[offset:offset + step])
+            else:
+                writer.extend(load_fen_file(path))
+    elapsed = time.perf_counter() - start
+    print(f"✅ {writer.count:,} positions written to {args.output} in {elapsed:.2f}s "
+          f"({writer.count / elapsed:,.0f} positions/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+殘局庫產生工具
+以倒推分析產生子力組合（含所有子集）的殘局庫檔案，並量測 mmap probe 的速度
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.chinesechess import ChineseChessBoard
+from src.engine.tablebase import DRAW_CODE, INVALID_CODE, SUFFIX, Tablebase, generate_tablebase, normalize_material
+
+
+def main():
+    parser = argparse.ArgumentParser(description="產生象棋殘局庫")
+    parser.add_argument("material", help="子力組合，例如 'KR vs KA'")
+    parser.add_argument("--directory", default="tablebases", help="輸出目錄（預設 tablebases）")
+    parser.add_argument("--workers", type=int, default=1, help="正向掃描使用的行程數")
+    parser.add_argument("--chunk-size", type=int, default=8192, help="每個工作單位的局面數")
+    args = parser.parse_args()
+
+    material = normalize_material(args.material)
+    start = time.perf_counter()
+    written = generate_tablebase(material, args.directory, workers=args.workers, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - start
+    for path in written:
+        print(f"✅ {path}")
+    print(f"📊 generated {len(written)} tables in {elapsed:.2f}s with {args.workers} workers")
+
+    path = Path(args.directory) / f"{material}{SUFFIX}"
+    with Tablebase(str(path)) as table:
+        counts = {"win": 0, "draw": 0, "loss": 0, "invalid": 0}
+        longest = 0
+        for index in range(table.count):
+            code = table.code_at(index)
+            if code == INVALID_CODE:
+                counts["invalid"] += 1
+            elif code == DRAW_CODE:
+                counts["draw"] += 1
+            else:
+                counts["win" if code & 1 else "loss"] += 1
+                longest = max(longest, code - 2)
+        print(f"📋 {material}: {table.count:,} positions  " + "  ".join(f"{k} {v:,}" for k, v in counts.items())
+              + f"  longest DTM {longest}")
+
+        rng = random.Random(1)
+        boards = []
+        while len(boards) < 1000:
+            squares, side = table._layout.decode(rng.randrange(table.count))
+            if len(set(squares)) != len(squares):
+                continue
+            board = ChineseChessBoard()
+            for code, sq in zip(table._layout.codes, squares):
+                board._put(sq, code)
+            board._set_side(side)
+            boards.append(board)
+        start = time.perf_counter()
+        for board in boards:
+            table.probe(board)
+        per_probe = (time.perf_counter() - start) / len(boards)
+        print(f"🔄 probe: {per_probe * 1e6:.1f} µs per lookup")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
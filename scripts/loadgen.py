@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+對弈伺服器壓力測試
+開多條連線、每條連線輪流替多局送出走法，回報 moves/s 與延遲百分位數。
+走法事先以隨機對局產生，計時期間客戶端只送出請求與讀取回應；
+未指定 --port 時在同一個行程內啟動伺服器（客戶端與伺服器共用一顆 CPU）。
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+# 添加專案根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.chinesechess import INITIAL_FEN, ChineseChessBoard, move_to_iccs
+from src.server.game_server import GameServer
+
+
+def random_games(count: int, plies: int, seed: int) -> List[List[str]]:
+    """隨機對局的 ICCS 走法序列（遇到無合法走法時提前結束）"""
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        board = ChineseChessBoard.from_fen(INITIAL_FEN)
+        moves = []
+        for _ in range(plies):
+            legal = board.generate_legal_move_codes(board.side)
+            if not legal:
+                break
+            move = rng.choice(legal)
+            moves.append(move_to_iccs(move))
+            board.make_move(move)
+        games.append(moves)
+    return games
+
+
+async def request(reader, writer, payload: dict) -> dict:
+    writer.write(json.dumps(payload).encode() + b"\n")
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    if not response["ok"]:
+        raise RuntimeError(response["error"])
+    return response
+
+
+async def run_connection(host: str, port: int, games: List[List[str]], latencies: List[float]) -> int:
+    """一條連線：先為每局開新局，再依步數輪流送出各局的下一步"""
+    reader, writer = await asyncio.open_connection(host, port)
+    sessions = [(await request(reader, writer, {"op": "new"}))["session"] for _ in games]
+    moves = 0
+    for ply in range(max(map(len, games), default=0)):
+        for session, game in zip(sessions, games):
+            if ply >= len(game):
+                continue
+            start = time.perf_counter()
+            await request(reader, writer, {"op": "move", "session": session, "move": game[ply]})
+            latencies.append(time.perf_counter() - start)
+            moves += 1
+    for session in sessions:
+        await request(reader, writer, {"op": "close", "session": session})
+    writer.close()
+    return moves
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def main_async(args) -> int:
+    print(f"🔄 generating {args.sessions:,} random games of up to {args.plies} plies...")
+    games = random_games(args.sessions, args.plies, args.seed)
+
+    server = None
+    temp = None
+    host, port = args.host, args.port
+    if port is None:
+        snapshot = args.snapshot
+        if snapshot is None:
+            temp = tempfile.TemporaryDirectory()
+            snapshot = str(Path(temp.name) / "sessions.dat")
+        server = GameServer(snapshot, max_sessions=args.sessions)
+        await server.serve(host, 0)
+        port = server.port
+
+    latencies: List[float] = []
+    connections = min(args.connections, args.sessions)
+    start = time.perf_counter()
+    counts = await asyncio.gather(*(
+        run_connection(host, port, games[index::connections], latencies) for index in range(connections)
+    ))
+    elapsed = time.perf_counter() - start
+    if server:
+        await server.stop()
+    if temp:
+        temp.cleanup()
+
+    moves = sum(counts)
+    print(f"📊 {args.sessions:,} sessions over {connections} connections: {moves:,} moves in {elapsed:.2f}s "
+          f"({moves / elapsed:,.0f} moves/s)")
+    if latencies:
+        print(f"  latency p50 {percentile(latencies, 0.50) * 1000:.2f} ms  "
+              f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms  max {max(latencies) * 1000:.2f} ms")
+    if server:
+        print(f"  {server.flushes} snapshot batches, {len(server.cache)} cached target sets "
+              f"({server.cache.stats.hit_rate:.1%} hits)")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="對弈伺服器壓力測試")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="既有伺服器的埠號（未指定時在行程內啟動）")
+    parser.add_argument("--sessions", type=int, default=1000, help="同時進行的對局數")
+    parser.add_argument("--connections", type=int, default=50, help="客戶端連線數")
+    parser.add_argument("--plies", type=int, default=40, help="每局最多步數")
+    parser.add_argument("--seed", type=int, default=1, help="隨機對局的亂數種子")
+    parser.add_argument("--snapshot", help="行程內伺服器的快照檔（預設使用暫存目錄）")
+    return asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+象棋規則引擎 perft 工具
+計算參考局面在各深度的葉節點數、回報 nodes/s，並與儲存的參考值比對；
+--profile 時改為以 RulesProfiler 計數並輸出 JSON 快照
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.analysis.perft import build_board, divide, load_reference, perft, run_reference
+from src.chinesechess import RulesProfiler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="象棋 perft 效能與正確性測試")
+    parser.add_argument("--depth", type=int, default=3, help="最大深度（預設 3）")
+    parser.add_argument("--position", action="append", help="只跑指定名稱的參考局面，可重複指定")
+    parser.add_argument("--divide", action="store_true", help="列出每個根節點走法的節點數")
+    parser.add_argument("--profile", action="store_true", help="輸出規則引擎計數的 JSON 快照")
+    args = parser.parse_args()
+
+    if args.profile:
+        for entry in load_reference():
+            if args.position and entry["name"] not in args.position:
+                continue
+            board = build_board(entry)
+            with RulesProfiler(board) as profiler:
+                perft(board, args.depth, board.side)
+            print(f"📋 {entry['name']} depth {args.depth}")
+            print(profiler.to_json())
+        return 0
+
+    if args.divide:
+        for entry in load_reference():
+            if args.position and entry["name"] not in args.position:
+                continue
+            print(f"📋 {entry['name']} depth {args.depth}")
+            board = build_board(entry)
+            for move, nodes in sorted(divide(board, args.depth, board.side).items()):
+                print(f"  {move:<20} {nodes:>12,}")
+        return 0
+
+    reports = run_reference(max_depth=args.depth, names=args.position)
+    total_nodes = sum(r.nodes for r in reports)
+    total_seconds = sum(r.seconds for r in reports)
+    failures = 0
+    for r in reports:
+        status = "✅" if r.ok else "❌"
+        expected = "" if r.ok else f" (expected {r.expected:,})"
+        print(f"{status} {r.name:<22} depth {r.depth}  {r.nodes:>12,} nodes  "
+              f"{r.nodes_per_second:>12,.0f} nodes/s{expected}")
+        failures += not r.ok
+    if total_seconds > 0:
+        print(f"📊 {total_nodes:,} nodes in {total_seconds:.2f}s  "
+              f"({total_nodes / total_seconds:,.0f} nodes/s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+局面資料庫工具
+import：匯入對局紀錄（只在匯入時重播一次）
+search：依子力簽名、兵種數量與兵種所在格子查詢，直接由索引欄位回答
+
+範例：紅車在第 5 行且黑方雙象皆失
+    python scripts/position_db.py search games.db --any red_rook=file:5 --count black_elephant=0
+"""
+
+import argparse
+import fileinput
+import sys
+import time
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.analysis.position_db import PositionDB, file_mask, rank_mask, squares_mask
+from src.analysis.records import iter_games
+
+
+def parse_mask(spec: str) -> int:
+    """file:5、rank:3 或以分號分隔的格子 row,col;row,col"""
+    kind, _, value = spec.partition(":")
+    if kind == "file":
+        return file_mask(int(value))
+    if kind == "rank":
+        return rank_mask(int(value))
+    return squares_mask(tuple(int(v) for v in cell.split(",")) for cell in spec.split(";"))
+
+
+def parse_conditions(items, convert):
+    conditions = {}
+    for item in items or []:
+        name, _, value = item.partition("=")
+        if not value:
+            raise ValueError(f"Expected NAME=VALUE, got {item!r}")
+        conditions[name] = convert(value)
+    return conditions
+
+
+def run_import(args) -> int:
+    start = time.perf_counter()
+    with PositionDB(args.database) as db, fileinput.input(args.inputs, encoding="utf-8") as lines:
+        added, skipped = db.add_games(iter_games(lines, line_per_game=args.line_per_game))
+        positions = len(db)
+    print(f"✅ {added:,} games imported ({skipped:,} skipped), {positions:,} distinct positions "
+          f"in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+def run_search(args) -> int:
+    side = {"red": 0, "black": 1}.get(args.side)
+    conditions = dict(
+        signature=args.signature,
+        side=side,
+        counts=parse_conditions(args.count, int),
+        any_of=parse_conditions(args.any, parse_mask),
+        all_of=parse_conditions(args.all, parse_mask),
+        none_of=parse_conditions(args.none, parse_mask),
+    )
+    with PositionDB(args.database) as db:
+        start = time.perf_counter()
+        total = db.count(**conditions)
+        records = db.search(**conditions, limit=args.limit)
+        elapsed = time.perf_counter() - start
+        for record in records:
+            games = db.games_for(record.id)
+            print(f"{record.fen}  [{record.signature}]  x{record.occurrences}  games {games[:5]}")
+    print(f"📊 {total:,} matching positions ({elapsed * 1000:.1f} ms)")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="局面資料庫的匯入與查詢")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="匯入對局紀錄")
+    importer.add_argument("database", help="SQLite 資料庫檔")
+    importer.add_argument("inputs", nargs="*", help="對局紀錄檔（未指定時讀取 stdin）")
+    importer.add_argument("--line-per-game", action="store_true", help="每一行是一局")
+    importer.set_defaults(run=run_import)
+
+    search = commands.add_parser("search", help="查詢局面")
+    search.add_argument("database", help="SQLite 資料庫檔")
+    search.add_argument("--signature", help='子力簽名，如 "RHC vs RCC"')
+    search.add_argument("--side", choices=("red", "black"), help="輪走方")
+    search.add_argument("--count", action="append", metavar="PIECE=N", help="兵種數量，如 black_elephant=0")
+    search.add_argument("--any", action="append", metavar="PIECE=SQUARES", help="至少一子在指定格子內")
+    search.add_argument("--all", action="append", metavar="PIECE=SQUARES", help="指定格子都有該兵種")
+    search.add_argument("--none", action="append", metavar="PIECE=SQUARES", help="指定格子都沒有該兵種")
+    search.add_argument("--limit", type=int, default=20, help="最多列出的局面數")
+    search.set_defaults(run=run_search)
+
+    args = parser.parse_args()
+    try:
+        return args.run(args)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+對局紀錄重播驗證工具
+串流讀取 ICCS/WXF 對局紀錄，以 move_piece 重播每一局，輸出 JSONL 並回報 games/s 與 moves/s
+"""
+
+import argparse
+import fileinput
+import sys
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.analysis.records import replay_games
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重播並驗證對局紀錄")
+    parser.add_argument("inputs", nargs="*", help="對局紀錄檔（未指定時讀取 stdin）")
+    parser.add_argument("-o", "--output", help="JSONL 輸出檔（未指定時寫到 stdout）")
+    parser.add_argument("--workers", type=int, default=1, help="重播使用的行程數")
+    parser.add_argument("--chunk-size", type=int, default=256, help="每個工作單位的對局數")
+    parser.add_argument("--line-per-game", action="store_true", help="每一行是一局")
+    args = parser.parse_args()
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        with fileinput.input(args.inputs, encoding="utf-8") as lines:
+            stats = replay_games(lines, output, workers=args.workers, chunk_size=args.chunk_size,
+                                 line_per_game=args.line_per_game)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"📊 {stats.games:,} games ({stats.illegal:,} with illegal moves), {stats.moves:,} moves "
+          f"in {stats.seconds:.2f}s  {stats.games_per_second:,.0f} games/s  "
+          f"{stats.moves_per_second:,.0f} moves/s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
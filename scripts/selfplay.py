@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+引擎對戰工具
+以行程池平行對下兩組引擎設定，逐局回報勝和負、Elo 估計與 SPRT 對數概似比，達到 SPRT 界線時提早結束
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.engine.match import SPRT, EngineConfig, TimeControl, load_openings, run_match
+
+
+def engine_config(name: str, depth, time_ms, increment_ms, hash_mb, searcher) -> EngineConfig:
+    control = TimeControl(time_ms, increment_ms) if time_ms else None
+    return EngineConfig(name, depth=depth, time_control=control, hash_mb=hash_mb, searcher=searcher)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="兩組引擎設定的對戰與 SPRT 檢定")
+    parser.add_argument("--games", type=int, default=1000, help="最多對局數（每個開局兩局）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="平行對局的行程數")
+    parser.add_argument("--openings", help="開局局面檔（每行一個 FEN）")
+    parser.add_argument("--max-plies", type=int, default=300, help="超過此步數判和")
+    parser.add_argument("--seed", type=int, help="開局抽取的亂數種子")
+    for engine in ("a", "b"):
+        parser.add_argument(f"--depth-{engine}", type=int, help=f"引擎 {engine} 的搜尋深度")
+        parser.add_argument(f"--time-{engine}", type=int, help=f"引擎 {engine} 每局時間（毫秒）")
+        parser.add_argument(f"--inc-{engine}", type=int, default=0, help=f"引擎 {engine} 每步加秒（毫秒）")
+        parser.add_argument(f"--hash-{engine}", type=float, default=4, help=f"引擎 {engine} 置換表大小（MB）")
+        parser.add_argument(f"--searcher-{engine}", default="src.engine.search:Searcher",
+                            help=f"引擎 {engine} 的 Searcher 類別（模組:類別）")
+    parser.add_argument("--sprt", type=float, nargs=2, metavar=("ELO0", "ELO1"), help="SPRT 的 H0、H1 Elo 差")
+    parser.add_argument("--alpha", type=float, default=0.05, help="SPRT 第一類錯誤率")
+    parser.add_argument("--beta", type=float, default=0.05, help="SPRT 第二類錯誤率")
+    args = parser.parse_args()
+
+    options = vars(args)
+    engines = []
+    for engine in ("a", "b"):
+        if options[f"depth_{engine}"] is None and options[f"time_{engine}"] is None:
+            options[f"depth_{engine}"] = 2
+        engines.append(engine_config(
+            engine.upper(), options[f"depth_{engine}"], options[f"time_{engine}"],
+            options[f"inc_{engine}"], options[f"hash_{engine}"], options[f"searcher_{engine}"],
+        ))
+    openings = load_openings(args.openings) if args.openings else None
+    sprt = SPRT(args.sprt[0], args.sprt[1], args.alpha, args.beta) if args.sprt else None
+
+    def report(result, stats):
+        elo, margin = stats.elo()
+        line = (f"🔄 game {stats.games:>5}  {result.red} vs {result.black} {result.result:<7} "
+                f"({result.reason}, {result.plies} plies)  +{stats.wins} ={stats.draws} -{stats.losses}  "
+                f"Elo {elo:+.1f} ±{margin:.1f}")
+        if sprt:
+            line += f"  LLR {stats.llr:+.2f} [{sprt.bounds[0]:.2f}, {sprt.bounds[1]:.2f}]"
+        print(line, flush=True)
+
+    stats = run_match(engines[0], engines[1], args.games, openings=openings, workers=args.workers,
+                      sprt=sprt, max_plies=args.max_plies, seed=args.seed, on_result=report)
+    elo, margin = stats.elo()
+    print(f"📊 {stats.games:,} games in {stats.seconds:.1f}s ({stats.games_per_second:.2f} games/s)  "
+          f"A: +{stats.wins} ={stats.draws} -{stats.losses}  Elo {elo:+.1f} ±{margin:.1f}")
+    if stats.decision:
+        print(f"✅ SPRT accepted {stats.decision} after {stats.games} games")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
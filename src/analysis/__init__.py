@@ -0,0 +1 @@
+# Analysis tools built on the Chinese chess rules module
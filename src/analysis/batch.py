@@ -0,0 +1,150 @@
+"""
+以 NumPy 批次驗證走法
+
+盤面編碼為 (N, 10, 9) int8 陣列，[row - 1, col - 1] 存放棋子代碼（與陣列棋盤相同：
+低 3 bits 為兵種，bit 3 為黑方，0 為空格）；走法為 (N, 4) 整數陣列
+(from_row, from_col, to_row, to_col)，座標與 ChineseChessBoard 相同從 1 起算。
+"""
+
+from typing import Iterable
+
+import numpy as np
+
+from src.chinesechess import (
+    BLACK_FLAG, BOARD_COLS, BOARD_ROWS, CANNON, ELEPHANT, GENERAL, GUARD, HORSE, ON_BOARD, ROOK,
+    SOLDIER, TYPE_MASK, ChineseChessBoard,
+)
+
+_BOARD_INDEX = np.array(ON_BOARD, dtype=np.intp)
+_COLS = np.arange(BOARD_COLS)
+_ROWS = np.arange(BOARD_ROWS)
+
+
+def encode_board(board: ChineseChessBoard) -> np.ndarray:
+    """單一棋盤轉為 (10, 9) int8 陣列"""
+    cells = np.frombuffer(board.cells, dtype=np.uint8)
+    return cells[_BOARD_INDEX].astype(np.int8).reshape(BOARD_ROWS, BOARD_COLS)
+
+
+def encode_boards(boards: Iterable[ChineseChessBoard]) -> np.ndarray:
+    """多個棋盤轉為 (N, 10, 9) int8 陣列（可直接傳入 iter_fen_positions 的結果）"""
+    encoded = [encode_board(board) for board in boards]
+    if not encoded:
+        return np.zeros((0, BOARD_ROWS, BOARD_COLS), dtype=np.int8)
+    return np.stack(encoded)
+
+
+def validate_moves_batch(boards_array: np.ndarray, moves_array: np.ndarray, full_rules: bool = False) -> np.ndarray:
+    """
+    批次判斷走法是否符合兵種規則
+
+    預設結果與 ChineseChessBoard 的 is_*_move_legal 完全一致（只看起點棋子的走法規則）；
+    full_rules=True 時再加上 move_piece 的檢查：起終點相同、吃自己的棋子、將帥對面。
+
+    Args:
+        boards_array: (N, 10, 9) 盤面；傳入單一 (10, 9) 盤面時所有走法共用
+        moves_array: (N, 4) 走法 (from_row, from_col, to_row, to_col)
+
+    Returns:
+        np.ndarray: (N,) bool，起點沒有棋子或座標超出棋盤時為 False
+    """
+    boards = np.asarray(boards_array, dtype=np.int8)
+    moves = np.asarray(moves_array)
+    if moves.ndim != 2 or moves.shape[1] != 4:
+        raise ValueError(f"moves_array must have shape (N, 4), got {moves.shape}")
+    if boards.shape == (BOARD_ROWS, BOARD_COLS):
+        boards = np.broadcast_to(boards, (len(moves), BOARD_ROWS, BOARD_COLS))
+    if boards.shape != (len(moves), BOARD_ROWS, BOARD_COLS):
+        raise ValueError(f"boards_array must have shape ({len(moves)}, 10, 9), got {boards.shape}")
+
+    moves = moves.astype(np.intp) - 1
+    fr, fc, tr, tc = moves.T
+    inside = ((fr >= 0) & (fr < BOARD_ROWS) & (fc >= 0) & (fc < BOARD_COLS)
+              & (tr >= 0) & (tr < BOARD_ROWS) & (tc >= 0) & (tc < BOARD_COLS))
+    # 超出棋盤的座標先夾回棋盤內，避免索引錯誤，最後再以 inside 過濾
+    fr, tr = np.clip(fr, 0, BOARD_ROWS - 1), np.clip(tr, 0, BOARD_ROWS - 1)
+    fc, tc = np.clip(fc, 0, BOARD_COLS - 1), np.clip(tc, 0, BOARD_COLS - 1)
+    n = np.arange(len(moves))
+    code = boards[n, fr, fc].astype(np.intp)
+    target = boards[n, tr, tc]
+    kind = code & TYPE_MASK
+    black = (code & BLACK_FLAG) != 0
+    dr, dc = tr - fr, tc - fc
+    adr, adc = np.abs(dr), np.abs(dc)
+    # 以 0 起算的列：紅方九宮 0-2、黑方九宮 7-9，河界在 4/5 之間
+    in_palace = (tc >= 3) & (tc <= 5) & np.where(black, tr >= 7, tr <= 2)
+
+    result = np.zeros(len(moves), dtype=bool)
+
+    sel = kind == GENERAL
+    result[sel] = in_palace[sel] & (adr[sel] + adc[sel] == 1)
+
+    sel = kind == GUARD
+    result[sel] = in_palace[sel] & (adr[sel] == 1) & (adc[sel] == 1)
+
+    sel = np.flatnonzero(kind == HORSE)
+    if len(sel):
+        ok = ((adr[sel] == 2) & (adc[sel] == 1)) | ((adr[sel] == 1) & (adc[sel] == 2))
+        leg_r = fr[sel] + np.where(adr[sel] == 2, np.sign(dr[sel]), 0)
+        leg_c = fc[sel] + np.where(adc[sel] == 2, np.sign(dc[sel]), 0)
+        result[sel] = ok & (boards[sel, leg_r, leg_c] == 0)
+
+    sel = np.flatnonzero(kind == ELEPHANT)
+    if len(sel):
+        own_half = np.where(black[sel], tr[sel] >= 5, tr[sel] <= 4)
+        eye = boards[sel, (fr[sel] + tr[sel]) >> 1, (fc[sel] + tc[sel]) >> 1]
+        result[sel] = (adr[sel] == 2) & (adc[sel] == 2) & own_half & (eye == 0)
+
+    sel = np.flatnonzero(kind == SOLDIER)
+    if len(sel):
+        d, b, row = dr[sel], black[sel], fr[sel]
+        # 保留本模組的兵向：紅兵往 row 減少走，row >= 6（0 起算為 5）算過河；黑卒相反
+        crossed = np.where(b, row <= 4, row >= 5)
+        forward = np.where(b, 1, -1)
+        result[sel] = (adr[sel] + adc[sel] == 1) & np.where(crossed, d != -forward, d == forward)
+
+    sel = np.flatnonzero((kind == ROOK) | (kind == CANNON))
+    if len(sel):
+        between = _count_between(boards[sel] != 0, fr[sel], fc[sel], tr[sel], tc[sel])
+        on_line = (dr[sel] == 0) | (dc[sel] == 0)
+        capture = target[sel] != 0
+        cannon_ok = np.where(capture, between == 1, between == 0)
+        result[sel] = on_line & np.where(kind[sel] == ROOK, between == 0, cannon_ok)
+
+    result &= inside & (code != 0)
+    if full_rules:
+        result &= (dr != 0) | (dc != 0)
+        result &= (target == 0) | (((target.astype(np.intp) ^ code) & BLACK_FLAG) != 0)
+        sel = np.flatnonzero(result & (kind == GENERAL))
+        if len(sel):
+            result[sel] = ~_generals_face_after(boards[sel], black[sel], fr[sel], fc[sel], tr[sel], tc[sel])
+    return result
+
+
+def _count_between(occupied: np.ndarray, fr, fc, tr, tc) -> np.ndarray:
+    """同一橫列或直行上，起點與終點之間（不含兩端）的棋子數"""
+    n = np.arange(len(fr))
+    low_c, high_c = np.minimum(fc, tc), np.maximum(fc, tc)
+    row_mask = (_COLS > low_c[:, None]) & (_COLS < high_c[:, None])
+    in_row = (occupied[n, fr] & row_mask).sum(axis=1)
+    low_r, high_r = np.minimum(fr, tr), np.maximum(fr, tr)
+    col_mask = (_ROWS > low_r[:, None]) & (_ROWS < high_r[:, None])
+    in_col = (occupied[n, :, fc] & col_mask).sum(axis=1)
+    return np.where(fr == tr, in_row, in_col)
+
+
+def _generals_face_after(boards: np.ndarray, black, fr, fc, tr, tc) -> np.ndarray:
+    """將帥從 (fr, fc) 走到 (tr, tc) 後是否與對方將帥對面"""
+    flat = boards.reshape(len(boards), -1)
+    enemy = np.where(black, GENERAL, GENERAL | BLACK_FLAG)
+    found = flat == enemy[:, None]
+    where = found.argmax(axis=1)
+    er, ec = where // BOARD_COLS, where % BOARD_COLS
+    # 對方將帥不在棋盤上或被吃掉時不算對面
+    present = found.any(axis=1) & ~((er == tr) & (ec == tc))
+    occupied = boards != 0
+    between = _count_between(occupied, tr, tc, er, tc)
+    # 起點在兩者之間時，走完後該格已空
+    low, high = np.minimum(tr, er), np.maximum(tr, er)
+    between -= (fc == tc) & (fr > low) & (fr < high)
+    return present & (ec == tc) & (between == 0)
@@ -0,0 +1,265 @@
+"""
+訓練資料匯出：局面轉為 NumPy 特徵平面
+
+每個局面輸出三個陣列：
+- planes：(14, 10, 9) uint8 one-hot，平面 0-6 為紅方 帥仕車馬炮相兵，7-13 為黑方同序
+- side：輪走方（0 = 紅, 1 = 黑）
+- masks：合法走法遮罩，90 x 90（起點 x 終點，格子依 row、col 順序）以 np.packbits 壓成 1013 bytes
+
+平面由 (N, 10, 9) 棋子代碼陣列一次比較產生，不逐一走訪 board.pieces；
+32 bytes 的局面編碼（src/analysis/packing.py）可直接以位元運算整批解碼，完全不經過棋盤物件。
+合法走法仍需規則引擎逐局產生，不需要時可關閉。
+
+FeatureWriter 以固定大小的區塊寫入 .npy 檔（np.lib.format.open_memmap），
+記憶體中只保留一個小批次，區塊寫滿就換下一個檔案，最後一個區塊在 close 時截成實際長度。
+"""
+
+import os
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.analysis.batch import encode_board
+from src.analysis.packing import MAX_PIECES, Buffer, as_array, unpack
+from src.chinesechess import BLACK_FLAG, BOARD_COLS, BOARD_ROWS, BOARD_SIZE, ON_BOARD, ChineseChessBoard
+
+PLANES = 14
+SQUARES = BOARD_ROWS * BOARD_COLS
+MASK_BITS = SQUARES * SQUARES
+MASK_BYTES = (MASK_BITS + 7) // 8
+DEFAULT_CHUNK_SIZE = 65536
+DEFAULT_BATCH_SIZE = 4096
+
+# 平面順序對應的棋子代碼
+PLANE_CODES = np.array([code for flag in (0, BLACK_FLAG) for code in range(flag + 1, flag + 8)], dtype=np.int8)
+_PLANE_CODES = PLANE_CODES.reshape(1, PLANES, 1, 1)
+
+# 格子 -> 0..89 的索引
+_SQUARE_INDEX = [-1] * BOARD_SIZE
+for _i, _sq in enumerate(ON_BOARD):
+    _SQUARE_INDEX[_sq] = _i
+
+# 局面編碼的位元配置（與 packing 相同）
+_OCCUPANCY_BITS = slice(1, 1 + SQUARES)
+_CODES_BIT = 1 + SQUARES
+_NIBBLE = np.array([1, 2, 4, 8], dtype=np.int8)
+
+_CHUNK_FILE = re.compile(r"planes-(\d{5})\.npy$")
+
+
+def planes_from_codes(codes: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """(N, 10, 9) 棋子代碼陣列轉為 (N, 14, 10, 9) uint8 one-hot 平面"""
+    codes = np.asarray(codes, dtype=np.int8)
+    if codes.ndim != 3 or codes.shape[1:] != (BOARD_ROWS, BOARD_COLS):
+        raise ValueError(f"codes must have shape (N, 10, 9), got {codes.shape}")
+    if out is None:
+        out = np.empty((len(codes), PLANES, BOARD_ROWS, BOARD_COLS), dtype=np.uint8)
+    out[...] = codes[:, None] == _PLANE_CODES
+    return out
+
+
+def codes_from_packed(buffer: Buffer) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    整批解碼 32 bytes 局面編碼，回傳 ((N, 10, 9) int8 棋子代碼, (N,) uint8 輪走方)
+
+    第 k 個有子的格子（依格子順序）對應第 k 個 4-bit 棋子代碼，以佔用點陣的累計和一次取出
+    """
+    rows = as_array(buffer)
+    bits = np.unpackbits(rows, axis=1, bitorder="little")
+    occupied = bits[:, _OCCUPANCY_BITS].view(bool)
+    stream = bits[:, _CODES_BIT:_CODES_BIT + 4 * MAX_PIECES].reshape(len(rows), MAX_PIECES, 4) @ _NIBBLE
+    order = np.cumsum(occupied, axis=1, dtype=np.intp)
+    np.subtract(order, 1, out=order)
+    np.maximum(order, 0, out=order)
+    codes = np.take_along_axis(stream, order, axis=1)
+    codes[~occupied] = 0
+    if np.any(occupied & (codes & 7 == 0)):
+        raise ValueError("Invalid packed position")
+    return codes.astype(np.int8).reshape(-1, BOARD_ROWS, BOARD_COLS), bits[:, 0].copy()
+
+
+def legal_move_indices(board: ChineseChessBoard) -> List[int]:
+    """輪走方合法走法在 90 x 90 遮罩中的位置（起點索引 * 90 + 終點索引）"""
+    index = _SQUARE_INDEX
+    return [index[move >> 8] * SQUARES + index[move & 0xFF]
+            for move in board.generate_legal_move_codes(board.side)]
+
+
+def pack_masks(indices: List[List[int]]) -> np.ndarray:
+    """每個局面的遮罩位置清單轉為 (N, 1013) uint8（np.packbits）"""
+    bits = np.zeros((len(indices), MASK_BITS), dtype=bool)
+    rows = np.repeat(np.arange(len(indices)), [len(row) for row in indices])
+    bits[rows, np.fromiter((i for row in indices for i in row), dtype=np.intp, count=len(rows))] = True
+    return np.packbits(bits, axis=1)
+
+
+def unpack_masks(masks: np.ndarray) -> np.ndarray:
+    """(N, 1013) 壓縮遮罩還原為 (N, 90, 90) bool"""
+    masks = np.asarray(masks, dtype=np.uint8)
+    bits = np.unpackbits(masks, axis=-1, count=MASK_BITS)
+    return bits.reshape(*masks.shape[:-1], SQUARES, SQUARES).astype(bool)
+
+
+def encode_positions(boards: Iterable[ChineseChessBoard], masks: bool = True):
+    """
+    局面一次轉為 (planes, side, masks)；masks=False 時第三項為 None
+
+    適合小量資料，大量資料請用 FeatureWriter 串流寫檔
+    """
+    codes, sides, indices = [], [], []
+    for board in boards:
+        codes.append(encode_board(board))
+        sides.append(board.side)
+        if masks:
+            indices.append(legal_move_indices(board))
+    codes = np.stack(codes) if codes else np.zeros((0, BOARD_ROWS, BOARD_COLS), dtype=np.int8)
+    return planes_from_codes(codes), np.array(sides, dtype=np.uint8), pack_masks(indices) if masks else None
+
+
+class FeatureWriter:
+    """
+    串流寫入特徵資料到目錄中的分塊 .npy 檔
+
+    每個區塊為 planes-00000.npy、side-00000.npy、masks-00000.npy（masks=False 時不寫）。
+    目錄中已有區塊時從下一個編號接續寫入。append / extend 可直接接 iter_fen_positions
+    （每次 yield 同一個棋盤物件也沒關係，內容會立即複製到批次緩衝區）。
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        masks: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        if chunk_size < 1 or batch_size < 1:
+            raise ValueError("chunk_size and batch_size must be positive")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.masks = masks
+        self.batch_size = min(batch_size, chunk_size)
+        self.count = 0
+        self._chunk = max((int(m.group(1)) + 1 for m in map(_CHUNK_FILE.match, os.listdir(directory)) if m),
+                          default=0)
+        self._arrays: Optional[dict] = None
+        self._filled = 0
+        self._codes = np.zeros((self.batch_size, BOARD_ROWS, BOARD_COLS), dtype=np.int8)
+        self._sides = np.zeros(self.batch_size, dtype=np.uint8)
+        self._indices: List[List[int]] = []
+        self._pending = 0
+        self._board = ChineseChessBoard()
+
+    def __enter__(self) -> "FeatureWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def append(self, board: ChineseChessBoard) -> None:
+        self._codes[self._pending] = encode_board(board)
+        self._sides[self._pending] = board.side
+        if self.masks:
+            self._indices.append(legal_move_indices(board))
+        self._pending += 1
+        if self._pending == self.batch_size:
+            self._flush_pending()
+
+    def extend(self, boards: Iterable[ChineseChessBoard]) -> None:
+        for board in boards:
+            self.append(board)
+
+    def extend_packed(self, buffer: Buffer) -> None:
+        """
+        寫入 32 bytes 局面編碼
+
+        平面整批由位元運算解碼；需要合法走法遮罩時才逐局還原為棋盤
+        """
+        self._flush_pending()
+        rows = as_array(buffer)
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            codes, sides = codes_from_packed(batch)
+            masks = None
+            if self.masks:
+                board = self._board
+                masks = pack_masks([legal_move_indices(unpack(row, board)) for row in batch])
+            self._write(codes, sides, masks)
+
+    def close(self) -> None:
+        """寫出剩餘的批次，並把最後一個區塊截成實際長度"""
+        self._flush_pending()
+        if self._arrays is not None:
+            # 寫滿的區塊已在 _write 中關閉，這裡只會是未滿的最後一個區塊
+            for name, array in self._arrays.items():
+                path = self._path(name, self._chunk)
+                temp = path + ".tmp"
+                trimmed = np.lib.format.open_memmap(temp, mode="w+", dtype=array.dtype,
+                                                    shape=(self._filled,) + array.shape[1:])
+                trimmed[:] = array[:self._filled]
+                trimmed.flush()
+                del trimmed
+                os.replace(temp, path)
+            self._arrays = None
+            self._filled = 0
+            self._chunk += 1
+
+    def _flush_pending(self) -> None:
+        if not self._pending:
+            return
+        count = self._pending
+        masks = pack_masks(self._indices) if self.masks else None
+        self._write(self._codes[:count], self._sides[:count], masks)
+        self._pending = 0
+        self._indices = []
+
+    def _write(self, codes: np.ndarray, sides: np.ndarray, masks: Optional[np.ndarray]) -> None:
+        offset = 0
+        while offset < len(codes):
+            if self._arrays is None:
+                self._open_chunk()
+            take = min(len(codes) - offset, self.chunk_size - self._filled)
+            rows = slice(self._filled, self._filled + take)
+            planes_from_codes(codes[offset:offset + take], out=self._arrays["planes"][rows])
+            self._arrays["side"][rows] = sides[offset:offset + take]
+            if masks is not None:
+                self._arrays["masks"][rows] = masks[offset:offset + take]
+            self._filled += take
+            self.count += take
+            offset += take
+            if self._filled == self.chunk_size:
+                self._close_chunk()
+
+    def _path(self, name: str, chunk: int) -> str:
+        return os.path.join(self.directory, f"{name}-{chunk:05d}.npy")
+
+    def _open_chunk(self) -> None:
+        shapes = {
+            "planes": ((self.chunk_size, PLANES, BOARD_ROWS, BOARD_COLS), np.uint8),
+            "side": ((self.chunk_size,), np.uint8),
+        }
+        if self.masks:
+            shapes["masks"] = ((self.chunk_size, MASK_BYTES), np.uint8)
+        self._arrays = {
+            name: np.lib.format.open_memmap(self._path(name, self._chunk), mode="w+", dtype=dtype, shape=shape)
+            for name, (shape, dtype) in shapes.items()
+        }
+        self._filled = 0
+
+    def _close_chunk(self) -> None:
+        for array in self._arrays.values():
+            array.flush()
+        self._arrays = None
+        self._filled = 0
+        self._chunk += 1
+
+
+def iter_chunks(directory: str) -> Iterator[Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]]:
+    """依序以唯讀 memmap 開啟每個區塊，回傳 (planes, side, masks)；沒有遮罩時 masks 為 None"""
+    chunks = sorted(int(m.group(1)) for m in map(_CHUNK_FILE.match, os.listdir(directory)) if m)
+    for chunk in chunks:
+        def load(name: str) -> Optional[np.ndarray]:
+            path = os.path.join(directory, f"{name}-{chunk:05d}.npy")
+            return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+        yield load("planes"), load("side"), load("masks")
@@ -0,0 +1,101 @@
+"""
+互動查詢用的合法目標格快取
+
+前端在每次滑鼠移過或拖曳棋子時詢問「這顆棋子能走到哪些格子」，大量使用者查詢的
+多半是相同局面。以 (Zobrist 雜湊, 起點格) 為鍵快取目標格集合，採固定容量的 LRU。
+Zobrist 雜湊已包含輪走方，盤面一有變動鍵就不同，舊的項目不會被誤用，
+之後自然被 LRU 淘汰，不需要另外通知快取。
+"""
+
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Dict, FrozenSet, Tuple
+
+from src.chinesechess import BLACK_FLAG, ChineseChessBoard, position_of, square_of
+
+Position = Tuple[int, int]
+
+DEFAULT_CAPACITY = 65536
+
+_NO_TARGETS: FrozenSet[Position] = frozenset()
+
+
+@dataclass
+class CacheStats:
+    """命中、未命中與淘汰次數"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def snapshot(self) -> Dict[str, float]:
+        return dict(asdict(self), lookups=self.lookups, hit_rate=self.hit_rate)
+
+
+class LegalMoveCache:
+    """
+    以 (zobrist, 起點格) 為鍵的 LRU 快取，值為目標格 (row, col) 的 frozenset
+
+    預設結果與 legal_moves_from / move_piece 的判定一致；strict=True 時再排除
+    走完後己方將帥被攻擊的目標格。起點不在棋盤上或沒有棋子時回傳空集合，且不快取。
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, strict: bool = False):
+        if capacity < 1:
+            raise ValueError("Cache capacity must be positive")
+        self.capacity = capacity
+        self.strict = strict
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Tuple[int, int], FrozenSet[Position]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """清空快取（統計不歸零）"""
+        self._entries.clear()
+
+    def targets(self, board: ChineseChessBoard, position: Position) -> FrozenSet[Position]:
+        """指定位置棋子在目前局面可到達的目標格"""
+        sq = square_of(position)
+        if sq is None or not board.cells[sq]:
+            return _NO_TARGETS
+        key = (board.zobrist, sq)
+        entries = self._entries
+        targets = entries.get(key)
+        if targets is not None:
+            entries.move_to_end(key)
+            self.stats.hits += 1
+            return targets
+        self.stats.misses += 1
+        targets = self._compute(board, sq)
+        entries[key] = targets
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+            self.stats.evictions += 1
+        return targets
+
+    def can_move(self, board: ChineseChessBoard, from_pos: Position, to_pos: Position) -> bool:
+        """拖曳放下時的判定，與 targets 共用快取"""
+        return tuple(to_pos) in self.targets(board, from_pos)
+
+    def _compute(self, board: ChineseChessBoard, sq: int) -> FrozenSet[Position]:
+        moves = []
+        board._generate_from(sq, moves)
+        if self.strict and moves:
+            side = 1 if board.cells[sq] & BLACK_FLAG else 0
+            safe = []
+            for move in moves:
+                board.make_move(move)
+                if not board._general_attacked(side):
+                    safe.append(move)
+                board.unmake_move()
+            moves = safe
+        return frozenset(position_of(move & 0xFF) for move in moves)
@@ -0,0 +1,124 @@
+"""
+固定 32 bytes 的局面編碼
+
+bit 0 為走棋方，bit 1-90 為 90 格的佔用點陣（依 ON_BOARD 順序），之後依格子順序每個棋子 4 bits 棋子代碼，
+最多 32 個棋子共 219 bits，以 little-endian 存成 32 bytes。
+左右鏡像的局面在規則上等價，canonical=True 時取兩種編碼中較小者，鏡像局面會得到相同的 key。
+"""
+
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Union
+
+from src.chinesechess import BOARD_COLS, BOARD_SIZE, ON_BOARD, TYPE_MASK, ChineseChessBoard, position_of, square
+
+PACKED_SIZE = 32
+MAX_PIECES = 32
+_OCCUPANCY_MASK = (1 << len(ON_BOARD)) - 1
+_CODES_BIT = 1 + len(ON_BOARD)
+
+# 格子 -> 點陣位置，以及左右鏡像後的點陣位置
+_INDEX = [-1] * BOARD_SIZE
+_MIRROR_INDEX = [-1] * BOARD_SIZE
+for _i, _sq in enumerate(ON_BOARD):
+    _INDEX[_sq] = _i
+for _sq in ON_BOARD:
+    _row, _col = position_of(_sq)
+    _MIRROR_INDEX[_sq] = _INDEX[square(_row, BOARD_COLS + 1 - _col)]
+_VALID_CODES = frozenset(code for code in range(16) if code & TYPE_MASK)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# numpy 只在 as_array、unique_positions 內載入，只用 pack/unpack 時不需要安裝
+Buffer = Union[bytes, bytearray, memoryview, "np.ndarray"]
+
+
+def pack(board: ChineseChessBoard, mirror: bool = False) -> bytes:
+    """盤面編碼為 32 bytes；mirror=True 時編碼左右鏡像後的盤面"""
+    cells = board.cells
+    table = _MIRROR_INDEX if mirror else _INDEX
+    squares = board.piece_squares[0] + board.piece_squares[1]
+    if len(squares) > MAX_PIECES:
+        raise ValueError(f"Cannot pack more than {MAX_PIECES} pieces")
+    value = board.side
+    bit = _CODES_BIT
+    for index, code in sorted((table[sq], cells[sq]) for sq in squares):
+        value |= 1 << (index + 1) | code << bit
+        bit += 4
+    return value.to_bytes(PACKED_SIZE, "little")
+
+
+def canonical_pack(board: ChineseChessBoard) -> bytes:
+    """盤面與其左右鏡像中編碼較小者，作為去重用的 key"""
+    return min(pack(board), pack(board, mirror=True))
+
+
+def unpack(data: Buffer, board: Optional[ChineseChessBoard] = None) -> ChineseChessBoard:
+    """
+    32 bytes 編碼還原為盤面（傳入 board 時重複使用該物件）
+
+    編碼內容不合法時 raise ValueError
+    """
+    if len(data) != PACKED_SIZE:
+        raise ValueError(f"Packed position must be {PACKED_SIZE} bytes, got {len(data)}")
+    value = int.from_bytes(bytes(data), "little")
+    board = board if board is not None else ChineseChessBoard()
+    board.clear()
+    occupancy = (value >> 1) & _OCCUPANCY_MASK
+    bit = _CODES_BIT
+    put = board._put
+    while occupancy:
+        low = occupancy & -occupancy
+        occupancy ^= low
+        code = (value >> bit) & 15
+        if code not in _VALID_CODES:
+            board.clear()
+            raise ValueError("Invalid packed position")
+        put(ON_BOARD[low.bit_length() - 1], code)
+        bit += 4
+    if value >> bit:
+        board.clear()
+        raise ValueError("Invalid packed position")
+    board._set_side(value & 1)
+    return board
+
+
+def pack_many(boards: Iterable[ChineseChessBoard], canonical: bool = False) -> bytearray:
+    """多個盤面依序編碼到一個連續的 buffer（每個 32 bytes）"""
+    encode = canonical_pack if canonical else pack
+    out = bytearray()
+    for board in boards:
+        out += encode(board)
+    return out
+
+
+def unpack_many(buffer: Buffer, board: Optional[ChineseChessBoard] = None) -> Iterator[ChineseChessBoard]:
+    """
+    逐一還原 buffer 內的盤面，每次 yield 的都是同一個棋盤物件
+
+    buffer 可為 bytes、bytearray、memoryview 或 (N, 32) uint8 的 numpy 陣列，不會複製整個 buffer
+    """
+    view = memoryview(buffer).cast("B")
+    if len(view) % PACKED_SIZE:
+        raise ValueError(f"Buffer size must be a multiple of {PACKED_SIZE}")
+    board = board if board is not None else ChineseChessBoard()
+    for offset in range(0, len(view), PACKED_SIZE):
+        yield unpack(view[offset:offset + PACKED_SIZE], board)
+
+
+def as_array(buffer: Buffer) -> "np.ndarray":
+    """buffer 視為 (N, 32) uint8 陣列（不複製）"""
+    import numpy as np
+
+    array = np.frombuffer(memoryview(buffer).cast("B"), dtype=np.uint8)
+    if array.size % PACKED_SIZE:
+        raise ValueError(f"Buffer size must be a multiple of {PACKED_SIZE}")
+    return array.reshape(-1, PACKED_SIZE)
+
+
+def unique_positions(buffer: Buffer) -> "np.ndarray":
+    """去除重複的編碼，回傳排序後的 (M, 32) uint8 陣列；搭配 canonical 編碼可同時合併鏡像局面"""
+    import numpy as np
+
+    rows = np.ascontiguousarray(as_array(buffer))
+    keys = rows.view(np.dtype((np.void, PACKED_SIZE))).ravel()
+    return np.unique(keys).view(np.uint8).reshape(-1, PACKED_SIZE)
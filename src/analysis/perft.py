@@ -0,0 +1,93 @@
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.chinesechess import (
+    ChineseChessBoard, GENERAL, TYPE_MASK, position_of, side_of,
+)
+
+REFERENCE_FILE = Path(__file__).parent / "perft_reference.json"
+
+
+def perft(board: ChineseChessBoard, depth: int, color) -> int:
+    """計算從目前盤面走 depth 步後的葉節點數（走法交替由 color 開始）"""
+    side = side_of(color)
+    return _perft(board, depth, side)
+
+
+def _perft(board: ChineseChessBoard, depth: int, side: int) -> int:
+    moves = board.generate_legal_move_codes(side)
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    for move in moves:
+        captured = board.make_move(move).captured
+        # 吃掉將帥即分出勝負，之後沒有任何走法
+        if captured & TYPE_MASK != GENERAL:
+            nodes += _perft(board, depth - 1, 1 - side)
+        board.unmake_move()
+    return nodes
+
+
+def divide(board: ChineseChessBoard, depth: int, color) -> Dict[str, int]:
+    """列出每個根節點走法底下的葉節點數，用於定位規則差異"""
+    side = side_of(color)
+    result = {}
+    for move in board.generate_legal_move_codes(side):
+        captured = board.make_move(move).captured
+        if depth <= 1:
+            nodes = 1
+        elif captured & TYPE_MASK == GENERAL:
+            nodes = 0
+        else:
+            nodes = _perft(board, depth - 1, 1 - side)
+        board.unmake_move()
+        result[f"{position_of(move >> 8)}->{position_of(move & 0xFF)}"] = nodes
+    return result
+
+
+@dataclass
+class PerftReport:
+    """單一局面、單一深度的 perft 結果"""
+    name: str
+    depth: int
+    nodes: int
+    expected: Optional[int]
+    seconds: float
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.expected is None or self.nodes == self.expected
+
+
+def load_reference(path: Path = REFERENCE_FILE) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["positions"]
+
+
+def build_board(entry: dict) -> ChineseChessBoard:
+    """從參考資料中的 FEN 建立棋盤"""
+    return ChineseChessBoard.from_fen(entry["fen"])
+
+
+def run_reference(max_depth: Optional[int] = None, names: Optional[List[str]] = None,
+                  path: Path = REFERENCE_FILE) -> List[PerftReport]:
+    """對參考局面跑 perft，並與儲存的節點數比對"""
+    reports = []
+    for entry in load_reference(path):
+        if names and entry["name"] not in names:
+            continue
+        board = build_board(entry)
+        for depth, expected in enumerate(entry["counts"], start=1):
+            if max_depth is not None and depth > max_depth:
+                break
+            start = time.perf_counter()
+            nodes = perft(board, depth, board.side)
+            reports.append(PerftReport(entry["name"], depth, nodes, expected, time.perf_counter() - start))
+    return reports
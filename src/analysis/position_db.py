@@ -0,0 +1,366 @@
+"""
+以 SQLite 建立索引的局面資料庫
+
+對局只在匯入時重播一次，每個出現過的局面（以 32 bytes 編碼去重）存一列，並預先算好：
+- Zobrist key（有索引）
+- 子力簽名，如 "RHC vs RCC"（有索引；依 R H C A E P 排序，不含將帥）
+- 每方每個兵種的數量（如 black_elephant）
+- pieces 反向索引表：每個 (兵種, 格子) 對應到有這個棋子的局面，
+  格子依 (row - 1) * 9 + (col - 1) 編號（與點陣的 bit 相同），主鍵即為 (兵種, 格子, 局面) 索引
+
+查詢條件轉為 SQL，點陣條件轉為對 pieces 主鍵的查詢，不需要重播對局、還原棋盤或掃描整個 positions 表：
+
+    db.search(counts={"black_elephant": 0}, any_of={"red_rook": file_mask(5)})
+
+occurrences 表記錄每個局面出現在哪一局的第幾步。
+"""
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.analysis.packing import pack, unpack
+from src.analysis.records import GameRecord, parse_move
+from src.chinesechess import (
+    BLACK_FLAG, BOARD_COLS, BOARD_ROWS, CANNON, ELEPHANT, GENERAL, GUARD, HORSE, ROOK, SOLDIER, TYPE_MASK,
+    ChineseChessBoard, square,
+)
+
+_KINDS = {GENERAL: "general", GUARD: "guard", ROOK: "rook", HORSE: "horse",
+          CANNON: "cannon", ELEPHANT: "elephant", SOLDIER: "soldier"}
+# 欄位名稱，依棋子代碼索引
+PIECE_NAMES = {flag | kind: f"{color}_{name}" for flag, color in ((0, "red"), (BLACK_FLAG, "black"))
+               for kind, name in _KINDS.items()}
+_COLUMNS = list(PIECE_NAMES.values())
+
+# 子力簽名的兵種順序與字母（WXF）
+_SIGNATURE_ORDER = (ROOK, HORSE, CANNON, GUARD, ELEPHANT, SOLDIER)
+_SIGNATURE_LETTERS = {ROOK: "R", HORSE: "H", CANNON: "C", GUARD: "A", ELEPHANT: "E", SOLDIER: "P"}
+_LETTER_RANK = {letter: rank for rank, letter in enumerate("RHCAEP")}
+
+_SQUARES = BOARD_ROWS * BOARD_COLS
+# 棋盤格子 -> 格子編號（點陣的 bit 位置）
+_SQUARE_INDEX = {square(row, col): (row - 1) * BOARD_COLS + col - 1
+                 for row in range(1, BOARD_ROWS + 1) for col in range(1, BOARD_COLS + 1)}
+_PIECE_CODES = {name: code for code, name in PIECE_NAMES.items()}
+
+# 資料表格式變更時遞增，舊格式的資料庫需要重新匯入
+SCHEMA_VERSION = 2
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS positions (
+    id INTEGER PRIMARY KEY,
+    packed BLOB NOT NULL UNIQUE,
+    key INTEGER NOT NULL,
+    side INTEGER NOT NULL,
+    signature TEXT NOT NULL,
+    occurrences INTEGER NOT NULL DEFAULT 1,
+    {", ".join(f"{name} INTEGER NOT NULL" for name in _COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS positions_key ON positions (key);
+CREATE INDEX IF NOT EXISTS positions_signature ON positions (signature, side);
+CREATE TABLE IF NOT EXISTS pieces (
+    piece INTEGER NOT NULL,
+    square INTEGER NOT NULL,
+    position_id INTEGER NOT NULL REFERENCES positions (id),
+    PRIMARY KEY (piece, square, position_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    headers TEXT NOT NULL,
+    result TEXT,
+    plies INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS occurrences (
+    position_id INTEGER NOT NULL REFERENCES positions (id),
+    game_id INTEGER NOT NULL REFERENCES games (id),
+    ply INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS occurrences_position ON occurrences (position_id);
+"""
+
+# 不使用 UPSERT ... RETURNING（需要 SQLite 3.35 以上），以 INSERT OR IGNORE 判斷是否為新局面
+_INSERT = (
+    f"INSERT OR IGNORE INTO positions (packed, key, side, signature, {', '.join(_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * (4 + len(_COLUMNS)))})"
+)
+
+
+# ---------------------------------------------------------------------------
+# 點陣與簽名
+# ---------------------------------------------------------------------------
+def squares_mask(positions: Iterable[Tuple[int, int]]) -> int:
+    """指定格子 (row, col) 的 90-bit 點陣"""
+    mask = 0
+    for row, col in positions:
+        if not (1 <= row <= BOARD_ROWS and 1 <= col <= BOARD_COLS):
+            raise ValueError(f"Position off board: {(row, col)}")
+        mask |= 1 << _SQUARE_INDEX[square(row, col)]
+    return mask
+
+
+def file_mask(col: int) -> int:
+    """一整個直行（col 1-9，與棋盤座標相同）"""
+    return squares_mask((row, col) for row in range(1, BOARD_ROWS + 1))
+
+
+def rank_mask(row: int) -> int:
+    """一整個橫列（row 1-10）"""
+    return squares_mask((row, col) for col in range(1, BOARD_COLS + 1))
+
+
+def material_signature(board: ChineseChessBoard) -> str:
+    """子力簽名，如 "RRHHCCAAEEPPPPP vs RRHHCCAAEEPPPPP"；只剩將帥的一方為空字串"""
+    cells = board.cells
+    sides = []
+    for side in (0, 1):
+        kinds = sorted((cells[sq] & TYPE_MASK for sq in board.piece_squares[side]
+                        if cells[sq] & TYPE_MASK != GENERAL), key=_SIGNATURE_ORDER.index)
+        sides.append("".join(_SIGNATURE_LETTERS[kind] for kind in kinds))
+    return " vs ".join(sides)
+
+
+def normalize_signature(text: str) -> str:
+    """使用者輸入的簽名轉為標準順序（不分大小寫、忽略 K），如 "chr vs CCR" -> "RHC vs RCC" """
+    parts = text.upper().split("VS")
+    if len(parts) != 2:
+        raise ValueError(f"Signature must look like 'RHC vs RCC': {text!r}")
+    sides = []
+    for part in parts:
+        letters = [letter for letter in part if not letter.isspace() and letter != "K"]
+        if any(letter not in _LETTER_RANK for letter in letters):
+            raise ValueError(f"Unknown piece letter in signature: {text!r}")
+        sides.append("".join(sorted(letters, key=_LETTER_RANK.__getitem__)))
+    return " vs ".join(sides)
+
+
+def _signed(key: int) -> int:
+    """SQLite 整數為有號 64 bits"""
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+def _row_values(board: ChineseChessBoard, packed: bytes) -> Tuple[tuple, List[Tuple[int, int]]]:
+    """positions 表的一列，以及 pieces 表的 (兵種, 格子編號)"""
+    counts = dict.fromkeys(PIECE_NAMES, 0)
+    cells = board.cells
+    pieces = []
+    for side_squares in board.piece_squares:
+        for sq in side_squares:
+            code = cells[sq]
+            counts[code] += 1
+            pieces.append((code, _SQUARE_INDEX[sq]))
+    values = (packed, _signed(board.zobrist), board.side, material_signature(board),
+              *(counts[code] for code in PIECE_NAMES))
+    return values, pieces
+
+
+def _mask_squares(name: str, mask: int) -> List[int]:
+    """點陣中的格子編號"""
+    if mask < 0 or mask >> _SQUARES:
+        raise ValueError(f"Mask for {name} has bits beyond the 90 squares")
+    return [index for index in range(_SQUARES) if mask >> index & 1]
+
+
+# ---------------------------------------------------------------------------
+# 資料庫
+# ---------------------------------------------------------------------------
+@dataclass
+class PositionRecord:
+    id: int
+    packed: bytes
+    key: int
+    side: int
+    signature: str
+    occurrences: int
+
+    def board(self, board: Optional[ChineseChessBoard] = None) -> ChineseChessBoard:
+        return unpack(self.packed, board)
+
+    @property
+    def fen(self) -> str:
+        return self.board().to_fen()
+
+
+class PositionDB:
+    """局面資料庫；path 為 ":memory:" 時只存在記憶體中"""
+
+    def __init__(self, path: str = ":memory:"):
+        self.connection = sqlite3.connect(path)
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        exists = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'positions'").fetchone()
+        if exists and version != SCHEMA_VERSION:
+            self.connection.close()
+            raise ValueError(f"{path} uses position database format {version}, expected {SCHEMA_VERSION}; "
+                             "re-import the games")
+        self.connection.executescript(_SCHEMA)
+        self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._board = ChineseChessBoard()
+
+    def __enter__(self) -> "PositionDB":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # 匯入
+    # ------------------------------------------------------------------
+    def add_position(self, board: ChineseChessBoard) -> int:
+        """加入單一局面（已存在時只增加 occurrences），回傳局面 id"""
+        with self.connection:
+            return self._store(*_row_values(board, pack(board)))
+
+    def _store(self, values: tuple, pieces: List[Tuple[int, int]]) -> int:
+        """新局面寫入 positions 與 pieces，已存在的局面只增加 occurrences；回傳局面 id"""
+        connection = self.connection
+        cursor = connection.execute(_INSERT, values)
+        if cursor.rowcount:
+            position_id = cursor.lastrowid
+            connection.executemany("INSERT INTO pieces (piece, square, position_id) VALUES (?, ?, ?)",
+                                   [(code, index, position_id) for code, index in pieces])
+            return position_id
+        position_id = connection.execute("SELECT id FROM positions WHERE packed = ?", values[:1]).fetchone()[0]
+        connection.execute("UPDATE positions SET occurrences = occurrences + 1 WHERE id = ?", (position_id,))
+        return position_id
+
+    def add_game(self, record: GameRecord) -> int:
+        """
+        重播一局並加入起始局面與每一步之後的局面，回傳對局 id
+
+        走法無法解析或不合規則時 raise ValueError，這一局不會寫入任何資料
+        """
+        board = self._board
+        board.set_fen(record.fen)
+        positions = [_row_values(board, pack(board))]
+        for ply, token in enumerate(record.moves, start=1):
+            side = board.side
+            from_pos, to_pos = parse_move(board, token, side)
+            piece = board.cells[square(*from_pos)]
+            if not piece or bool(piece & BLACK_FLAG) != bool(side) or not board.move_piece(from_pos, to_pos):
+                raise ValueError(f"Illegal move at ply {ply}: {token}")
+            positions.append(_row_values(board, pack(board)))
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO games (headers, result, plies) VALUES (?, ?, ?)",
+                (json.dumps(record.headers, ensure_ascii=False), record.result, len(record.moves)),
+            )
+            game_id = cursor.lastrowid
+            occurrences = [(self._store(*row), game_id, ply) for ply, row in enumerate(positions)]
+            self.connection.executemany(
+                "INSERT INTO occurrences (position_id, game_id, ply) VALUES (?, ?, ?)", occurrences)
+        return game_id
+
+    def add_games(self, records: Iterable[GameRecord]) -> Tuple[int, int]:
+        """匯入多局，不合法的對局略過；回傳 (匯入局數, 略過局數)"""
+        added = skipped = 0
+        for record in records:
+            try:
+                self.add_game(record)
+                added += 1
+            except ValueError:
+                skipped += 1
+        return added, skipped
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+    def search(
+        self,
+        signature: Optional[str] = None,
+        side: Optional[int] = None,
+        key: Optional[int] = None,
+        counts: Optional[Dict[str, int]] = None,
+        any_of: Optional[Dict[str, int]] = None,
+        all_of: Optional[Dict[str, int]] = None,
+        none_of: Optional[Dict[str, int]] = None,
+        limit: Optional[int] = None,
+    ) -> List[PositionRecord]:
+        """
+        依條件查詢局面，結果依 id 排序
+
+        counts 為 {"black_elephant": 0} 形式的數量條件；any_of / all_of / none_of 為
+        {"red_rook": 點陣}，分別表示該兵種至少有一子在點陣內、點陣內每格都有、點陣內都沒有。
+        點陣條件由 pieces 表的主鍵回答（可用 query_plan 確認）。
+        """
+        where, params = self._where(signature, side, key, counts, any_of, all_of, none_of)
+        sql = f"SELECT id, packed, key, side, signature, occurrences FROM positions{where} ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [PositionRecord(row[0], row[1], row[2] % (1 << 64), *row[3:])
+                for row in self.connection.execute(sql, params)]
+
+    def count(self, **conditions) -> int:
+        """符合條件的局面數（條件與 search 相同）"""
+        where, params = self._where(**conditions)
+        return self.connection.execute(f"SELECT COUNT(*) FROM positions{where}", params).fetchone()[0]
+
+    def query_plan(self, **conditions) -> List[str]:
+        """search 的 EXPLAIN QUERY PLAN 說明（條件與 search 相同）"""
+        where, params = self._where(**conditions)
+        rows = self.connection.execute(f"EXPLAIN QUERY PLAN SELECT id FROM positions{where} ORDER BY id", params)
+        return [row[-1] for row in rows]
+
+    def games_for(self, position_id: int) -> List[Tuple[int, int]]:
+        """局面出現過的 (對局 id, ply)"""
+        return self.connection.execute(
+            "SELECT game_id, ply FROM occurrences WHERE position_id = ? ORDER BY game_id, ply", (position_id,)
+        ).fetchall()
+
+    @staticmethod
+    def _where(
+        signature: Optional[str] = None,
+        side: Optional[int] = None,
+        key: Optional[int] = None,
+        counts: Optional[Dict[str, int]] = None,
+        any_of: Optional[Dict[str, int]] = None,
+        all_of: Optional[Dict[str, int]] = None,
+        none_of: Optional[Dict[str, int]] = None,
+    ) -> Tuple[str, list]:
+        clauses: List[str] = []
+        params: list = []
+
+        def column(name: str) -> str:
+            if name not in _COLUMNS:
+                raise ValueError(f"Unknown piece column {name!r}; expected one of {_COLUMNS}")
+            return name
+
+        if signature is not None:
+            clauses.append("signature = ?")
+            params.append(normalize_signature(signature))
+        if side is not None:
+            clauses.append("side = ?")
+            params.append(side)
+        if key is not None:
+            clauses.append("key = ?")
+            params.append(_signed(key))
+        for name, value in (counts or {}).items():
+            clauses.append(f"{column(name)} = ?")
+            params.append(value)
+        # 每個點陣條件是對 pieces 主鍵 (piece, square) 的子查詢
+        lookup = "SELECT position_id FROM pieces WHERE piece = ? AND square IN ({})"
+        for conditions, mode in ((any_of, "any"), (all_of, "all"), (none_of, "none")):
+            for name, mask in (conditions or {}).items():
+                squares = _mask_squares(name, mask)
+                code = _PIECE_CODES[column(name)]
+                subquery = lookup.format(", ".join("?" * len(squares)))
+                if mode == "any":
+                    clauses.append(f"id IN ({subquery})")
+                    params += (code, *squares)
+                elif squares:
+                    # 空點陣的 all_of 與 none_of 恆成立
+                    if mode == "all":
+                        clauses.append(f"id IN ({subquery} GROUP BY position_id HAVING COUNT(*) = ?)")
+                        params += (code, *squares, len(squares))
+                    else:
+                        clauses.append(f"id NOT IN ({subquery})")
+                        params += (code, *squares)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
@@ -0,0 +1,280 @@
+"""
+對局紀錄的串流解析與重播驗證
+
+紀錄格式類似 PGN：[Tag "value"] 標籤行之後接走法，走法可用 ICCS（h2e2 / H2-E2）或 WXF（C2.5、H8+7、+R.5），
+可夾雜回合數（1. / 1...）、{註解} 與結果記號。一局以空白行、結果記號或下一局的標籤結束；
+line_per_game=True 時每一行各是一局。[FEN "..."] 標籤可指定起始局面。
+
+重播使用 move_piece 驗證每一步，每個 worker 行程重複使用同一個棋盤，結果以 JSONL 輸出。
+"""
+
+import json
+import multiprocessing
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from src.chinesechess import (
+    BLACK_FLAG, CANNON, ELEPHANT, GENERAL, GUARD, HORSE, INITIAL_FEN, ROOK, SOLDIER,
+    ChineseChessBoard, iccs_to_move, position_of, square,
+)
+
+RESULTS = {"1-0", "0-1", "1/2-1/2", "*"}
+_TAG = re.compile(r'^\[(\w+)\s+"(.*)"\]$')
+_MOVE_NUMBER = re.compile(r"^\d+\.+$")
+_ICCS = re.compile(r"^[a-iA-I]\d-?[a-iA-I]\d$")
+_COMMENT = re.compile(r"\{[^}]*\}")
+_WXF_PIECES = {"K": GENERAL, "A": GUARD, "E": ELEPHANT, "B": ELEPHANT, "H": HORSE, "N": HORSE,
+               "R": ROOK, "C": CANNON, "P": SOLDIER}
+
+
+@dataclass
+class GameRecord:
+    """一局紀錄：編號（從 0 起算）、標籤、走法字串與結果"""
+    index: int
+    moves: List[str] = field(default_factory=list)
+    headers: Dict[str, str] = field(default_factory=dict)
+    result: Optional[str] = None
+
+    @property
+    def fen(self) -> str:
+        return self.headers.get("FEN", INITIAL_FEN)
+
+
+def iter_games(lines: Iterable[str], line_per_game: bool = False) -> Iterator[GameRecord]:
+    """逐行讀取並 yield 每一局，不會一次載入整個檔案"""
+    index = 0
+    game = GameRecord(index)
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            # 標籤與走法之間的空白行不算結束
+            if game.moves or game.result:
+                yield game
+                index += 1
+                game = GameRecord(index)
+            continue
+        tag = _TAG.match(line)
+        if tag:
+            if game.moves or game.result:
+                yield game
+                index += 1
+                game = GameRecord(index)
+            game.headers[tag.group(1)] = tag.group(2)
+            continue
+        for token in _COMMENT.sub(" ", line).split():
+            if _MOVE_NUMBER.match(token):
+                continue
+            if token in RESULTS:
+                game.result = token
+                continue
+            # 「1.h2e2」這種回合數與走法相連的寫法
+            token = re.sub(r"^\d+\.+", "", token)
+            if token:
+                game.moves.append(token)
+        if line_per_game or game.result:
+            yield game
+            index += 1
+            game = GameRecord(index)
+    if game.moves or game.headers or game.result:
+        yield game
+
+
+# ---------------------------------------------------------------------------
+# 走法記號轉換
+# ---------------------------------------------------------------------------
+def _file_to_col(file: int, black: bool) -> int:
+    # 紅方路數由紅方右手邊（col 9）數起，黑方由黑方右手邊（col 1）數起
+    return file if black else 10 - file
+
+
+def parse_move(board: ChineseChessBoard, token: str, side: int) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """
+    ICCS 或 WXF 走法轉為 (from_pos, to_pos)
+
+    WXF 需要盤面才能決定是哪一個棋子；「進」為朝對方底線的方向（紅方 row 增加）。
+    無法解析、找不到對應棋子，或同一路有兩個棋子都符合卻沒有標前/後時 raise ValueError。
+    """
+    if _ICCS.match(token):
+        move = iccs_to_move(token)
+        return position_of(move >> 8), position_of(move & 0xFF)
+    text = token.upper()
+    if len(text) != 4:
+        raise ValueError(f"Unrecognized move {token!r}")
+    black = side == 1
+    flag = BLACK_FLAG if black else 0
+    if text[0] in "+-" and text[1] in _WXF_PIECES:
+        letter, selector = text[1], text[0]
+    elif text[0] in _WXF_PIECES:
+        letter, selector = text[0], text[1]
+    else:
+        raise ValueError(f"Unrecognized move {token!r}")
+    action, amount = text[2], text[3]
+    if action == "=":
+        action = "."
+    if action not in "+-." or not amount.isdigit() or amount == "0":
+        raise ValueError(f"Unrecognized move {token!r}")
+    kind = _WXF_PIECES[letter]
+    code = kind | flag
+    cells = board.cells
+    candidates = [sq for sq in board.piece_squares[side] if cells[sq] == code]
+    if selector in "+-":
+        # 同一路有兩個同兵種棋子時以前/後區分；前為較接近對方底線者
+        by_file: Dict[int, List[int]] = {}
+        for sq in candidates:
+            by_file.setdefault(position_of(sq)[1], []).append(sq)
+        stacked = [squares for squares in by_file.values() if len(squares) >= 2]
+        if len(stacked) != 1:
+            raise ValueError(f"Cannot resolve {token!r}")
+        ordered = sorted(stacked[0], reverse=not black)
+        candidates = [ordered[0] if selector == "+" else ordered[-1]]
+    elif selector.isdigit() and selector != "0":
+        col = _file_to_col(int(selector), black)
+        candidates = [sq for sq in candidates if position_of(sq)[1] == col]
+    else:
+        raise ValueError(f"Unrecognized move {token!r}")
+    forward = -1 if black else 1
+    number = int(amount)
+    matches = []
+    for sq in candidates:
+        row, col = position_of(sq)
+        if action == ".":
+            to = (row, _file_to_col(number, black))
+        elif kind in (GENERAL, ROOK, CANNON, SOLDIER):
+            to = (row + number * forward * (1 if action == "+" else -1), col)
+        else:
+            to_col = _file_to_col(number, black)
+            step = {HORSE: 3, ELEPHANT: 2, GUARD: 1}[kind]
+            rows = 2 if kind == ELEPHANT else 1 if kind == GUARD else step - abs(to_col - col)
+            to = (row + rows * forward * (1 if action == "+" else -1), to_col)
+        if 1 <= to[0] <= 10 and 1 <= to[1] <= 9:
+            matches.append(((row, col), to))
+    if len(matches) > 1 and kind in (GUARD, ELEPHANT):
+        # WXF 的士、象同一路時不標前後，以能走到目標的那一個為準
+        matches = [(from_pos, to) for from_pos, to in matches if to in board.legal_moves_from(from_pos)]
+    if len(matches) > 1:
+        raise ValueError(f"Ambiguous move {token!r}: two {letter} on the file, mark front (+) or rear (-)")
+    if not matches:
+        raise ValueError(f"No {letter} matches {token!r}")
+    return matches[0]
+
+
+# ---------------------------------------------------------------------------
+# 重播
+# ---------------------------------------------------------------------------
+def replay_game(board: ChineseChessBoard, record: GameRecord) -> dict:
+    """
+    以 move_piece 重播一局，回傳可轉成 JSON 的結果
+
+    遇到無法解析、輪錯方或不合規則的走法即停止，並記錄 ply（從 1 起算）與走法字串。
+    """
+    result = {"game": record.index, "moves": 0, "ok": True}
+    if record.headers:
+        result["headers"] = record.headers
+    if record.result:
+        result["result"] = record.result
+    try:
+        board.set_fen(record.fen)
+    except ValueError as e:
+        result.update(ok=False, error=f"invalid FEN: {e}")
+        return result
+    for ply, token in enumerate(record.moves, start=1):
+        side = board.side
+        try:
+            from_pos, to_pos = parse_move(board, token, side)
+        except ValueError as e:
+            result.update(ok=False, ply=ply, move=token, error=str(e))
+            return result
+        piece = board.cells[square(*from_pos)]
+        if not piece or bool(piece & BLACK_FLAG) != bool(side):
+            result.update(ok=False, ply=ply, move=token, error="no piece of the side to move on origin")
+            return result
+        if not board.move_piece(from_pos, to_pos):
+            result.update(ok=False, ply=ply, move=token, error="illegal move")
+            return result
+        result["moves"] = ply
+    return result
+
+
+_worker_board: Optional[ChineseChessBoard] = None
+
+
+def _replay_chunk(records: List[GameRecord]) -> List[Tuple[str, int, bool]]:
+    """重播一個區塊，回傳 (JSON 行, 步數, 是否合法)"""
+    global _worker_board
+    if _worker_board is None:
+        _worker_board = ChineseChessBoard()
+    out = []
+    for record in records:
+        result = replay_game(_worker_board, record)
+        out.append((json.dumps(result, ensure_ascii=False), result["moves"], result["ok"]))
+    return out
+
+
+@dataclass
+class ReplayStats:
+    games: int
+    moves: int
+    illegal: int
+    seconds: float
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def moves_per_second(self) -> float:
+        return self.moves / self.seconds if self.seconds > 0 else 0.0
+
+
+def _chunked(games: Iterator[GameRecord], size: int) -> Iterator[List[GameRecord]]:
+    chunk: List[GameRecord] = []
+    for game in games:
+        chunk.append(game)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def replay_games(
+    lines: Iterable[str],
+    output: TextIO,
+    workers: int = 1,
+    chunk_size: int = 256,
+    line_per_game: bool = False,
+) -> ReplayStats:
+    """
+    串流解析並重播所有對局，依輸入順序把每局結果寫成 JSONL
+
+    workers > 1 時以行程池處理，同時最多只有 2 * workers 個區塊在處理中，記憶體用量與輸入大小無關。
+    """
+    start = time.perf_counter()
+    stats = ReplayStats(0, 0, 0, 0.0)
+
+    def emit(results: List[Tuple[str, int, bool]]) -> None:
+        for text, moves, ok in results:
+            output.write(text + "\n")
+            stats.games += 1
+            stats.moves += moves
+            stats.illegal += not ok
+
+    chunks = _chunked(iter_games(lines, line_per_game), chunk_size)
+    if workers > 1:
+        with multiprocessing.get_context().Pool(workers) as pool:
+            pending: deque = deque()
+            for chunk in chunks:
+                pending.append(pool.apply_async(_replay_chunk, (chunk,)))
+                if len(pending) >= 2 * workers:
+                    emit(pending.popleft().get())
+            while pending:
+                emit(pending.popleft().get())
+    else:
+        for chunk in chunks:
+            emit(_replay_chunk(chunk))
+    stats.seconds = time.perf_counter() - start
+    return stats
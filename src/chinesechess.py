@@ -1,5 +1,8 @@
+import json
+import random
+import time
 from enum import Enum
-from typing import Tuple, Dict, Optional
+from typing import Tuple, Dict, Optional, List, Iterable, Iterator
 
 class PieceType(Enum):
     GENERAL = 'General'
@@ -22,43 +25,1136 @@ class Piece:
     def __repr__(self):
         return f"{self.color.value} {self.piece_type.value} at {self.position}"
 
+# ---------------------------------------------------------------------------
+# 陣列棋盤編碼
+#
+# 棋盤以一維 bytearray 表示：每列 11 格（9 路 + 2 格哨兵，相鄰列共用），
+# 上下各補 2 列哨兵，馬、象的跳躍偏移量不需要額外做邊界判斷。
+# 格子內容為小整數棋子代碼：低 3 bits 為兵種，bit 3 為黑方。
+# ---------------------------------------------------------------------------
+BOARD_ROWS = 10
+BOARD_COLS = 9
+STRIDE = 11
+BOARD_SIZE = (BOARD_ROWS + 4) * STRIDE
+
+EMPTY = 0
+OFFBOARD = 0xFF
+BLACK_FLAG = 8
+TYPE_MASK = 7
+
+GENERAL, GUARD, ROOK, HORSE, CANNON, ELEPHANT, SOLDIER = range(1, 8)
+
+TYPE_CODES: Dict[PieceType, int] = {
+    PieceType.GENERAL: GENERAL,
+    PieceType.GUARD: GUARD,
+    PieceType.ROOK: ROOK,
+    PieceType.HORSE: HORSE,
+    PieceType.CANNON: CANNON,
+    PieceType.ELEPHANT: ELEPHANT,
+    PieceType.SOLDIER: SOLDIER,
+}
+CODE_TYPES: List[Optional[PieceType]] = [None] * 8
+for _pt, _code in TYPE_CODES.items():
+    CODE_TYPES[_code] = _pt
+
+COLOR_FLAGS: Dict[Color, int] = {Color.RED: 0, Color.BLACK: BLACK_FLAG}
+SIDE_COLORS: Tuple[Color, Color] = (Color.RED, Color.BLACK)
+
+# 兵種子力價值（以兵種代碼索引），將帥被吃由搜尋以殺棋分數處理
+PIECE_VALUES: List[int] = [0] * 8
+PIECE_VALUES[GUARD] = 200
+PIECE_VALUES[ELEPHANT] = 200
+PIECE_VALUES[HORSE] = 400
+PIECE_VALUES[CANNON] = 450
+PIECE_VALUES[ROOK] = 900
+PIECE_VALUES[SOLDIER] = 100
+# 位置分數表（紅方視角，第一列為 row 10、最後一列為 row 1），黑方上下翻轉使用
+PIECE_SQUARE_TABLES: Dict[int, Tuple[Tuple[int, ...], ...]] = {
+    GENERAL: (
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, -9, -9, -9, 0, 0, 0),
+        (0, 0, 0, -8, -8, -8, 0, 0, 0),
+        (0, 0, 0, 1, 5, 1, 0, 0, 0),
+    ),
+    GUARD: (
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 3, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+    ),
+    ELEPHANT: (
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, -2, 0, 0, 0, -2, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (-2, 0, 0, 0, 3, 0, 0, 0, -2),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+    ),
+    ROOK: (
+        (6, 8, 7, 13, 14, 13, 7, 8, 6),
+        (6, 12, 9, 16, 33, 16, 9, 12, 6),
+        (6, 8, 7, 14, 16, 14, 7, 8, 6),
+        (6, 13, 13, 16, 16, 16, 13, 13, 6),
+        (8, 11, 11, 14, 15, 14, 11, 11, 8),
+        (8, 12, 12, 14, 15, 14, 12, 12, 8),
+        (4, 9, 4, 12, 14, 12, 4, 9, 4),
+        (-2, 8, 4, 12, 12, 12, 4, 8, -2),
+        (5, 8, 6, 12, 0, 12, 6, 8, 5),
+        (-6, 6, 4, 12, 0, 12, 4, 6, -6),
+    ),
+    HORSE: (
+        (2, 2, 2, 8, 2, 8, 2, 2, 2),
+        (2, 8, 15, 9, 6, 9, 15, 8, 2),
+        (4, 10, 11, 15, 11, 15, 11, 10, 4),
+        (5, 20, 12, 19, 12, 19, 12, 20, 5),
+        (2, 12, 11, 15, 16, 15, 11, 12, 2),
+        (2, 10, 13, 14, 15, 14, 13, 10, 2),
+        (4, 6, 10, 7, 10, 7, 10, 6, 4),
+        (5, 4, 6, 7, 4, 7, 6, 4, 5),
+        (-3, 2, 4, 5, -10, 5, 4, 2, -3),
+        (0, -3, 2, 0, 2, 0, 2, -3, 0),
+    ),
+    CANNON: (
+        (4, 4, 0, -5, -6, -5, 0, 4, 4),
+        (2, 2, 0, -4, -7, -4, 0, 2, 2),
+        (1, 1, 0, -5, -4, -5, 0, 1, 1),
+        (0, 3, 3, 2, 4, 2, 3, 3, 0),
+        (0, 0, 0, 0, 4, 0, 0, 0, 0),
+        (-1, 0, 3, 0, 4, 0, 3, 0, -1),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (1, 0, 4, 3, 5, 3, 4, 0, 1),
+        (0, 1, 2, 2, 2, 2, 2, 1, 0),
+        (0, 0, 1, 3, 3, 3, 1, 0, 0),
+    ),
+    SOLDIER: (
+        (0, 3, 6, 9, 12, 9, 6, 3, 0),
+        (18, 36, 56, 80, 120, 80, 56, 36, 18),
+        (14, 26, 42, 60, 80, 60, 42, 26, 14),
+        (10, 20, 30, 34, 40, 34, 30, 20, 10),
+        (6, 12, 18, 18, 20, 18, 18, 12, 6),
+        (2, 0, 8, 0, 8, 0, 8, 0, 2),
+        (0, 0, -2, 0, 4, 0, -2, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (0, 0, 0, 0, 0, 0, 0, 0, 0),
+    ),
+}
+
+
+def _build_piece_scores() -> List[List[int]]:
+    """以 [棋子代碼][格子] 索引、紅正黑負的子力加位置分數，供增量評估使用"""
+    scores = [[0] * BOARD_SIZE for _ in range(16)]
+    for kind, table in PIECE_SQUARE_TABLES.items():
+        for row in range(1, BOARD_ROWS + 1):
+            for col in range(1, BOARD_COLS + 1):
+                sq = (row + 1) * STRIDE + col
+                scores[kind][sq] = PIECE_VALUES[kind] + table[BOARD_ROWS - row][col - 1]
+                scores[kind | BLACK_FLAG][sq] = -(PIECE_VALUES[kind] + table[row - 1][col - 1])
+    return scores
+
+
+_PIECE_SCORES = _build_piece_scores()
+
+
+def square(row: int, col: int) -> int:
+    """(row, col) 轉為陣列索引，不做邊界檢查"""
+    return (row + 1) * STRIDE + col
+
+
+def square_of(position: Tuple[int, int]) -> Optional[int]:
+    """(row, col) 轉為陣列索引，超出棋盤回傳 None"""
+    row, col = position
+    if 1 <= row <= BOARD_ROWS and 1 <= col <= BOARD_COLS:
+        return (row + 1) * STRIDE + col
+    return None
+
+
+def position_of(sq: int) -> Tuple[int, int]:
+    """陣列索引轉回 (row, col)"""
+    return (sq // STRIDE - 1, sq % STRIDE)
+
+
+def piece_code(piece_type: PieceType, color: Color) -> int:
+    return TYPE_CODES[piece_type] | COLOR_FLAGS[color]
+
+
+def side_of(color) -> int:
+    """Color、'Red'/'Black' 字串或 side 整數轉為 side：0 = 紅, 1 = 黑"""
+    if isinstance(color, int):
+        return color
+    if not isinstance(color, Color):
+        color = Color(color.capitalize())
+    return 1 if color is Color.BLACK else 0
+
+
+def _build_empty_cells() -> bytearray:
+    cells = bytearray([OFFBOARD]) * BOARD_SIZE
+    for row in range(1, BOARD_ROWS + 1):
+        for col in range(1, BOARD_COLS + 1):
+            cells[square(row, col)] = EMPTY
+    return cells
+
+
+def _build_palace(rows: range) -> bytearray:
+    palace = bytearray(BOARD_SIZE)
+    for row in rows:
+        for col in range(4, 7):
+            palace[square(row, col)] = 1
+    return palace
+
+
+def _build_initial_position() -> Tuple[Tuple[PieceType, Color, Tuple[int, int]], ...]:
+    back_rank = (
+        PieceType.ROOK, PieceType.HORSE, PieceType.ELEPHANT, PieceType.GUARD, PieceType.GENERAL,
+        PieceType.GUARD, PieceType.ELEPHANT, PieceType.HORSE, PieceType.ROOK,
+    )
+    setup = []
+    for color, back, cannon_row, soldier_row in ((Color.RED, 1, 3, 4), (Color.BLACK, 10, 8, 7)):
+        for col, piece_type in enumerate(back_rank, start=1):
+            setup.append((piece_type, color, (back, col)))
+        setup.append((PieceType.CANNON, color, (cannon_row, 2)))
+        setup.append((PieceType.CANNON, color, (cannon_row, 8)))
+        for col in range(1, BOARD_COLS + 1, 2):
+            setup.append((PieceType.SOLDIER, color, (soldier_row, col)))
+    return tuple(setup)
+
+
+# 標準開局：(兵種, 顏色, (row, col))
+INITIAL_POSITION = _build_initial_position()
+
+_EMPTY_CELLS = _build_empty_cells()
+ON_BOARD: Tuple[int, ...] = tuple(
+    square(row, col) for row in range(1, BOARD_ROWS + 1) for col in range(1, BOARD_COLS + 1)
+)
+# 以 side（0 = 紅, 1 = 黑）索引
+_PALACE = (_build_palace(range(1, 4)), _build_palace(range(8, 11)))
+
+# 馬的偏移量 -> 馬腳偏移量
+_HORSE_LEGS = {
+    2 * STRIDE + 1: STRIDE, 2 * STRIDE - 1: STRIDE,
+    -2 * STRIDE + 1: -STRIDE, -2 * STRIDE - 1: -STRIDE,
+    STRIDE + 2: 1, -STRIDE + 2: 1,
+    STRIDE - 2: -1, -STRIDE - 2: -1,
+}
+_ORTHOGONAL = (1, -1, STRIDE, -STRIDE)
+_DIAGONAL = (STRIDE + 1, STRIDE - 1, -STRIDE + 1, -STRIDE - 1)
+_ELEPHANT_STEPS = (2 * STRIDE + 2, 2 * STRIDE - 2, -2 * STRIDE + 2, -2 * STRIDE - 2)
+
+
+# ---------------------------------------------------------------------------
+# 預先計算的每格走法表（走法產生器使用）
+# 步進類兵種的表以 [side][sq] 索引，內容為可到達的格子；
+# 馬、象的表內容為 (目標格, 馬腳/象眼) 配對；車、炮的表為四個方向的射線。
+# ---------------------------------------------------------------------------
+def _row_of(sq: int) -> int:
+    return sq // STRIDE - 1
+
+
+def _on_board(sq: int) -> bool:
+    return 0 <= sq < BOARD_SIZE and _EMPTY_CELLS[sq] == EMPTY
+
+
+def _soldier_targets(sq: int, side: int) -> Tuple[int, ...]:
+    row = _row_of(sq)
+    if side == 0:
+        # 紅兵前進是 row 減少，過河（row >= 6）後可左右
+        deltas = (-STRIDE, 1, -1) if row >= 6 else (-STRIDE,)
+    else:
+        # 黑卒前進是 row 增加，過河（row <= 5）後可左右
+        deltas = (STRIDE, 1, -1) if row <= 5 else (STRIDE,)
+    return tuple(sq + d for d in deltas if _on_board(sq + d))
+
+
+def _elephant_jumps(sq: int, side: int) -> Tuple[Tuple[int, int], ...]:
+    jumps = []
+    for d in _ELEPHANT_STEPS:
+        to_sq = sq + d
+        if not _on_board(to_sq):
+            continue
+        to_row = _row_of(to_sq)
+        if (side == 0 and to_row > 5) or (side == 1 and to_row < 6):
+            continue
+        jumps.append((to_sq, sq + d // 2))
+    return tuple(jumps)
+
+
+def _build_move_tables():
+    empty: Tuple = ()
+    general = ([empty] * BOARD_SIZE, [empty] * BOARD_SIZE)
+    guard = ([empty] * BOARD_SIZE, [empty] * BOARD_SIZE)
+    elephant = ([empty] * BOARD_SIZE, [empty] * BOARD_SIZE)
+    soldier = ([empty] * BOARD_SIZE, [empty] * BOARD_SIZE)
+    horse = [empty] * BOARD_SIZE
+    rays = [empty] * BOARD_SIZE
+    for sq in ON_BOARD:
+        for side in (0, 1):
+            palace = _PALACE[side]
+            general[side][sq] = tuple(sq + d for d in _ORTHOGONAL if _on_board(sq + d) and palace[sq + d])
+            guard[side][sq] = tuple(sq + d for d in _DIAGONAL if _on_board(sq + d) and palace[sq + d])
+            elephant[side][sq] = _elephant_jumps(sq, side)
+            soldier[side][sq] = _soldier_targets(sq, side)
+        horse[sq] = tuple((sq + d, sq + leg) for d, leg in _HORSE_LEGS.items() if _on_board(sq + d))
+        sq_rays = []
+        for d in _ORTHOGONAL:
+            ray = []
+            to_sq = sq + d
+            while _on_board(to_sq):
+                ray.append(to_sq)
+                to_sq += d
+            sq_rays.append(tuple(ray))
+        rays[sq] = tuple(sq_rays)
+    return general, guard, elephant, soldier, horse, rays
+
+
+_GENERAL_STEPS, _GUARD_STEPS, _ELEPHANT_JUMPS, _SOLDIER_STEPS, _HORSE_JUMPS, _RAYS = _build_move_tables()
+
+
+# ---------------------------------------------------------------------------
+# 反向攻擊表（將軍偵測使用）
+# 以被攻擊的格子索引，列出可能攻擊它的棋子所在格；馬、象附帶需要空著的馬腳/象眼。
+# ---------------------------------------------------------------------------
+def _build_attack_tables():
+    empty: Tuple = ()
+    steppers = {kind: ([[] for _ in range(BOARD_SIZE)], [[] for _ in range(BOARD_SIZE)])
+                for kind in (GENERAL, GUARD, SOLDIER)}
+    elephant = ([[] for _ in range(BOARD_SIZE)], [[] for _ in range(BOARD_SIZE)])
+    horse = [[] for _ in range(BOARD_SIZE)]
+    for sq in ON_BOARD:
+        for side in (0, 1):
+            for kind, table in ((GENERAL, _GENERAL_STEPS), (GUARD, _GUARD_STEPS), (SOLDIER, _SOLDIER_STEPS)):
+                for to_sq in table[side][sq]:
+                    steppers[kind][side][to_sq].append(sq)
+            for to_sq, eye in _ELEPHANT_JUMPS[side][sq]:
+                elephant[side][to_sq].append((sq, eye))
+        for to_sq, leg in _HORSE_JUMPS[sq]:
+            horse[to_sq].append((sq, leg))
+
+    def freeze(table):
+        return [tuple(entry) if entry else empty for entry in table]
+
+    return (
+        {kind: (freeze(red), freeze(black)) for kind, (red, black) in steppers.items()},
+        (freeze(elephant[0]), freeze(elephant[1])),
+        freeze(horse),
+    )
+
+
+_STEP_ATTACKERS, _ELEPHANT_ATTACKERS, _HORSE_ATTACKERS = _build_attack_tables()
+
+
+# ---------------------------------------------------------------------------
+# 車、炮的佔用查表
+# 棋盤維護每一橫列（9 bits）與每一直行（10 bits）的佔用點陣，
+# 以 [線上位置][佔用點陣] 查出車可到達、炮可走或可吃的位置，不必逐格走訪路徑。
+# 車的結果包含路徑上第一個棋子（能否吃由呼叫端判斷顏色），炮的結果包含第一個棋子之前的空格與炮架後的第一個棋子。
+# ---------------------------------------------------------------------------
+_ROW_OF = [sq // STRIDE - 1 for sq in range(BOARD_SIZE)]
+_COL_OF = [sq % STRIDE for sq in range(BOARD_SIZE)]
+# 格子在所屬橫列點陣（bit col-1）與直行點陣（bit row-1）中的 bit
+_RANK_BIT = [1 << (sq % STRIDE - 1) if _on_board(sq) else 0 for sq in range(BOARD_SIZE)]
+_FILE_BIT = [1 << (sq // STRIDE - 2) if _on_board(sq) else 0 for sq in range(BOARD_SIZE)]
+# 維護點陣用：(row, 橫列 bit, col, 直行 bit)
+_LINE_BITS = [(_ROW_OF[sq], _RANK_BIT[sq], _COL_OF[sq], _FILE_BIT[sq]) for sq in range(BOARD_SIZE)]
+
+
+def _scan_line(pos: int, occupancy: int, step: int, length: int) -> Tuple[Tuple[int, ...], ...]:
+    """
+    從 pos 往 step 方向掃描，回傳車可到達、炮可到達、第一個棋子與炮架後第一個棋子的位置偏移量
+    （後兩者沒有時為空 tuple）
+    """
+    rook, cannon, first, second = [], [], [], []
+    p = pos + step
+    while 1 <= p <= length and not occupancy >> (p - 1) & 1:
+        rook.append(p - pos)
+        p += step
+    cannon.extend(rook)
+    if 1 <= p <= length:
+        rook.append(p - pos)
+        first.append(p - pos)
+        p += step
+        while 1 <= p <= length and not occupancy >> (p - 1) & 1:
+            p += step
+        if 1 <= p <= length:
+            cannon.append(p - pos)
+            second.append(p - pos)
+    return tuple(rook), tuple(cannon), tuple(first), tuple(second)
+
+
+def _build_line_tables(length: int):
+    """
+    長度為 length 的一條線，回傳以 [位置（1 起算）][佔用點陣] 索引的
+    (車可到達的點陣, 炮可到達的點陣, 車的位置偏移, 炮的位置偏移, 兩側第一個棋子的偏移, 兩側炮架後第一個棋子的偏移)
+
+    兩個方向的結果只和各自那一側的佔用有關，先分別算出兩側再組合。
+    """
+    size = 1 << length
+    rook_masks = [[0] * size for _ in range(length + 1)]
+    cannon_masks = [[0] * size for _ in range(length + 1)]
+    rook_offsets = [[()] * size for _ in range(length + 1)]
+    cannon_offsets = [[()] * size for _ in range(length + 1)]
+    first_offsets = [[()] * size for _ in range(length + 1)]
+    second_offsets = [[()] * size for _ in range(length + 1)]
+
+    def mask(pos: int, offsets: Tuple[int, ...]) -> int:
+        return sum(1 << (pos + d - 1) for d in offsets)
+
+    for pos in range(1, length + 1):
+        low_bits = pos - 1
+        upper = [_scan_line(pos, high << pos, 1, length) for high in range(1 << (length - pos))]
+        lower = [_scan_line(pos, low, -1, length) for low in range(1 << low_bits)]
+        upper_masks = [(mask(pos, r), mask(pos, c)) for r, c, _, _ in upper]
+        lower_masks = [(mask(pos, r), mask(pos, c)) for r, c, _, _ in lower]
+        for occupancy in range(size):
+            high, low = occupancy >> pos, occupancy & ((1 << low_bits) - 1)
+            (rook_up, cannon_up, first_up, second_up) = upper[high]
+            (rook_down, cannon_down, first_down, second_down) = lower[low]
+            rook_offsets[pos][occupancy] = rook_up + rook_down
+            cannon_offsets[pos][occupancy] = cannon_up + cannon_down
+            first_offsets[pos][occupancy] = first_up + first_down
+            second_offsets[pos][occupancy] = second_up + second_down
+            # 車的點陣另含自己的位置：起點等於終點時與原本逐格走訪一樣視為路徑暢通
+            rook_masks[pos][occupancy] = upper_masks[high][0] | lower_masks[low][0] | 1 << low_bits
+            cannon_masks[pos][occupancy] = upper_masks[high][1] | lower_masks[low][1]
+    return rook_masks, cannon_masks, rook_offsets, cannon_offsets, first_offsets, second_offsets
+
+
+def _file_offsets(table: List[List[Tuple[int, ...]]]) -> List[List[Tuple[int, ...]]]:
+    """直行的偏移量以列為單位，轉成格子偏移量"""
+    return [[tuple(d * STRIDE for d in steps) for steps in row] for row in table]
+
+
+(_RANK_ROOK, _RANK_CANNON, _RANK_ROOK_STEPS, _RANK_CANNON_STEPS,
+ _RANK_FIRST, _RANK_SECOND) = _build_line_tables(BOARD_COLS)
+_FILE_ROOK, _FILE_CANNON, *_file_steps = _build_line_tables(BOARD_ROWS)
+_FILE_ROOK_STEPS, _FILE_CANNON_STEPS, _FILE_FIRST, _FILE_SECOND = map(_file_offsets, _file_steps)
+_EMPTY_RANKS = [0] * (BOARD_ROWS + 1)
+_EMPTY_FILES = [0] * (BOARD_COLS + 1)
+
+
+def _build_zobrist_keys(seed: int = 0x5EED_C0DE):
+    """每個 (兵種, 顏色, 格子) 一組 64-bit 亂數，固定種子使雜湊值跨行程穩定"""
+    rng = random.Random(seed)
+    keys = [[0] * BOARD_SIZE for _ in range(16)]
+    for code in range(16):
+        if not code & TYPE_MASK:
+            continue
+        for sq in ON_BOARD:
+            keys[code][sq] = rng.getrandbits(64)
+    return keys, rng.getrandbits(64)
+
+
+# ZOBRIST_PIECES[棋子代碼][格子]；ZOBRIST_SIDE 在黑方走棋時併入雜湊
+ZOBRIST_PIECES, ZOBRIST_SIDE = _build_zobrist_keys()
+
+
+def encode_move(from_sq: int, to_sq: int) -> int:
+    """走法編碼為 16-bit 整數：高 8 bits 為起點格，低 8 bits 為終點格"""
+    return from_sq << 8 | to_sq
+
+
+def move_from(move: int) -> int:
+    return move >> 8
+
+
+def move_to(move: int) -> int:
+    return move & 0xFF
+
+
+# ICCS 座標：路 a-i 對應 col 1-9，線 0-9 對應 row 1-10（紅方底線為 0），例如 h2e2
+def iccs_to_move(text: str) -> int:
+    """ICCS 走法字串（如 h2e2 或 H2-E2）轉為走法編碼"""
+    text = text.strip().lower().replace("-", "")
+    if len(text) != 4:
+        raise ValueError(f"Invalid ICCS move: {text!r}")
+    squares = []
+    for file, rank in (text[0:2], text[2:4]):
+        if not ("a" <= file <= "i" and "0" <= rank <= "9"):
+            raise ValueError(f"Invalid ICCS move: {text!r}")
+        squares.append(square(ord(rank) - 47, ord(file) - 96))
+    return squares[0] << 8 | squares[1]
+
+
+def move_to_iccs(move: int) -> str:
+    """走法編碼轉為小寫 ICCS 字串"""
+    text = ""
+    for sq in (move >> 8, move & 0xFF):
+        row, col = position_of(sq)
+        text += chr(col + 96) + chr(row + 47)
+    return text
+
+
+# ---------------------------------------------------------------------------
+# FEN：大寫為紅方，K 帥、A 仕、B/E 相、N/H 傌、R 俥、C 炮、P 兵；
+# 第一段從黑方底線（row 10）寫到紅方底線（row 1），每段由 col 1 到 col 9。
+# ---------------------------------------------------------------------------
+INITIAL_FEN = "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w - - 0 1"
+
+_FEN_CODES: Dict[str, int] = {}
+_FEN_LETTERS = [""] * 16
+for _letter, _code in (("K", GENERAL), ("A", GUARD), ("B", ELEPHANT), ("N", HORSE),
+                       ("R", ROOK), ("C", CANNON), ("P", SOLDIER)):
+    _FEN_CODES[_letter] = _code
+    _FEN_CODES[_letter.lower()] = _code | BLACK_FLAG
+    _FEN_LETTERS[_code] = _letter
+    _FEN_LETTERS[_code | BLACK_FLAG] = _letter.lower()
+# 部分資料來源以 E/H 表示象與馬
+for _letter, _code in (("E", ELEPHANT), ("H", HORSE)):
+    _FEN_CODES[_letter] = _code
+    _FEN_CODES[_letter.lower()] = _code | BLACK_FLAG
+_FEN_SIDES = {"w": 0, "r": 0, "b": 1}
+# 第 i 段 FEN 對應的各格索引
+_FEN_ROW_SQUARES = tuple(
+    tuple(square(BOARD_ROWS - i, col) for col in range(1, BOARD_COLS + 1)) for i in range(BOARD_ROWS)
+)
+
+
+class UndoInfo:
+    """make_move 的還原資訊：走法、被吃的棋子、走前輪到的一方，以及雜湊與評估的變化量"""
+    __slots__ = ("move", "captured", "side", "hash_delta", "eval_delta")
+
+    def __init__(self):
+        self.move = 0
+        self.captured = EMPTY
+        self.side = 0
+        self.hash_delta = 0
+        self.eval_delta = 0
+
+
 class ChineseChessBoard:
     def __init__(self):
-        self.pieces: Dict[Tuple[int, int], Piece] = {}
+        self.cells: bytearray = bytearray(_EMPTY_CELLS)
+        # 每方棋子所在格子的清單，搭配 _index 以 O(1) 移除
+        self.piece_squares: Tuple[List[int], List[int]] = ([], [])
+        self._index: List[int] = [0] * BOARD_SIZE
+        # 每方將/帥所在格子，0 表示不在棋盤上
+        self.general_squares: List[int] = [0, 0]
+        # 每一橫列（以 row 索引）與直行（以 col 索引）的佔用點陣，供車、炮查表
+        self.rank_bits: List[int] = [0] * (BOARD_ROWS + 1)
+        self.file_bits: List[int] = [0] * (BOARD_COLS + 1)
+        # 輪到哪一方走棋（0 = 紅, 1 = 黑）與增量維護的 Zobrist 雜湊
+        self.side: int = 0
+        self.zobrist: int = 0
+        # 增量維護的評估分數（紅方角度）
+        self.score: int = 0
+        # make_move 的還原堆疊，UndoInfo 物件建立後重複使用
+        self._undo_stack: List[UndoInfo] = []
+        self.ply: int = 0
+        self._rules = (
+            None,
+            self._general_rule,
+            self._guard_rule,
+            self._rook_rule,
+            self._horse_rule,
+            self._cannon_rule,
+            self._elephant_rule,
+            self._soldier_rule,
+        )
+
+    @property
+    def pieces(self) -> Dict[Tuple[int, int], Piece]:
+        """以 dict 檢視目前盤面（相容舊介面，每次呼叫重新建立）"""
+        cells = self.cells
+        return {
+            position_of(sq): self._make_piece(cells[sq], sq)
+            for side_squares in self.piece_squares
+            for sq in side_squares
+        }
 
     def clear(self):
-        self.pieces = {}
+        self.cells[:] = _EMPTY_CELLS
+        self.piece_squares[0].clear()
+        self.piece_squares[1].clear()
+        self.general_squares[0] = self.general_squares[1] = 0
+        self.rank_bits[:] = _EMPTY_RANKS
+        self.file_bits[:] = _EMPTY_FILES
+        self.side = 0
+        self.zobrist = 0
+        self.score = 0
+        self.ply = 0
+
+    @property
+    def side_to_move(self) -> Color:
+        return SIDE_COLORS[self.side]
+
+    @side_to_move.setter
+    def side_to_move(self, color) -> None:
+        self._set_side(side_of(color))
+
+    def compute_score(self) -> int:
+        """從頭計算評估分數（驗證增量結果用）"""
+        cells = self.cells
+        return sum(_PIECE_SCORES[cells[sq]][sq] for squares in self.piece_squares for sq in squares)
+
+    def compute_zobrist(self) -> int:
+        """從頭計算 Zobrist 雜湊（驗證增量結果用）"""
+        key = ZOBRIST_SIDE if self.side else 0
+        for side_squares in self.piece_squares:
+            for sq in side_squares:
+                key ^= ZOBRIST_PIECES[self.cells[sq]][sq]
+        return key
+
+    def compute_occupancy(self) -> Tuple[List[int], List[int]]:
+        """從頭計算橫列與直行的佔用點陣（驗證增量結果用）"""
+        ranks, files = list(_EMPTY_RANKS), list(_EMPTY_FILES)
+        for side_squares in self.piece_squares:
+            for sq in side_squares:
+                ranks[_ROW_OF[sq]] |= _RANK_BIT[sq]
+                files[_COL_OF[sq]] |= _FILE_BIT[sq]
+        return ranks, files
+
+    def setup_initial_position(self):
+        """清空棋盤並擺上標準開局"""
+        self.clear()
+        for piece_type, color, position in INITIAL_POSITION:
+            self._put(square_of(position), piece_code(piece_type, color))
+
+    @classmethod
+    def from_fen(cls, fen: str) -> 'ChineseChessBoard':
+        board = cls()
+        board.set_fen(fen)
+        return board
+
+    def set_fen(self, fen: str) -> None:
+        """以 FEN 重設盤面（重複使用同一個棋盤物件，不建立 Piece）"""
+        fields = fen.split()
+        if not fields:
+            raise ValueError("Empty FEN")
+        rows = fields[0].split("/")
+        if len(rows) != BOARD_ROWS:
+            raise ValueError(f"FEN must have {BOARD_ROWS} ranks: {fen!r}")
+        side = _FEN_SIDES.get(fields[1].lower() if len(fields) > 1 else "w")
+        if side is None:
+            raise ValueError(f"Invalid side to move in FEN: {fen!r}")
+        self.clear()
+        put = self._put
+        for text, squares in zip(rows, _FEN_ROW_SQUARES):
+            col = 0
+            for ch in text:
+                if "1" <= ch <= "9":
+                    col += ord(ch) - 48
+                    continue
+                code = _FEN_CODES.get(ch)
+                if code is None or col >= BOARD_COLS:
+                    self.clear()
+                    raise ValueError(f"Invalid FEN rank {text!r}: {fen!r}")
+                put(squares[col], code)
+                col += 1
+            if col != BOARD_COLS:
+                self.clear()
+                raise ValueError(f"Invalid FEN rank {text!r}: {fen!r}")
+        self._set_side(side)
+
+    def to_fen(self) -> str:
+        cells = self.cells
+        ranks = []
+        for squares in _FEN_ROW_SQUARES:
+            text = ""
+            empty = 0
+            for sq in squares:
+                code = cells[sq]
+                if code:
+                    if empty:
+                        text += str(empty)
+                        empty = 0
+                    text += _FEN_LETTERS[code]
+                else:
+                    empty += 1
+            if empty:
+                text += str(empty)
+            ranks.append(text)
+        return f"{'/'.join(ranks)} {'b' if self.side else 'w'} - - 0 1"
 
     def add_piece(self, piece_type: str, color: str, position: Tuple[int, int]):
         # 兼容舊步驟定義（str），自動轉 Enum
         pt = PieceType(piece_type.capitalize()) if not isinstance(piece_type, PieceType) else piece_type
         c = Color(color.capitalize()) if not isinstance(color, Color) else color
-        self.pieces[position] = Piece(pt, c, position)
+        sq = square_of(position)
+        if sq is None:
+            raise ValueError(f"Position {position} is outside the board")
+        if self.cells[sq]:
+            self._remove(sq)
+        self._put(sq, piece_code(pt, c))
 
     def move_piece(self, from_pos: Tuple[int, int], to_pos: Tuple[int, int]) -> bool:
-        if from_pos not in self.pieces:
+        from_sq = square_of(from_pos)
+        to_sq = square_of(to_pos)
+        if from_sq is None or to_sq is None or from_sq == to_sq:
+            return False
+        code = self.cells[from_sq]
+        if not code:
             return False
-        piece = self.pieces[from_pos]
-        rule_func = self._get_rule_func(piece.piece_type)
-        if not rule_func(piece, to_pos):
+        captured = self.cells[to_sq]
+        # 不能吃自己的棋子
+        if captured and not (captured ^ code) & BLACK_FLAG:
+            return False
+        if not self._rules[code & TYPE_MASK](from_sq, to_sq, code & BLACK_FLAG):
             return False
         # 執行移動與吃子（先模擬移動）
-        captured = self.pieces.get(to_pos)
-        self.pieces[to_pos] = piece
-        del self.pieces[from_pos]
-        piece.position = to_pos
+        self._move(from_sq, to_sq, captured)
         # 只有 General 移動時才檢查將帥對面
-        if piece.piece_type == PieceType.GENERAL and self._would_generals_face(None, None):
+        if code & TYPE_MASK == GENERAL and self._generals_facing():
             # 還原
-            self.pieces[from_pos] = piece
-            piece.position = from_pos
-            if captured:
-                self.pieces[to_pos] = captured
+            self._unmove(from_sq, to_sq, captured)
+            return False
+        self._set_side(0 if code & BLACK_FLAG else 1)
+        return True
+
+    def get_piece(self, position: Tuple[int, int]) -> Optional[Piece]:
+        sq = square_of(position)
+        if sq is None or not self.cells[sq]:
+            return None
+        return self._make_piece(self.cells[sq], sq)
+
+    def make_move(self, move: int) -> UndoInfo:
+        """
+        直接執行已產生的走法（不做合法性檢查）
+
+        還原資訊記錄在棋盤內預先配置的堆疊上，必須以後進先出的順序呼叫 unmake_move
+        """
+        stack = self._undo_stack
+        if self.ply == len(stack):
+            stack.append(UndoInfo())
+        undo = stack[self.ply]
+        self.ply += 1
+        from_sq, to_sq = move >> 8, move & 0xFF
+        key, score = self.zobrist, self.score
+        captured = self.cells[to_sq]
+        undo.move = move
+        undo.captured = captured
+        undo.side = self.side
+        self._move(from_sq, to_sq, captured)
+        self._set_side(0 if self.cells[to_sq] & BLACK_FLAG else 1)
+        undo.hash_delta = self.zobrist ^ key
+        undo.eval_delta = self.score - score
+        return undo
+
+    def unmake_move(self, undo: Optional[UndoInfo] = None) -> None:
+        """還原最近一次 make_move；雜湊與評估直接套用記錄的變化量"""
+        if self.ply == 0:
+            raise ValueError("No move to unmake")
+        self.ply -= 1
+        top = self._undo_stack[self.ply]
+        if undo is not None and undo is not top:
+            self.ply += 1
+            raise ValueError("unmake_move must undo the most recent make_move")
+        from_sq, to_sq = top.move >> 8, top.move & 0xFF
+        cells = self.cells
+        code = cells[to_sq]
+        side = 1 if code & BLACK_FLAG else 0
+        cells[from_sq] = code
+        i = self._index[to_sq]
+        self.piece_squares[side][i] = from_sq
+        self._index[from_sq] = i
+        if code & TYPE_MASK == GENERAL:
+            self.general_squares[side] = from_sq
+        captured = top.captured
+        cells[to_sq] = captured
+        rank_bits, file_bits = self.rank_bits, self.file_bits
+        row, rank_bit, col, file_bit = _LINE_BITS[from_sq]
+        rank_bits[row] |= rank_bit
+        file_bits[col] |= file_bit
+        if not captured:
+            row, rank_bit, col, file_bit = _LINE_BITS[to_sq]
+            rank_bits[row] ^= rank_bit
+            file_bits[col] ^= file_bit
+        if captured:
+            other = 1 - side
+            squares = self.piece_squares[other]
+            self._index[to_sq] = len(squares)
+            squares.append(to_sq)
+            if captured & TYPE_MASK == GENERAL:
+                self.general_squares[other] = to_sq
+        self.zobrist ^= top.hash_delta
+        self.score -= top.eval_delta
+        self.side = top.side
+
+    def copy(self) -> 'ChineseChessBoard':
+        board = ChineseChessBoard()
+        for side in (0, 1):
+            for sq in self.piece_squares[side]:
+                board._put(sq, self.cells[sq])
+        board._set_side(self.side)
+        return board
+
+    # ------------------------------------------------------------------
+    # 走法產生（查表），結果與 move_piece 的判定一致
+    # ------------------------------------------------------------------
+    def generate_moves(self, color) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """列出指定顏色所有合法走法，回傳 [(from_pos, to_pos), ...]"""
+        return [(position_of(m >> 8), position_of(m & 0xFF))
+                for m in self.generate_move_codes(color)]
+
+    def legal_moves_from(self, position: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """列出指定位置棋子的所有合法目標格"""
+        sq = square_of(position)
+        if sq is None or not self.cells[sq]:
+            return []
+        moves: List[int] = []
+        self._generate_from(sq, moves)
+        return [position_of(m & 0xFF) for m in moves]
+
+    def generate_move_codes(self, color) -> List[int]:
+        """列出指定顏色所有合法走法（encode_move 編碼）"""
+        moves: List[int] = []
+        generate_from = self._generate_from
+        for sq in self.piece_squares[side_of(color)]:
+            generate_from(sq, moves)
+        return moves
+
+    def _generate_from(self, from_sq: int, moves: List[int]) -> None:
+        cells = self.cells
+        code = cells[from_sq]
+        own = code & BLACK_FLAG
+        side = 1 if own else 0
+        kind = code & TYPE_MASK
+        base = from_sq << 8
+        append = moves.append
+        if kind == ROOK or kind == CANNON:
+            # 查表得到橫列與直行上可到達的格子，只需排除吃到己方棋子的目標
+            row, col = _ROW_OF[from_sq], _COL_OF[from_sq]
+            if kind == ROOK:
+                steps = _RANK_ROOK_STEPS[col][self.rank_bits[row]] + _FILE_ROOK_STEPS[row][self.file_bits[col]]
             else:
-                del self.pieces[to_pos]
+                steps = _RANK_CANNON_STEPS[col][self.rank_bits[row]] + _FILE_CANNON_STEPS[row][self.file_bits[col]]
+            for step in steps:
+                to_sq = from_sq + step
+                target = cells[to_sq]
+                if not target or (target & BLACK_FLAG) != own:
+                    append(base | to_sq)
+        elif kind == HORSE or kind == ELEPHANT:
+            jumps = _HORSE_JUMPS[from_sq] if kind == HORSE else _ELEPHANT_JUMPS[side][from_sq]
+            for to_sq, block in jumps:
+                if cells[block]:
+                    continue
+                target = cells[to_sq]
+                if not target or (target & BLACK_FLAG) != own:
+                    append(base | to_sq)
+        elif kind == GENERAL:
+            for to_sq in _GENERAL_STEPS[side][from_sq]:
+                target = cells[to_sq]
+                if target and (target & BLACK_FLAG) == own:
+                    continue
+                if not self._general_step_faces(from_sq, to_sq, side):
+                    append(base | to_sq)
+        else:
+            steps = _GUARD_STEPS[side][from_sq] if kind == GUARD else _SOLDIER_STEPS[side][from_sq]
+            for to_sq in steps:
+                target = cells[to_sq]
+                if not target or (target & BLACK_FLAG) != own:
+                    append(base | to_sq)
+
+    # ------------------------------------------------------------------
+    # 將軍、將死與困斃
+    # ------------------------------------------------------------------
+    def is_in_check(self, color) -> bool:
+        """指定顏色的將帥是否正被攻擊（包含將帥對面）"""
+        return self._general_attacked(side_of(color))
+
+    def is_checkmate(self, color) -> bool:
+        side = side_of(color)
+        return self._general_attacked(side) and not self.has_legal_move(side)
+
+    def is_stalemate(self, color) -> bool:
+        """未被將軍但無合法走法（象棋規則中同樣判負）"""
+        side = side_of(color)
+        return not self._general_attacked(side) and not self.has_legal_move(side)
+
+    def has_legal_move(self, color) -> bool:
+        """是否至少有一步合法走法；找到第一步就停止，不產生完整的走法清單"""
+        side = side_of(color)
+        general = self.general_squares[side]
+        if general and self._general_attacked(side):
+            return any(self._evades_check(move, side) for move in self.generate_move_codes(side))
+        restricted, forbidden = self._pins(side) if general else ({}, ())
+        moves: List[int] = []
+        for from_sq in self.piece_squares[side]:
+            moves.clear()
+            self._generate_from(from_sq, moves)
+            if from_sq == general:
+                if any(self._general_step_safe(general, move & 0xFF, side) for move in moves):
+                    return True
+                continue
+            allowed = restricted.get(from_sq)
+            for move in moves:
+                to_sq = move & 0xFF
+                if (allowed is None or to_sq in allowed) and to_sq not in forbidden:
+                    return True
+        return False
+
+    def generate_legal_moves(self, color) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        """列出走完後己方將帥不會被攻擊的走法，回傳 [(from_pos, to_pos), ...]"""
+        return [(position_of(m >> 8), position_of(m & 0xFF))
+                for m in self.generate_legal_move_codes(color)]
+
+    def generate_legal_move_codes(self, color) -> List[int]:
+        """
+        過濾掉會讓己方將帥被攻擊的走法（encode_move 編碼）
+
+        未被將軍時不需要實際走棋：_pins 從將帥所在格找出被牽制的棋子與會成為炮架的空格，
+        一般棋子的走法依此判斷，將帥自己的走法以 _general_step_safe 檢查目標格。
+        被將軍時（應將）才逐步走一步再檢查。
+        """
+        side = side_of(color)
+        moves = self.generate_move_codes(side)
+        general = self.general_squares[side]
+        if not general:
+            return moves
+        if self._general_attacked(side):
+            return [move for move in moves if self._evades_check(move, side)]
+        restricted, forbidden = self._pins(side)
+        legal = []
+        for move in moves:
+            from_sq, to_sq = move >> 8, move & 0xFF
+            if from_sq == general:
+                if self._general_step_safe(from_sq, to_sq, side):
+                    legal.append(move)
+                continue
+            allowed = restricted.get(from_sq)
+            if (allowed is None or to_sq in allowed) and to_sq not in forbidden:
+                legal.append(move)
+        return legal
+
+    def _evades_check(self, move: int, side: int) -> bool:
+        self.make_move(move)
+        safe = not self._general_attacked(side)
+        self.unmake_move()
+        return safe
+
+    def _pins(self, side: int) -> Tuple[Dict[int, frozenset], frozenset]:
+        """
+        未被將軍時，從將帥所在格找出走法的限制，回傳 (被牽制棋子 -> 可走的目標格, 不可走入的格子)
+
+        - 直線上第一子為己方、第二子為對方車或將帥：第一子只能沿線移動或吃掉牽制者（牽制者後面是對方炮時不能吃）
+        - 直線上第三子為對方炮：前兩子是炮架，己方的炮架只能沿線移動或吃掉炮（不能吃掉另一個炮架）
+        - 直線上第一子就是對方炮：走到中間的空格會成為炮架
+        - 對方馬（象）瞄準將帥時，己方在馬腳（象眼）上的棋子只能吃掉該馬（象）
+
+        攻擊與佔用資訊（將帥位置、各格棋子）由 make/unmake 增量維護，牽制在產生走法時才計算一次：
+        搜尋中大多數節點在產生走法前就被剪掉，每步都更新牽制反而更慢。
+        """
+        cells = self.cells
+        general = self.general_squares[side]
+        enemy = 0 if side else BLACK_FLAG
+        rook, cannon, enemy_general = ROOK | enemy, CANNON | enemy, GENERAL | enemy
+        restricted: Dict[int, frozenset] = {}
+        forbidden: set = set()
+
+        def restrict(sq: int, allowed: Iterable[int]) -> None:
+            allowed = frozenset(allowed)
+            restricted[sq] = restricted[sq] & allowed if sq in restricted else allowed
+
+        for ray in _RAYS[general]:
+            found = []
+            for i, sq in enumerate(ray):
+                if cells[sq]:
+                    found.append(i)
+                    if len(found) == 3:
+                        break
+            if not found:
+                continue
+            first = ray[found[0]]
+            if cells[first] == cannon:
+                forbidden.update(ray[:found[0]])
+            if len(found) < 2:
+                continue
+            second = cells[ray[found[1]]]
+            if second == rook or second == enemy_general:
+                if cells[first] & BLACK_FLAG != enemy:
+                    # 牽制者後面是對方炮時，吃掉牽制者後自己就成了唯一的炮架
+                    behind_cannon = len(found) == 3 and cells[ray[found[2]]] == cannon
+                    restrict(first, ray[:found[1] + (0 if behind_cannon else 1)])
+            elif len(found) == 3 and cells[ray[found[2]]] == cannon:
+                # 吃掉另一個炮架也只剩一個炮架
+                screens = (first, ray[found[1]])
+                for screen, other in (screens, screens[::-1]):
+                    if cells[screen] & BLACK_FLAG != enemy:
+                        restrict(screen, (sq for sq in ray[:found[2] + 1] if sq != other))
+        for h, leg in _HORSE_ATTACKERS[general]:
+            if cells[h] == HORSE | enemy and cells[leg] and cells[leg] & BLACK_FLAG != enemy:
+                restrict(leg, (h,))
+        for e, eye in _ELEPHANT_ATTACKERS[1 - side][general]:
+            if cells[e] == ELEPHANT | enemy and cells[eye] and cells[eye] & BLACK_FLAG != enemy:
+                restrict(eye, (e,))
+        return restricted, frozenset(forbidden)
+
+    def _general_step_safe(self, from_sq: int, to_sq: int, side: int) -> bool:
+        """將帥從 from_sq 走到 to_sq 後是否不被攻擊（將帥對面已由走法產生排除）；暫時把將帥拿起再檢查目標格"""
+        cells = self.cells
+        code = cells[from_sq]
+        row, rank_bit, col, file_bit = _LINE_BITS[from_sq]
+        cells[from_sq] = EMPTY
+        self.rank_bits[row] ^= rank_bit
+        self.file_bits[col] ^= file_bit
+        attacked = self._square_attacked(to_sq, 1 - side)
+        cells[from_sq] = code
+        self.rank_bits[row] |= rank_bit
+        self.file_bits[col] |= file_bit
+        return not attacked
+
+    def _general_attacked(self, side: int) -> bool:
+        """從將帥所在格反向檢查所有可能的攻擊者，不需掃描整個棋盤"""
+        sq = self.general_squares[side]
+        if not sq:
             return False
+        cells = self.cells
+        enemy = 0 if side else BLACK_FLAG
+        other = 1 - side
+        rook, cannon, general = ROOK | enemy, CANNON | enemy, GENERAL | enemy
+        # 查表取得橫列、直行上的第一個棋子與炮架後的棋子
+        row, col = _ROW_OF[sq], _COL_OF[sq]
+        rank, file = self.rank_bits[row], self.file_bits[col]
+        for d in _RANK_FIRST[col][rank]:
+            if cells[sq + d] == rook:
+                return True
+        for d in _FILE_FIRST[row][file]:
+            # 直行上第一個子是對方將帥即為將帥對面
+            code = cells[sq + d]
+            if code == rook or code == general:
+                return True
+        for d in _RANK_SECOND[col][rank] + _FILE_SECOND[row][file]:
+            if cells[sq + d] == cannon:
+                return True
+        for h, leg in _HORSE_ATTACKERS[sq]:
+            if cells[h] == HORSE | enemy and not cells[leg]:
+                return True
+        for kind in (SOLDIER, GENERAL, GUARD):
+            code = kind | enemy
+            for a in _STEP_ATTACKERS[kind][other][sq]:
+                if cells[a] == code:
+                    return True
+        for e, eye in _ELEPHANT_ATTACKERS[other][sq]:
+            if cells[e] == ELEPHANT | enemy and not cells[eye]:
+                return True
+        return False
+
+    def _square_attacked(self, sq: int, by_side: int) -> bool:
+        """by_side 是否有棋子能走到（吃到）sq；與 _general_attacked 相同但不含將帥對面"""
+        cells = self.cells
+        enemy = BLACK_FLAG if by_side else 0
+        rook, cannon = ROOK | enemy, CANNON | enemy
+        row, col = _ROW_OF[sq], _COL_OF[sq]
+        rank, file = self.rank_bits[row], self.file_bits[col]
+        for d in _RANK_FIRST[col][rank] + _FILE_FIRST[row][file]:
+            if cells[sq + d] == rook:
+                return True
+        for d in _RANK_SECOND[col][rank] + _FILE_SECOND[row][file]:
+            if cells[sq + d] == cannon:
+                return True
+        for h, leg in _HORSE_ATTACKERS[sq]:
+            if cells[h] == HORSE | enemy and not cells[leg]:
+                return True
+        for kind in (SOLDIER, GENERAL, GUARD):
+            code = kind | enemy
+            for a in _STEP_ATTACKERS[kind][by_side][sq]:
+                if cells[a] == code:
+                    return True
+        for e, eye in _ELEPHANT_ATTACKERS[by_side][sq]:
+            if cells[e] == ELEPHANT | enemy and not cells[eye]:
+                return True
+        return False
+
+    def _general_step_faces(self, from_sq: int, to_sq: int, side: int) -> bool:
+        """General 從 from_sq 走到 to_sq 後是否與對方將帥對面"""
+        enemy = self.general_squares[1 - side]
+        if not enemy or (enemy - to_sq) % STRIDE:
+            return False
+        step = STRIDE if enemy > to_sq else -STRIDE
+        cells = self.cells
+        for sq in range(to_sq + step, enemy, step):
+            if cells[sq] and sq != from_sq:
+                return False
         return True
 
+    # ------------------------------------------------------------------
+    # 陣列層的基本操作
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _make_piece(code: int, sq: int) -> Piece:
+        color = Color.BLACK if code & BLACK_FLAG else Color.RED
+        return Piece(CODE_TYPES[code & TYPE_MASK], color, position_of(sq))
+
+    def _set_side(self, side: int) -> None:
+        if side != self.side:
+            self.side = side
+            self.zobrist ^= ZOBRIST_SIDE
+
+    def _put(self, sq: int, code: int) -> None:
+        side = 1 if code & BLACK_FLAG else 0
+        self.cells[sq] = code
+        self.zobrist ^= ZOBRIST_PIECES[code][sq]
+        self.score += _PIECE_SCORES[code][sq]
+        row, rank_bit, col, file_bit = _LINE_BITS[sq]
+        self.rank_bits[row] |= rank_bit
+        self.file_bits[col] |= file_bit
+        squares = self.piece_squares[side]
+        self._index[sq] = len(squares)
+        squares.append(sq)
+        if code & TYPE_MASK == GENERAL:
+            self.general_squares[side] = sq
+
+    def _remove(self, sq: int) -> None:
+        code = self.cells[sq]
+        side = 1 if code & BLACK_FLAG else 0
+        self.cells[sq] = EMPTY
+        self.zobrist ^= ZOBRIST_PIECES[code][sq]
+        self.score -= _PIECE_SCORES[code][sq]
+        row, rank_bit, col, file_bit = _LINE_BITS[sq]
+        self.rank_bits[row] ^= rank_bit
+        self.file_bits[col] ^= file_bit
+        squares = self.piece_squares[side]
+        last = squares.pop()
+        if last != sq:
+            i = self._index[sq]
+            squares[i] = last
+            self._index[last] = i
+        if code & TYPE_MASK == GENERAL and self.general_squares[side] == sq:
+            self.general_squares[side] = 0
+
+    def _move(self, from_sq: int, to_sq: int, captured: int) -> None:
+        if captured:
+            self._remove(to_sq)
+        code = self.cells[from_sq]
+        side = 1 if code & BLACK_FLAG else 0
+        self.cells[to_sq] = code
+        self.cells[from_sq] = EMPTY
+        keys = ZOBRIST_PIECES[code]
+        self.zobrist ^= keys[from_sq] ^ keys[to_sq]
+        scores = _PIECE_SCORES[code]
+        self.score += scores[to_sq] - scores[from_sq]
+        rank_bits, file_bits = self.rank_bits, self.file_bits
+        row, rank_bit, col, file_bit = _LINE_BITS[from_sq]
+        rank_bits[row] ^= rank_bit
+        file_bits[col] ^= file_bit
+        row, rank_bit, col, file_bit = _LINE_BITS[to_sq]
+        rank_bits[row] |= rank_bit
+        file_bits[col] |= file_bit
+        i = self._index[from_sq]
+        self.piece_squares[side][i] = to_sq
+        self._index[to_sq] = i
+        if code & TYPE_MASK == GENERAL:
+            self.general_squares[side] = to_sq
+
+    def _unmove(self, from_sq: int, to_sq: int, captured: int) -> None:
+        self._move(to_sq, from_sq, EMPTY)
+        if captured:
+            self._put(to_sq, captured)
+
     def _get_rule_func(self, piece_type: PieceType):
         return {
             PieceType.GENERAL: self.is_general_move_legal,
@@ -70,149 +1166,344 @@ class ChineseChessBoard:
             PieceType.SOLDIER: self.is_soldier_move_legal,
         }[piece_type]
 
+    def _check_rule(self, rule, piece: Piece, to_pos: Tuple[int, int]) -> bool:
+        from_sq = square_of(piece.position)
+        to_sq = square_of(to_pos)
+        if from_sq is None or to_sq is None:
+            return False
+        return rule(from_sq, to_sq, COLOR_FLAGS[piece.color])
+
+    # ------------------------------------------------------------------
+    # 走法規則（Piece 介面）
+    # ------------------------------------------------------------------
     def is_general_move_legal(self, piece: Piece, to_pos: Tuple[int, int]) -> bool:
         """General 只能在九宮格內直橫移動一格"""
-        row, col = to_pos
-        if piece.color == Color.RED:
-            if not (1 <= row <= 3 and 4 <= col <= 6):
-                return False
-        else:
-            if not (8 <= row <= 10 and 4 <= col <= 6):
-                return False
-        from_row, from_col = piece.position
-        if abs(from_row - row) + abs(from_col - col) != 1:
-            return False
-        return True
+        return self._check_rule(self._general_rule, piece, to_pos)
 
     def is_guard_move_legal(self, piece: Piece, to_pos: Tuple[int, int]) -> bool:
         """Guard 只能在九宮格內斜對角移動一格"""
-        row, col = to_pos
-        if piece.color == Color.RED:
-            if not (1 <= row <= 3 and 4 <= col <= 6):
-                return False
-        else:
-            if not (8 <= row <= 10 and 4 <= col <= 6):
-                return False
-        from_row, from_col = piece.position
-        if abs(from_row - row) == 1 and abs(from_col - col) == 1:
-            return True
-        return False
+        return self._check_rule(self._guard_rule, piece, to_pos)
 
     def is_rook_move_legal(self, piece: Piece, to_pos: Tuple[int, int]) -> bool:
         """Rook 只能直行或橫行，且路徑上不能有其他棋子"""
-        from_row, from_col = piece.position
-        to_row, to_col = to_pos
-        if from_row != to_row and from_col != to_col:
-            return False
-        if from_row == to_row:
-            step = 1 if to_col > from_col else -1
-            for col in range(from_col + step, to_col, step):
-                if (from_row, col) in self.pieces:
-                    return False
-        else:
-            step = 1 if to_row > from_row else -1
-            for row in range(from_row + step, to_row, step):
-                if (row, from_col) in self.pieces:
-                    return False
-        return True
+        return self._check_rule(self._rook_rule, piece, to_pos)
 
     def is_horse_move_legal(self, piece: Piece, to_pos: Tuple[int, int]) -> bool:
         """Horse 走日字，且不能被蹩馬腳"""
-        from_row, from_col = piece.position
-        to_row, to_col = to_pos
-        dr, dc = abs(from_row - to_row), abs(from_col - to_col)
-        if (dr, dc) not in [(2, 1), (1, 2)]:
-            return False
-        if dr == 2 and dc == 1:
-            leg = (from_row + (1 if to_row > from_row else -1), from_col)
-        elif dr == 1 and dc == 2:
-            leg = (from_row, from_col + (1 if to_col > from_col else -1))
-        else:
-            return False
-        if leg in self.pieces:
-            return False
-        return True
+        return self._check_rule(self._horse_rule, piece, to_pos)
 
     def is_cannon_move_legal(self, piece: Piece, to_pos: Tuple[int, int]) -> bool:
         """Cannon 走法類似 Rook，但吃子時必須隔一子"""
-        from_row, from_col = piece.position
-        to_row, to_col = to_pos
-        if from_row != to_row and from_col != to_col:
-            return False
-        count = 0
-        if from_row == to_row:
-            step = 1 if to_col > from_col else -1
-            for col in range(from_col + step, to_col, step):
-                if (from_row, col) in self.pieces:
-                    count += 1
-        else:
-            step = 1 if to_row > from_row else -1
-            for row in range(from_row + step, to_row, step):
-                if (row, from_col) in self.pieces:
-                    count += 1
-        if to_pos in self.pieces:
-            return count == 1
-        return count == 0
+        return self._check_rule(self._cannon_rule, piece, to_pos)
 
     def is_elephant_move_legal(self, piece: Piece, to_pos: Tuple[int, int]) -> bool:
         """Elephant 只能走田字，不能過河，且中點不能被擋"""
-        from_row, from_col = piece.position
-        to_row, to_col = to_pos
-        dr, dc = abs(from_row - to_row), abs(from_col - to_col)
-        if dr != 2 or dc != 2:
+        return self._check_rule(self._elephant_rule, piece, to_pos)
+
+    def is_soldier_move_legal(self, piece: Piece, to_pos: Tuple[int, int]) -> bool:
+        """Soldier 未過河只能直行，過河後可左右移動但不能後退"""
+        return self._check_rule(self._soldier_rule, piece, to_pos)
+
+    # ------------------------------------------------------------------
+    # 走法規則（陣列索引介面），black 為 0 或 BLACK_FLAG
+    # ------------------------------------------------------------------
+    def _general_rule(self, from_sq: int, to_sq: int, black: int) -> bool:
+        if not _PALACE[1 if black else 0][to_sq]:
+            return False
+        return to_sq - from_sq in _ORTHOGONAL
+
+    def _guard_rule(self, from_sq: int, to_sq: int, black: int) -> bool:
+        if not _PALACE[1 if black else 0][to_sq]:
+            return False
+        return to_sq - from_sq in _DIAGONAL
+
+    def _rook_rule(self, from_sq: int, to_sq: int, black: int) -> bool:
+        row, col = _ROW_OF[from_sq], _COL_OF[from_sq]
+        if row == _ROW_OF[to_sq]:
+            return bool(_RANK_ROOK[col][self.rank_bits[row]] & _RANK_BIT[to_sq])
+        if col == _COL_OF[to_sq]:
+            return bool(_FILE_ROOK[row][self.file_bits[col]] & _FILE_BIT[to_sq])
+        return False
+
+    def _horse_rule(self, from_sq: int, to_sq: int, black: int) -> bool:
+        leg = _HORSE_LEGS.get(to_sq - from_sq)
+        if leg is None:
             return False
-        if piece.color == Color.RED and to_row > 5:
+        return not self.cells[from_sq + leg]
+
+    def _cannon_rule(self, from_sq: int, to_sq: int, black: int) -> bool:
+        row, col = _ROW_OF[from_sq], _COL_OF[from_sq]
+        if row == _ROW_OF[to_sq]:
+            return bool(_RANK_CANNON[col][self.rank_bits[row]] & _RANK_BIT[to_sq])
+        if col == _COL_OF[to_sq]:
+            return bool(_FILE_CANNON[row][self.file_bits[col]] & _FILE_BIT[to_sq])
+        return False
+
+    def _elephant_rule(self, from_sq: int, to_sq: int, black: int) -> bool:
+        if to_sq - from_sq not in _ELEPHANT_STEPS:
             return False
-        if piece.color == Color.BLACK and to_row < 6:
+        to_row = to_sq // STRIDE - 1
+        if not black and to_row > 5:
             return False
-        mid = ((from_row + to_row) // 2, (from_col + to_col) // 2)
-        if mid in self.pieces:
+        if black and to_row < 6:
             return False
-        return True
+        return not self.cells[(from_sq + to_sq) >> 1]
 
-    def is_soldier_move_legal(self, piece: Piece, to_pos: Tuple[int, int]) -> bool:
-        """Soldier 未過河只能直行，過河後可左右移動但不能後退"""
-        from_row, from_col = piece.position
-        to_row, to_col = to_pos
-        dr, dc = to_row - from_row, abs(to_col - from_col)
-        if abs(dr) + abs(dc) != 1:
+    def _soldier_rule(self, from_sq: int, to_sq: int, black: int) -> bool:
+        delta = to_sq - from_sq
+        if delta not in _ORTHOGONAL:
             return False
-        if piece.color == Color.RED:
-            # 紅兵前進是 row 減少（dr == -1）
+        from_row = from_sq // STRIDE - 1
+        if not black:
+            # 紅兵前進是 row 減少
             if from_row >= 6:
-                # 過河後可左右，但不能後退（dr == 1）
-                if dr == 1:
-                    return False
-            else:
-                # 未過河只能前進
-                if dr != -1 or dc != 0:
-                    return False
-        else:
-            # 黑卒前進是 row 增加（dr == 1）
-            if from_row <= 5:
-                # 過河後可左右，但不能後退（dr == -1）
-                if dr == -1:
-                    return False
-            else:
-                # 未過河只能前進
-                if dr != 1 or dc != 0:
-                    return False
-        return True
+                # 過河後可左右，但不能後退
+                return delta != STRIDE
+            # 未過河只能前進
+            return delta == -STRIDE
+        # 黑卒前進是 row 增加
+        if from_row <= 5:
+            return delta != -STRIDE
+        return delta == STRIDE
 
-    def get_piece(self, position: Tuple[int, int]) -> Optional[Piece]:
-        return self.pieces.get(position)
+    def _generals_facing(self) -> bool:
+        red, black = self.general_squares
+        if not red or not black or (black - red) % STRIDE:
+            return False
+        cells = self.cells
+        low, high = (red, black) if red < black else (black, red)
+        for sq in range(low + STRIDE, high, STRIDE):
+            if cells[sq]:
+                return False
+        return True
 
     def _would_generals_face(self, from_pos: Tuple[int, int], to_pos: Tuple[int, int]) -> bool:
-        generals = [p for p in self.pieces.values() if p.piece_type == PieceType.GENERAL]
-        if len(generals) != 2:
-            return False
-        g1, g2 = generals
-        if g1.position[1] != g2.position[1]:
+        return self._generals_facing()
+
+
+def iter_fen_positions(lines: Iterable[str], board: Optional[ChineseChessBoard] = None) -> Iterator[ChineseChessBoard]:
+    """
+    逐行讀取 FEN 並載入同一個棋盤物件後 yield（空白行與 # 開頭的行會略過）
+
+    每次 yield 的都是同一個棋盤，呼叫端若要保留盤面需自行 copy()
+    """
+    board = board if board is not None else ChineseChessBoard()
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        board.set_fen(line)
+        yield board
+
+
+def load_fen_file(path: str, board: Optional[ChineseChessBoard] = None) -> Iterator[ChineseChessBoard]:
+    """串流讀取 FEN 檔案，見 iter_fen_positions"""
+    with open(path, encoding="utf-8") as f:
+        yield from iter_fen_positions(f, board)
+
+
+# ---------------------------------------------------------------------------
+# 效能計數（診斷用）
+#
+# 啟用時把計數版本的規則函式、走法產生與 make_move 以實例屬性掛到指定的棋盤上，
+# 停用時刪除這些屬性，回到類別上的原始方法；沒有啟用的棋盤完全不經過任何計數程式碼。
+# ---------------------------------------------------------------------------
+_RULE_NAMES = {code: f"is_{pt.value.lower()}_move_legal" for pt, code in TYPE_CODES.items()}
+_RULE_ATTRS = {
+    GENERAL: "_general_rule", GUARD: "_guard_rule", ROOK: "_rook_rule", HORSE: "_horse_rule",
+    CANNON: "_cannon_rule", ELEPHANT: "_elephant_rule", SOLDIER: "_soldier_rule",
+}
+_ENUMERATORS = ("generate_move_codes", "generate_legal_move_codes")
+_REJECTION_REASONS = ("off_board", "same_square", "empty_square", "own_piece", "piece_rule", "generals_facing")
+
+
+class RulesProfiler:
+    """
+    單一棋盤的規則引擎計數器
+
+    記錄每個走法規則的呼叫次數、耗時與拒絕次數、move_piece 被拒絕的原因、將帥對面檢查次數，
+    以及走法產生與 make_move（節點）的吞吐量。timed=False 時只計數不計時，額外負擔更小。
+
+        with RulesProfiler(board) as profiler:
+            perft(board, 3, "Red")
+        print(profiler.to_json())
+    """
+
+    def __init__(self, board: ChineseChessBoard, timed: bool = True):
+        self.board = board
+        self.timed = timed
+        self.enabled = False
+        # 每個計數以 list 存放，讓包裝函式以索引就地累加；reset 只清零不換物件
+        self._rules = {name: [0, 0.0, 0] for name in _RULE_NAMES.values()}
+        self._rejections = dict.fromkeys(_REJECTION_REASONS, 0)
+        self._facing = [0, 0]
+        self._enumeration = {name: [0, 0, 0.0] for name in _ENUMERATORS}
+        self._nodes = [0]
+        self._seconds = 0.0
+        self._started = 0.0
+        self._last_rule_ok = True
+
+    def reset(self) -> None:
+        for stats in (*self._rules.values(), *self._enumeration.values(), self._facing, self._nodes):
+            stats[:] = [0] * len(stats)
+        for reason in self._rejections:
+            self._rejections[reason] = 0
+        self._seconds = 0.0
+        self._started = time.perf_counter()
+
+    def __enter__(self) -> "RulesProfiler":
+        self.enable()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.disable()
+
+    # ------------------------------------------------------------------
+    # 掛上與移除計數版本的方法
+    # ------------------------------------------------------------------
+    def enable(self) -> None:
+        if self.enabled:
+            return
+        board = self.board
+        for kind, attr in _RULE_ATTRS.items():
+            setattr(board, attr, self._wrap_rule(_RULE_NAMES[kind], getattr(board, attr)))
+        board._rules = (None,) + tuple(getattr(board, _RULE_ATTRS[kind]) for kind in range(1, 8))
+        board._generals_facing = self._wrap_facing(board._generals_facing)
+        board._general_step_faces = self._wrap_facing(board._general_step_faces)
+        board.move_piece = self._wrap_move_piece(board.move_piece)
+        for name in _ENUMERATORS:
+            setattr(board, name, self._wrap_enumerator(self._enumeration[name], getattr(board, name)))
+        board.make_move = self._wrap_make_move(board.make_move)
+        self.enabled = True
+        self._started = time.perf_counter()
+
+    def disable(self) -> None:
+        if not self.enabled:
+            return
+        self._seconds += time.perf_counter() - self._started
+        board = self.board
+        for attr in (*_RULE_ATTRS.values(), "_generals_facing", "_general_step_faces", "move_piece",
+                     *_ENUMERATORS, "make_move"):
+            board.__dict__.pop(attr, None)
+        board._rules = (None,) + tuple(getattr(board, _RULE_ATTRS[kind]) for kind in range(1, 8))
+        self.enabled = False
+
+    def _wrap_rule(self, name: str, rule):
+        stats = self._rules[name]
+        clock = time.perf_counter
+
+        if self.timed:
+            def counted(from_sq: int, to_sq: int, black: int) -> bool:
+                start = clock()
+                ok = rule(from_sq, to_sq, black)
+                stats[1] += clock() - start
+                stats[0] += 1
+                if not ok:
+                    stats[2] += 1
+                self._last_rule_ok = ok
+                return ok
+        else:
+            def counted(from_sq: int, to_sq: int, black: int) -> bool:
+                ok = rule(from_sq, to_sq, black)
+                stats[0] += 1
+                if not ok:
+                    stats[2] += 1
+                self._last_rule_ok = ok
+                return ok
+        return counted
+
+    def _wrap_facing(self, check):
+        stats = self._facing
+
+        def counted(*args) -> bool:
+            facing = check(*args)
+            stats[0] += 1
+            if facing:
+                stats[1] += 1
+            return facing
+        return counted
+
+    def _wrap_move_piece(self, move_piece):
+        board = self.board
+        rejections = self._rejections
+
+        def counted(from_pos: Tuple[int, int], to_pos: Tuple[int, int]) -> bool:
+            self._last_rule_ok = True
+            if move_piece(from_pos, to_pos):
+                return True
+            # 被拒絕的走法不會改變盤面，依 move_piece 的檢查順序判斷原因
+            from_sq, to_sq = square_of(from_pos), square_of(to_pos)
+            if from_sq is None or to_sq is None:
+                reason = "off_board"
+            elif from_sq == to_sq:
+                reason = "same_square"
+            elif not board.cells[from_sq]:
+                reason = "empty_square"
+            elif board.cells[to_sq] and not (board.cells[to_sq] ^ board.cells[from_sq]) & BLACK_FLAG:
+                reason = "own_piece"
+            elif not self._last_rule_ok:
+                reason = "piece_rule"
+            else:
+                reason = "generals_facing"
+            rejections[reason] += 1
             return False
-        col = g1.position[1]
-        r1, r2 = g1.position[0], g2.position[0]
-        min_row, max_row = min(r1, r2), max(r1, r2)
-        for row in range(min_row + 1, max_row):
-            if (row, col) in self.pieces:
-                return False
-        return True 
\ No newline at end of file
+        return counted
+
+    def _wrap_enumerator(self, stats: List, generate):
+        clock = time.perf_counter
+        timed = self.timed
+
+        def counted(color) -> List[int]:
+            start = clock() if timed else 0.0
+            moves = generate(color)
+            if timed:
+                stats[2] += clock() - start
+            stats[0] += 1
+            stats[1] += len(moves)
+            return moves
+        return counted
+
+    def _wrap_make_move(self, make_move):
+        nodes = self._nodes
+
+        def counted(move: int) -> UndoInfo:
+            nodes[0] += 1
+            return make_move(move)
+        return counted
+
+    # ------------------------------------------------------------------
+    # 匯出
+    # ------------------------------------------------------------------
+    @property
+    def seconds(self) -> float:
+        """啟用期間經過的時間"""
+        if self.enabled:
+            return self._seconds + time.perf_counter() - self._started
+        return self._seconds
+
+    def snapshot(self) -> dict:
+        """目前計數的快照（可直接序列化為 JSON）"""
+        seconds = self.seconds
+
+        def rate(count: float, elapsed: float) -> float:
+            return count / elapsed if elapsed > 0 else 0.0
+
+        return {
+            "seconds": seconds,
+            "rules": {
+                name: {"calls": calls, "seconds": spent, "rejected": rejected}
+                for name, (calls, spent, rejected) in self._rules.items()
+            },
+            "rejections": dict(self._rejections),
+            "generals_facing": {"checks": self._facing[0], "facing": self._facing[1]},
+            "enumeration": {
+                name: {"calls": calls, "moves": moves, "seconds": spent,
+                       "moves_per_second": rate(moves, spent if self.timed else seconds)}
+                for name, (calls, moves, spent) in self._enumeration.items()
+            },
+            "nodes": self._nodes[0],
+            "nodes_per_second": rate(self._nodes[0], seconds),
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.snapshot(), indent=indent)
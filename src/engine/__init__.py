@@ -0,0 +1 @@
+# Search engine built on the Chinese chess rules module
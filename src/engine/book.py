@@ -0,0 +1,191 @@
+"""
+二進位開局庫
+
+檔案格式：16 bytes 檔頭（magic 8 bytes + entry 數 uint64），之後是依 (hash, move)
+排序的固定寬度 entry：position hash (uint64) | move (uint16) | weight (uint16)，little-endian。
+讀取端以 mmap 開啟並二分搜尋，不把內容載入成 Python 物件，多個行程可共用同一份 page cache。
+"""
+
+import heapq
+import mmap
+import os
+import random
+import struct
+import tempfile
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+from src.chinesechess import INITIAL_FEN, ChineseChessBoard, iccs_to_move
+
+MAGIC = b"XQBOOK1\0"
+_HEADER = struct.Struct("<8sQ")
+_ENTRY = struct.Struct("<QHH")
+ENTRY_SIZE = _ENTRY.size
+MAX_WEIGHT = 0xFFFF
+# 對局結果記號，建庫時略過
+_RESULTS = {"1-0", "0-1", "1/2-1/2", "*"}
+
+
+def iter_book_moves(games: Iterable[str], max_ply: int = 40) -> Iterator[Tuple[int, int]]:
+    """
+    重播 ICCS 對局紀錄（每行一局，走法以空白分隔），產生前 max_ply 步的 (hash, move)
+
+    遇到格式錯誤或不合法的走法時，該局其餘走法略過。
+    """
+    board = ChineseChessBoard()
+    for line in games:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        board.set_fen(INITIAL_FEN)
+        for ply, token in enumerate(line.split()):
+            if ply >= max_ply or token in _RESULTS:
+                break
+            try:
+                move = iccs_to_move(token)
+            except ValueError:
+                break
+            if move not in board.generate_legal_move_codes(board.side):
+                break
+            yield board.zobrist, move
+            board.make_move(move)
+
+
+def _write_run(entries: dict, directory: str) -> str:
+    fd, path = tempfile.mkstemp(suffix=".run", dir=directory)
+    with os.fdopen(fd, "wb") as f:
+        pack = _ENTRY.pack
+        f.write(b"".join(pack(key, move, min(weight, MAX_WEIGHT)) for (key, move), weight in sorted(entries.items())))
+    return path
+
+
+def _read_run(f: BinaryIO) -> Iterator[Tuple[int, int, int]]:
+    while True:
+        chunk = f.read(ENTRY_SIZE * 4096)
+        if not chunk:
+            return
+        yield from _ENTRY.iter_unpack(chunk)
+
+
+def build_book(games: Iterable[str], path: str, max_ply: int = 40, chunk_entries: int = 1_000_000) -> int:
+    """
+    由對局紀錄建立開局庫，回傳寫入的 entry 數
+
+    每 chunk_entries 個不同的 (hash, move) 就排序後寫出一個暫存檔，
+    最後以多路合併產生輸出，記憶體用量與對局數量無關。weight 為出現次數（上限 65535）。
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    runs: List[str] = []
+    counts: dict = {}
+    try:
+        for key_move in iter_book_moves(games, max_ply):
+            counts[key_move] = counts.get(key_move, 0) + 1
+            if len(counts) >= chunk_entries:
+                runs.append(_write_run(counts, directory))
+                counts = {}
+        if counts or not runs:
+            runs.append(_write_run(counts, directory))
+
+        files = [open(run, "rb") for run in runs]
+        try:
+            total = 0
+            with open(path, "wb") as out:
+                out.write(_HEADER.pack(MAGIC, 0))
+                pending = None
+                buffer = []
+                for key, move, weight in heapq.merge(*(_read_run(f) for f in files)):
+                    if pending and pending[0] == key and pending[1] == move:
+                        pending[2] += weight
+                        continue
+                    if pending:
+                        buffer.append(_ENTRY.pack(pending[0], pending[1], min(pending[2], MAX_WEIGHT)))
+                        if len(buffer) >= 4096:
+                            out.write(b"".join(buffer))
+                            buffer.clear()
+                        total += 1
+                    pending = [key, move, weight]
+                if pending:
+                    buffer.append(_ENTRY.pack(pending[0], pending[1], min(pending[2], MAX_WEIGHT)))
+                    total += 1
+                out.write(b"".join(buffer))
+                out.seek(0)
+                out.write(_HEADER.pack(MAGIC, total))
+        finally:
+            for f in files:
+                f.close()
+    finally:
+        for run in runs:
+            os.remove(run)
+    return total
+
+
+class OpeningBook:
+    """以 mmap 讀取的開局庫，probe 為 O(log n)"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < _HEADER.size:
+            self._file.close()
+            raise ValueError(f"Not an opening book: {path}")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or _HEADER.size + count * ENTRY_SIZE != size:
+            self.close()
+            raise ValueError(f"Not an opening book: {path}")
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self) -> "OpeningBook":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def _key_at(self, index: int) -> int:
+        return _ENTRY.unpack_from(self._mm, _HEADER.size + index * ENTRY_SIZE)[0]
+
+    def probe(self, key: int) -> List[Tuple[int, int]]:
+        """回傳該 hash 的所有 (move, weight)"""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) >> 1
+            if self._key_at(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        moves = []
+        offset = _HEADER.size + low * ENTRY_SIZE
+        end = _HEADER.size + self.count * ENTRY_SIZE
+        while offset < end:
+            entry_key, move, weight = _ENTRY.unpack_from(self._mm, offset)
+            if entry_key != key:
+                break
+            moves.append((move, weight))
+            offset += ENTRY_SIZE
+        return moves
+
+    def moves(self, board: ChineseChessBoard) -> List[Tuple[int, int]]:
+        """目前盤面的書中走法，過濾掉（hash 碰撞造成的）不合法走法"""
+        entries = self.probe(board.zobrist)
+        if not entries:
+            return []
+        legal = set(board.generate_legal_move_codes(board.side))
+        return [(move, weight) for move, weight in entries if move in legal and weight]
+
+    def choose(self, board: ChineseChessBoard, rng: Optional[random.Random] = None) -> Optional[int]:
+        """依 weight 加權隨機選一步；rng 為 None 時選 weight 最大的走法，不在書中回傳 None"""
+        entries = self.moves(board)
+        if not entries:
+            return None
+        if rng is None:
+            return max(entries, key=lambda entry: entry[1])[0]
+        moves, weights = zip(*entries)
+        return rng.choices(moves, weights=weights)[0]
@@ -0,0 +1,83 @@
+from src.chinesechess import (
+    BLACK_FLAG, CANNON, ELEPHANT, GUARD, HORSE, ROOK, STRIDE, TYPE_MASK, ChineseChessBoard,
+    _HORSE_JUMPS, _RAYS,
+)
+
+# 每個可走格的機動性分數
+ROOK_MOBILITY = 2
+HORSE_MOBILITY = 4
+CANNON_MOBILITY = 1
+# 將帥安全：每缺一個士、象，對方每個過河的車馬炮扣分；炮與對方將帥同一直行時炮方加分
+MISSING_DEFENDER_PENALTY = 6
+CANNON_ON_FILE_BONUS = 20
+
+# positional_score 絕對值的上限，搜尋可用 board.score 加減此值做 lazy evaluation。
+# 以標準子力（每方車馬炮各兩個、士象共四個）由各項權重推得：
+# 車最多 17 個可走格、馬 8 個、炮（不吃子）17 個，兩炮都在對方將帥的直行上，
+# 對方士象全失且六個車馬炮都過河；對方各項為 0 時分數最大。
+_MAX_ROOK_TARGETS, _MAX_HORSE_TARGETS, _MAX_CANNON_TARGETS = 17, 8, 17
+_DEFENDERS, _ATTACKERS = 4, 6
+POSITIONAL_MARGIN = (
+    2 * (ROOK_MOBILITY * _MAX_ROOK_TARGETS + HORSE_MOBILITY * _MAX_HORSE_TARGETS
+         + CANNON_MOBILITY * _MAX_CANNON_TARGETS + CANNON_ON_FILE_BONUS)
+    + _DEFENDERS * _ATTACKERS * MISSING_DEFENDER_PENALTY
+)
+
+
+def evaluate(board: ChineseChessBoard) -> int:
+    """
+    靜態評估，回傳以紅方角度計算的分數
+
+    子力與位置分數由棋盤在走棋時增量維護（board.score），這裡只加上需要看整個盤面的機動性與將帥安全，
+    只掃描車馬炮與士象，不重新計算子力。
+    """
+    return board.score + positional_score(board)
+
+
+def positional_score(board: ChineseChessBoard) -> int:
+    """機動性與將帥安全（紅方角度），限制在 ±POSITIONAL_MARGIN 內（非標準子力的盤面才會超出）"""
+    cells = board.cells
+    score = 0
+    defenders = [0, 0]
+    attackers = [0, 0]
+    for side in (0, 1):
+        sign = -1 if side else 1
+        own = BLACK_FLAG if side else 0
+        mobility = 0
+        for sq in board.piece_squares[side]:
+            kind = cells[sq] & TYPE_MASK
+            if kind == GUARD or kind == ELEPHANT:
+                defenders[side] += 1
+                continue
+            if kind == ROOK:
+                for ray in _RAYS[sq]:
+                    for to_sq in ray:
+                        target = cells[to_sq]
+                        if target:
+                            if (target & BLACK_FLAG) != own:
+                                mobility += ROOK_MOBILITY
+                            break
+                        mobility += ROOK_MOBILITY
+            elif kind == HORSE:
+                for to_sq, leg in _HORSE_JUMPS[sq]:
+                    target = cells[to_sq]
+                    if not cells[leg] and (not target or (target & BLACK_FLAG) != own):
+                        mobility += HORSE_MOBILITY
+            elif kind == CANNON:
+                for ray in _RAYS[sq]:
+                    for to_sq in ray:
+                        if cells[to_sq]:
+                            break
+                        mobility += CANNON_MOBILITY
+                if sq % STRIDE == board.general_squares[1 - side] % STRIDE:
+                    score += sign * CANNON_ON_FILE_BONUS
+            else:
+                continue
+            # 紅方 row 1-5、黑方 row 6-10 為己方陣地，車馬炮過河後計為攻擊子力
+            row = sq // STRIDE - 1
+            if (row >= 6) if side == 0 else (row <= 5):
+                attackers[side] += 1
+        score += sign * mobility
+    score -= (_DEFENDERS - defenders[0]) * attackers[1] * MISSING_DEFENDER_PENALTY
+    score += (_DEFENDERS - defenders[1]) * attackers[0] * MISSING_DEFENDER_PENALTY
+    return max(-POSITIONAL_MARGIN, min(POSITIONAL_MARGIN, score))
@@ -0,0 +1,192 @@
+"""
+對局狀態：走法歷史、重複局面與長將、長捉判定
+
+每個局面的 Zobrist key 以 Counter 計數，另記錄每個 key 出現的位置，
+每步棋是否將軍、是否捉子則累積成前綴和，因此重複次數與循環內「是否每步都在將（捉）」
+都能以 O(1) 查詢，不需要回頭掃描整局。
+
+長捉採用簡化的亞洲規則：走動的棋子（將帥、兵卒除外）新攻擊到對方沒有保護的棋子，
+或攻擊到價值比自己高的棋子，視為捉；對方的將帥與未過河的兵卒不算被捉。
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional
+
+from src.chinesechess import (
+    BLACK_FLAG, GENERAL, INITIAL_FEN, PIECE_VALUES, SOLDIER, STRIDE, TYPE_MASK, ChineseChessBoard,
+    Color, iccs_to_move,
+)
+
+CHECK = 1
+CHASE = 2
+CAPTURE = 4
+
+RED_WINS, BLACK_WINS, DRAW = "1-0", "0-1", "1/2-1/2"
+# 亞洲規則：雙方 60 回合（120 步）未吃子判和
+DEFAULT_NO_CAPTURE_PLIES = 120
+
+
+def _crossed_soldier(code: int, sq: int) -> bool:
+    row = sq // STRIDE - 1
+    # 本模組的兵向：紅兵 row >= 6、黑卒 row <= 5 為過河
+    return row <= 5 if code & BLACK_FLAG else row >= 6
+
+
+class GameState:
+    """包裝 ChineseChessBoard，記錄走法歷史與每步的將軍、捉子、吃子旗標"""
+
+    def __init__(self, board: Optional[ChineseChessBoard] = None):
+        self.board = board if board is not None else ChineseChessBoard.from_fen(INITIAL_FEN)
+        self.moves: List[int] = []
+        self.flags: List[int] = []
+        self.keys: Counter = Counter({self.board.zobrist: 1})
+        # key -> 出現過的局面編號（第 n 個局面為走了 n 步之後）
+        self._seen: Dict[int, List[int]] = {self.board.zobrist: [0]}
+        # 前綴和：_not_check[side][n] 為前 n 步中該方未將軍的步數，_not_forcing 為既未將軍也未捉子的步數
+        self._not_check = ([0], [0])
+        self._not_forcing = ([0], [0])
+        self._captures: List[int] = []
+
+    @classmethod
+    def from_fen(cls, fen: str) -> "GameState":
+        return cls(ChineseChessBoard.from_fen(fen))
+
+    @property
+    def ply(self) -> int:
+        return len(self.moves)
+
+    # ------------------------------------------------------------------
+    # 走棋與悔棋
+    # ------------------------------------------------------------------
+    def play(self, move: int) -> int:
+        """
+        走一步（encode_move 編碼，需為合法走法），回傳該步的旗標
+
+        Raises:
+            ValueError: 走法不合法
+        """
+        board = self.board
+        side = board.side
+        if move not in board.generate_legal_move_codes(side):
+            raise ValueError(f"Illegal move {move:#06x}")
+        before = self._targets(move >> 8)
+        captured = board.make_move(move).captured
+        flags = CAPTURE if captured else 0
+        if board._general_attacked(1 - side):
+            flags |= CHECK
+        if self._is_chase(move & 0xFF, before, side):
+            flags |= CHASE
+        self._push(move, flags, side)
+        return flags
+
+    def play_iccs(self, text: str) -> int:
+        return self.play(iccs_to_move(text))
+
+    def undo(self) -> int:
+        """悔一步，回傳被悔的走法"""
+        if not self.moves:
+            raise ValueError("No move to undo")
+        key = self.board.zobrist
+        self.keys[key] -= 1
+        if not self.keys[key]:
+            del self.keys[key]
+        seen = self._seen[key]
+        seen.pop()
+        if not seen:
+            del self._seen[key]
+        if self._captures and self._captures[-1] == len(self.moves):
+            self._captures.pop()
+        for prefix in (*self._not_check, *self._not_forcing):
+            prefix.pop()
+        self.flags.pop()
+        self.board.unmake_move()
+        return self.moves.pop()
+
+    def _push(self, move: int, flags: int, side: int) -> None:
+        self.moves.append(move)
+        self.flags.append(flags)
+        key = self.board.zobrist
+        self.keys[key] += 1
+        self._seen.setdefault(key, []).append(len(self.moves))
+        if flags & CAPTURE:
+            self._captures.append(len(self.moves))
+        for mover in (0, 1):
+            quiet = mover == side and not flags & CHECK
+            idle = mover == side and not flags & (CHECK | CHASE)
+            self._not_check[mover].append(self._not_check[mover][-1] + quiet)
+            self._not_forcing[mover].append(self._not_forcing[mover][-1] + idle)
+
+    # ------------------------------------------------------------------
+    # 捉子判定
+    # ------------------------------------------------------------------
+    def _targets(self, sq: int) -> set:
+        """sq 上的棋子目前可以吃到的格子"""
+        moves: List[int] = []
+        self.board._generate_from(sq, moves)
+        cells = self.board.cells
+        return {m & 0xFF for m in moves if cells[m & 0xFF]}
+
+    def _is_chase(self, sq: int, before: set, side: int) -> bool:
+        board = self.board
+        cells = board.cells
+        code = cells[sq]
+        if code & TYPE_MASK in (GENERAL, SOLDIER):
+            return False
+        value = PIECE_VALUES[code & TYPE_MASK]
+        for target in self._targets(sq) - before:
+            victim = cells[target]
+            kind = victim & TYPE_MASK
+            if kind == GENERAL or (kind == SOLDIER and not _crossed_soldier(victim, target)):
+                continue
+            if PIECE_VALUES[kind] > value or not board._square_attacked(target, 1 - side):
+                return True
+        return False
+
+    # ------------------------------------------------------------------
+    # 查詢（皆為 O(1)）
+    # ------------------------------------------------------------------
+    def repetition_count(self) -> int:
+        """目前局面（含走棋方）在這局中出現的次數"""
+        return self.keys[self.board.zobrist]
+
+    def is_repetition(self, times: int = 3) -> bool:
+        return self.keys[self.board.zobrist] >= times
+
+    def plies_since_capture(self) -> int:
+        return len(self.moves) - (self._captures[-1] if self._captures else 0)
+
+    def perpetual_offender(self) -> Optional[Color]:
+        """
+        目前局面重複時，檢查上一次出現到現在的循環：
+        一方每步都將軍而另一方沒有時為長將方；都不是長將時，一方每步都將軍或捉子而另一方沒有時為長捉方。
+        沒有重複或雙方都（都不）長將、長捉時回傳 None。
+        """
+        seen = self._seen[self.board.zobrist]
+        if len(seen) < 2:
+            return None
+        start, end = seen[-2], seen[-1]
+        for prefix in (self._not_check, self._not_forcing):
+            red = prefix[0][end] == prefix[0][start]
+            black = prefix[1][end] == prefix[1][start]
+            if red != black:
+                return Color.RED if red else Color.BLACK
+        return None
+
+    def result(self, times: int = 3, no_capture_plies: int = DEFAULT_NO_CAPTURE_PLIES) -> Optional[str]:
+        """
+        以結果記號回傳對局是否結束：無合法走法的一方負；局面重複 times 次時長將、長捉方負，否則和棋；
+        超過 no_capture_plies 步未吃子判和。對局未結束回傳 None。
+        """
+        board = self.board
+        if not board.generate_legal_move_codes(board.side):
+            return BLACK_WINS if board.side == 0 else RED_WINS
+        if self.is_repetition(times):
+            offender = self.perpetual_offender()
+            if offender is Color.RED:
+                return BLACK_WINS
+            if offender is Color.BLACK:
+                return RED_WINS
+            return DRAW
+        if self.plies_since_capture() >= no_capture_plies:
+            return DRAW
+        return None
@@ -0,0 +1,342 @@
+"""
+引擎對戰與自我對弈
+
+兩組引擎設定輪流執黑紅對下，每個開局各下兩局（交換先後手），開局從局面檔隨機抽取。
+對局在行程池中平行進行，每下完一局就更新勝和負統計與 SPRT 對數概似比，
+達到接受或拒絕的界線時停止整個對戰，不必等所有對局下完。
+"""
+
+import importlib
+import math
+import multiprocessing
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.chinesechess import INITIAL_FEN, ChineseChessBoard
+from src.engine.history import BLACK_WINS, DRAW, RED_WINS, GameState
+from src.engine.search import Searcher
+from src.engine.ucci import DEFAULT_MOVES_TO_GO
+
+DEFAULT_MAX_PLIES = 300
+
+
+@dataclass(frozen=True)
+class TimeControl:
+    """每局的時限：初始時間加上每步加秒（毫秒）"""
+    base_ms: int
+    increment_ms: int = 0
+    moves_to_go: int = DEFAULT_MOVES_TO_GO
+
+    def budget(self, remaining_ms: float) -> int:
+        """本步可用的時間，與 UCCI go time 的分配方式相同"""
+        return max(1, int(remaining_ms) // self.moves_to_go + self.increment_ms // 2)
+
+
+@dataclass(frozen=True)
+class EngineConfig:
+    """
+    一組引擎設定
+
+    searcher 為 "模組:類別" 形式的 Searcher（或子類別）路徑，方便比較不同的搜尋實作；
+    depth 與 time_control 至少指定一個，兩者都有時先到者為準。
+    """
+    name: str
+    depth: Optional[int] = None
+    time_control: Optional[TimeControl] = None
+    hash_mb: float = 4
+    searcher: str = "src.engine.search:Searcher"
+
+    def create_searcher(self) -> Searcher:
+        module, _, name = self.searcher.partition(":")
+        return getattr(importlib.import_module(module), name)(tt_size_mb=self.hash_mb)
+
+
+@dataclass
+class GameResult:
+    """一局的結果；result 為紅方角度的記號"""
+    index: int
+    opening: int
+    red: str
+    black: str
+    result: str
+    plies: int
+    reason: str
+
+    def score_for(self, name: str) -> float:
+        """指定引擎這局的得分（1 / 0.5 / 0）"""
+        if self.result == DRAW:
+            return 0.5
+        winner = self.red if self.result == RED_WINS else self.black
+        return 1.0 if winner == name else 0.0
+
+
+# ---------------------------------------------------------------------------
+# 統計
+# ---------------------------------------------------------------------------
+def _score_stats(wins: int, draws: int, losses: int) -> Tuple[float, float]:
+    """每局平均得分與其變異數"""
+    games = wins + draws + losses
+    mean = (wins + draws / 2) / games
+    variance = (wins + draws / 4) / games - mean * mean
+    return mean, variance
+
+
+def _expected_score(elo: float) -> float:
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def elo_estimate(wins: int, draws: int, losses: int) -> Tuple[float, float]:
+    """
+    由勝和負估計 Elo 差與 95% 信賴區間的半寬
+
+    全勝或全負時估計值為無窮大，以 ±inf 表示。
+    """
+    games = wins + draws + losses
+    if not games:
+        return 0.0, math.inf
+    mean, variance = _score_stats(wins, draws, losses)
+
+    def to_elo(score: float) -> float:
+        if score <= 0:
+            return -math.inf
+        if score >= 1:
+            return math.inf
+        return 400 * math.log10(score / (1 - score))
+
+    margin = 1.959964 * math.sqrt(variance / games)
+    return to_elo(mean), (to_elo(mean + margin) - to_elo(mean - margin)) / 2
+
+
+@dataclass(frozen=True)
+class SPRT:
+    """
+    Sequential probability ratio test（以常態近似的三項分布 GSPRT）
+
+    H0：Elo 差為 elo0，H1：Elo 差為 elo1；alpha、beta 分別為兩類錯誤率。
+    """
+    elo0: float = 0.0
+    elo1: float = 5.0
+    alpha: float = 0.05
+    beta: float = 0.05
+
+    @property
+    def bounds(self) -> Tuple[float, float]:
+        return math.log(self.beta / (1 - self.alpha)), math.log((1 - self.beta) / self.alpha)
+
+    def llr(self, wins: int, draws: int, losses: int) -> float:
+        """對數概似比；樣本變異數為 0（例如全和）時回傳 0"""
+        games = wins + draws + losses
+        if not games:
+            return 0.0
+        mean, variance = _score_stats(wins, draws, losses)
+        if variance <= 0:
+            return 0.0
+        s0, s1 = _expected_score(self.elo0), _expected_score(self.elo1)
+        return (s1 - s0) * (2 * mean - s0 - s1) / (2 * variance / games)
+
+    def decide(self, wins: int, draws: int, losses: int) -> Optional[str]:
+        """超過上界回傳 "H1"（接受改動），低於下界回傳 "H0"，否則 None"""
+        lower, upper = self.bounds
+        llr = self.llr(wins, draws, losses)
+        if llr >= upper:
+            return "H1"
+        if llr <= lower:
+            return "H0"
+        return None
+
+
+@dataclass
+class MatchStats:
+    """以第一個引擎（engine_a）角度累計的對戰結果"""
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+    seconds: float = 0.0
+    llr: float = 0.0
+    decision: Optional[str] = None
+    reasons: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds > 0 else 0.0
+
+    def elo(self) -> Tuple[float, float]:
+        return elo_estimate(self.wins, self.draws, self.losses)
+
+    def add(self, result: GameResult, name: str) -> None:
+        score = result.score_for(name)
+        if score == 1.0:
+            self.wins += 1
+        elif score == 0.5:
+            self.draws += 1
+        else:
+            self.losses += 1
+        self.reasons[result.reason] = self.reasons.get(result.reason, 0) + 1
+
+
+# ---------------------------------------------------------------------------
+# 開局與單局
+# ---------------------------------------------------------------------------
+def load_openings(path: str) -> List[str]:
+    """
+    讀取開局局面檔：每行一個 FEN，空白行與 # 開頭的行略過
+
+    FEN 不合法時 raise ValueError（附行號）
+    """
+    openings = []
+    board = ChineseChessBoard()
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                board.set_fen(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{number}: {e}") from None
+            openings.append(line)
+    return openings
+
+
+def play_game(
+    red: EngineConfig,
+    black: EngineConfig,
+    fen: str = INITIAL_FEN,
+    max_plies: int = DEFAULT_MAX_PLIES,
+    searchers: Optional[Tuple[Searcher, Searcher]] = None,
+    index: int = 0,
+    opening: int = 0,
+) -> GameResult:
+    """
+    下一局並回傳結果
+
+    終局判定使用 GameState（無合法走法、重複局面與長將長捉、未吃子步數）；
+    有時限的一方超時判負，超過 max_plies 步判和。
+    """
+    engines = (red, black)
+    if searchers is None:
+        searchers = (red.create_searcher(), black.create_searcher())
+    game = GameState.from_fen(fen)
+    clocks = [float(e.time_control.base_ms) if e.time_control else 0.0 for e in engines]
+
+    def finish(result: str, reason: str) -> GameResult:
+        return GameResult(index, opening, red.name, black.name, result, game.ply, reason)
+
+    while True:
+        verdict = game.result()
+        if verdict is not None:
+            if not game.board.generate_legal_move_codes(game.board.side):
+                return finish(verdict, "mate")
+            if game.is_repetition():
+                return finish(verdict, "repetition" if verdict == DRAW else "perpetual")
+            return finish(verdict, "no capture")
+        if game.ply >= max_plies:
+            return finish(DRAW, "max plies")
+        side = game.board.side
+        engine = engines[side]
+        control = engine.time_control
+        budget = control.budget(clocks[side]) if control else None
+        start = time.perf_counter()
+        move = searchers[side].search(game.board, depth=engine.depth, time_ms=budget).pv_codes
+        if control:
+            clocks[side] -= (time.perf_counter() - start) * 1000
+            if clocks[side] < 0:
+                return finish(BLACK_WINS if side == 0 else RED_WINS, "time")
+            clocks[side] += control.increment_ms
+        game.play(move[0])
+
+
+# ---------------------------------------------------------------------------
+# 平行對戰
+# ---------------------------------------------------------------------------
+# worker 行程內依引擎設定重複使用的 Searcher
+_worker_searchers: Dict[EngineConfig, Searcher] = {}
+
+
+def _searcher_for(config: EngineConfig) -> Searcher:
+    searcher = _worker_searchers.get(config)
+    if searcher is None:
+        searcher = _worker_searchers[config] = config.create_searcher()
+    else:
+        searcher.tt.clear()
+    return searcher
+
+
+def _play_task(task: Tuple[int, int, str, EngineConfig, EngineConfig, int]) -> GameResult:
+    index, opening, fen, red, black, max_plies = task
+    searchers = (_searcher_for(red), _searcher_for(black))
+    return play_game(red, black, fen, max_plies, searchers, index, opening)
+
+
+def _schedule(
+    engine_a: EngineConfig,
+    engine_b: EngineConfig,
+    openings: List[str],
+    games: int,
+    max_plies: int,
+    rng: random.Random,
+) -> Iterator[Tuple[int, int, str, EngineConfig, EngineConfig, int]]:
+    """開局隨機排序後依序使用，每個開局連續兩局交換先後手"""
+    order = list(range(len(openings)))
+    for index in range(games):
+        pair = index // 2
+        if pair % len(order) == 0 and index % 2 == 0:
+            rng.shuffle(order)
+        opening = order[pair % len(order)]
+        red, black = (engine_a, engine_b) if index % 2 == 0 else (engine_b, engine_a)
+        yield index, opening, openings[opening], red, black, max_plies
+
+
+def run_match(
+    engine_a: EngineConfig,
+    engine_b: EngineConfig,
+    games: int,
+    openings: Optional[List[str]] = None,
+    workers: int = 1,
+    sprt: Optional[SPRT] = None,
+    max_plies: int = DEFAULT_MAX_PLIES,
+    seed: Optional[int] = None,
+    on_result: Optional[Callable[[GameResult, MatchStats], None]] = None,
+) -> MatchStats:
+    """
+    對戰 games 局，回傳以 engine_a 角度的統計
+
+    workers > 1 時以行程池平行對局，結果完成一局就回報一局（順序不固定）；
+    指定 sprt 時每局更新 LLR，達到界線就停止並結束尚未完成的對局。
+    """
+    if engine_a.name == engine_b.name:
+        raise ValueError("Engine configurations must have different names")
+    for engine in (engine_a, engine_b):
+        if engine.depth is None and engine.time_control is None:
+            raise ValueError(f"Engine {engine.name} needs a depth or a time control")
+    openings = openings or [INITIAL_FEN]
+    start = time.perf_counter()
+    stats = MatchStats()
+    tasks = _schedule(engine_a, engine_b, openings, games, max_plies, random.Random(seed))
+
+    def record(results: Iterable[GameResult]) -> None:
+        for result in results:
+            stats.add(result, engine_a.name)
+            stats.seconds = time.perf_counter() - start
+            if sprt is not None:
+                stats.llr = sprt.llr(stats.wins, stats.draws, stats.losses)
+                stats.decision = sprt.decide(stats.wins, stats.draws, stats.losses)
+            if on_result:
+                on_result(result, stats)
+            if stats.decision:
+                return
+
+    if workers > 1:
+        # 離開 with 區塊時 terminate，SPRT 提早結束時未完成的對局直接丟棄
+        with multiprocessing.get_context().Pool(workers) as pool:
+            record(pool.imap_unordered(_play_task, tasks))
+    else:
+        record(map(_play_task, tasks))
+    stats.seconds = time.perf_counter() - start
+    return stats
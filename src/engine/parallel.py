@@ -0,0 +1,140 @@
+"""
+多行程 Lazy SMP 搜尋
+
+每個 worker 行程以各自的 Searcher 搜尋同一個盤面，置換表放在行程間共享的記憶體，
+worker 之間只透過置換表交換結果。輔助 worker 的搜尋深度與走法排序略有不同，
+讓它們探索不同的子樹並把結果寫進置換表給主 worker 使用。
+"""
+
+import multiprocessing
+import random
+import time
+from typing import List, Optional
+
+from src.chinesechess import ChineseChessBoard
+from src.engine.search import HISTORY_SIZE, SearchResult, Searcher, _SearchTimeout
+from src.engine.tt import TranspositionTable
+
+# worker 行程內的狀態，由 _init_worker 設定
+_worker_searcher: Optional["_SharedSearcher"] = None
+_worker_board: Optional[ChineseChessBoard] = None
+_EMPTY_HISTORY = [0] * HISTORY_SIZE
+
+
+class _SharedSearcher(Searcher):
+    """除了自己的 stopped 旗標外，也檢查跨行程的停止事件"""
+
+    def __init__(self, tt: TranspositionTable, stop_event):
+        super().__init__(tt=tt)
+        self.stop_event = stop_event
+
+    def _check_time(self) -> None:
+        if self._can_stop and self.stop_event.is_set():
+            raise _SearchTimeout()
+        super()._check_time()
+
+
+def _init_worker(shared_buffer, stop_event) -> None:
+    global _worker_searcher, _worker_board
+    tt = TranspositionTable(buffer=memoryview(shared_buffer).cast("B"))
+    _worker_searcher = _SharedSearcher(tt, stop_event)
+    _worker_board = ChineseChessBoard()
+
+
+def _worker_search(fen: str, depth: Optional[int], time_ms: Optional[int], index: int, generation: int):
+    searcher = _worker_searcher
+    board = _worker_board
+    board.set_fen(fen)
+    # 行程與 worker 編號沒有固定對應，每個工作都重設 history：
+    # 主 worker 從空的 history 開始，輔助 worker 以不同的初值打亂安靜走法的排序
+    history = searcher.history
+    if index:
+        # 奇數號輔助 worker 多搜一層
+        if depth and index & 1:
+            depth += 1
+        rng = random.Random(index)
+        history[:] = [rng.randrange(256) for _ in range(len(history))]
+    else:
+        history[:] = _EMPTY_HISTORY
+    # 所有 worker 共用同一個 generation，才不會把彼此本次的資料當成過期
+    result = searcher.search(board, depth=depth, time_ms=time_ms, generation=generation)
+    return index, result
+
+
+class ParallelSearcher:
+    """
+    以 workers 個行程執行 Lazy SMP 搜尋，介面與 Searcher.search 相同
+
+    行程池與共享置換表會在多次搜尋間重複使用，用完請呼叫 close() 或以 with 使用。
+    """
+
+    def __init__(self, workers: int = 2, tt_size_mb: float = 16):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.workers = workers
+        context = multiprocessing.get_context()
+        self._shared = context.RawArray("B", TranspositionTable.buffer_size(tt_size_mb))
+        self.tt = TranspositionTable(buffer=memoryview(self._shared).cast("B"))
+        self._stop_event = context.Event()
+        self._pool = context.Pool(workers, initializer=_init_worker, initargs=(self._shared, self._stop_event))
+
+    def __enter__(self) -> "ParallelSearcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._stop_event.set()
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def stop(self) -> None:
+        """要求所有 worker 盡快結束目前的搜尋"""
+        self._stop_event.set()
+
+    def search(
+        self,
+        board: ChineseChessBoard,
+        depth: Optional[int] = None,
+        time_ms: Optional[int] = None,
+    ) -> SearchResult:
+        """
+        平行搜尋目前輪到的一方的最佳走法
+
+        主 worker（0 號）完成後通知其他 worker 停止，回傳完成深度最深的結果，
+        nodes 為所有 worker 的節點總數。
+        """
+        if self._pool is None:
+            raise ValueError("ParallelSearcher is closed")
+        start = time.perf_counter()
+        self.tt.new_search()
+        self._stop_event.clear()
+        fen = board.to_fen()
+        pending = [
+            self._pool.apply_async(_worker_search, (fen, depth, time_ms, index, self.tt.generation))
+            for index in range(self.workers)
+        ]
+        results: List[Optional[SearchResult]] = [None] * self.workers
+        try:
+            _, results[0] = pending[0].get()
+        finally:
+            self._stop_event.set()
+        for index in range(1, self.workers):
+            _, results[index] = pending[index].get()
+
+        best = results[0]
+        for result in results[1:]:
+            if result.best_move is not None and result.depth > best.depth:
+                best = result
+        return SearchResult(
+            best_move=best.best_move,
+            score=best.score,
+            pv=best.pv,
+            depth=best.depth,
+            nodes=sum(result.nodes for result in results),
+            seconds=time.perf_counter() - start,
+            pv_codes=best.pv_codes,
+        )
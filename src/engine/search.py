@@ -0,0 +1,330 @@
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+from src.chinesechess import ChineseChessBoard, GENERAL, PIECE_VALUES, TYPE_MASK, position_of
+from src.engine.evaluation import POSITIONAL_MARGIN, evaluate
+from src.engine.tt import TranspositionTable, EXACT, LOWER, UPPER
+
+if TYPE_CHECKING:
+    from src.engine.book import OpeningBook
+
+Move = Tuple[Tuple[int, int], Tuple[int, int]]
+
+MATE = 30000
+# 絕對值超過此界線的分數為殺棋分數（含距離）
+MATE_BOUND = MATE - 1000
+INFINITY = 32000
+MAX_PLY = 64
+DEFAULT_DEPTH = 4
+ASPIRATION_WINDOW = 50
+# history 表以走法編碼（from << 8 | to）索引
+HISTORY_SIZE = 1 << 16
+
+# 走法排序分數區段：置換表走法 > 吃子（MVV-LVA）> killer > history
+_TT_MOVE_SCORE = 1 << 30
+_CAPTURE_SCORE = 1 << 24
+_KILLER_SCORE = 1 << 22
+# MVV-LVA 用的價值，將帥被吃排在最前面
+_ORDER_VALUES = list(PIECE_VALUES)
+_ORDER_VALUES[GENERAL] = 10000
+
+
+def to_positions(move: int) -> Move:
+    """走法編碼轉為 ((from_row, from_col), (to_row, to_col))"""
+    return position_of(move >> 8), position_of(move & 0xFF)
+
+
+@dataclass
+class SearchResult:
+    """搜尋結果：最佳走法、分數（走棋方角度）與主要變例"""
+    best_move: Optional[Move]
+    score: int
+    pv: List[Move]
+    depth: int
+    nodes: int
+    seconds: float
+    pv_codes: List[int] = field(default_factory=list)
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+
+class _SearchTimeout(Exception):
+    """時間用完或被要求停止，用來從遞迴中跳出"""
+
+
+def _score_to_tt(score: int, ply: int) -> int:
+    # 殺棋分數以「距目前節點」的形式存入置換表
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score: int, ply: int) -> int:
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
+
+
+class Searcher:
+    """
+    Negamax alpha-beta 搜尋
+    iterative deepening + aspiration window + 置換表 + killer/history 走法排序
+    """
+
+    def __init__(self, tt: Optional[TranspositionTable] = None, tt_size_mb: float = 16):
+        self.tt = tt if tt is not None else TranspositionTable(tt_size_mb)
+        self.history = [0] * HISTORY_SIZE
+        self.killers = [[0, 0] for _ in range(MAX_PLY + 1)]
+        self.nodes = 0
+        self.stopped = False
+        self._deadline: Optional[float] = None
+        self._can_stop = False
+        self._pv: List[List[int]] = [[] for _ in range(MAX_PLY + 2)]
+
+    def stop(self) -> None:
+        """要求目前的搜尋盡快結束（可由其他執行緒呼叫）"""
+        self.stopped = True
+
+    def set_time_limit(self, time_ms: Optional[int]) -> None:
+        """從現在起重新計算時間限制（可由其他執行緒呼叫，例如 ponderhit 時）"""
+        self._deadline = time.perf_counter() + time_ms / 1000 if time_ms else None
+
+    def search(
+        self,
+        board: ChineseChessBoard,
+        depth: Optional[int] = None,
+        time_ms: Optional[int] = None,
+        on_iteration: Optional[Callable[[SearchResult], None]] = None,
+        generation: Optional[int] = None,
+    ) -> SearchResult:
+        """
+        搜尋目前輪到的一方的最佳走法
+
+        Args:
+            board: 棋盤，搜尋結束後會還原成原本的盤面
+            depth: 最大深度；未指定且有 time_ms 時不限深度
+            time_ms: 時間限制（毫秒）
+            on_iteration: 每完成一層深度時的回呼
+            generation: 使用指定的置換表 generation；未指定時開始新的一代
+
+        Returns:
+            SearchResult: 最後一層完整完成的搜尋結果
+        """
+        start = time.perf_counter()
+        max_depth = depth if depth else (MAX_PLY if time_ms else DEFAULT_DEPTH)
+        self._deadline = start + time_ms / 1000 if time_ms else None
+        self.nodes = 0
+        self.stopped = False
+        self._can_stop = False
+        if generation is None:
+            self.tt.new_search()
+        else:
+            self.tt.set_generation(generation)
+        for killers in self.killers:
+            killers[0] = killers[1] = 0
+        history = self.history
+        for i, value in enumerate(history):
+            if value:
+                history[i] = value >> 2
+
+        result = SearchResult(None, -MATE, [], 0, 0, 0.0)
+        score = 0
+        for d in range(1, max_depth + 1):
+            try:
+                if d >= 3 and abs(score) < MATE_BOUND:
+                    alpha, beta = score - ASPIRATION_WINDOW, score + ASPIRATION_WINDOW
+                    score = self._negamax(board, d, alpha, beta, 0)
+                    if score <= alpha or score >= beta:
+                        score = self._negamax(board, d, -INFINITY, INFINITY, 0)
+                else:
+                    score = self._negamax(board, d, -INFINITY, INFINITY, 0)
+            except _SearchTimeout:
+                break
+            pv = list(self._pv[0])
+            elapsed = time.perf_counter() - start
+            result = SearchResult(
+                best_move=to_positions(pv[0]) if pv else None,
+                score=score,
+                pv=[to_positions(m) for m in pv],
+                depth=d,
+                nodes=self.nodes,
+                seconds=elapsed,
+                pv_codes=pv,
+            )
+            self._can_stop = True
+            if on_iteration:
+                on_iteration(result)
+            if not pv or abs(score) > MATE_BOUND:
+                break
+            # 剩餘時間不夠再完成一層時提早結束
+            if self._deadline and time.perf_counter() + elapsed > self._deadline:
+                break
+        result.nodes = self.nodes
+        result.seconds = time.perf_counter() - start
+        return result
+
+    # ------------------------------------------------------------------
+    # 搜尋核心
+    # ------------------------------------------------------------------
+    def _check_time(self) -> None:
+        if not self._can_stop:
+            return
+        if self.stopped or (self._deadline and time.perf_counter() > self._deadline):
+            raise _SearchTimeout()
+
+    def _evaluate(self, board: ChineseChessBoard) -> int:
+        score = evaluate(board)
+        return -score if board.side else score
+
+    def _negamax(self, board: ChineseChessBoard, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if not self.nodes & 1023:
+            self._check_time()
+        self._pv[ply] = []
+        if depth <= 0:
+            return self._quiesce(board, alpha, beta, ply)
+        if ply >= MAX_PLY:
+            return self._evaluate(board)
+
+        key = board.zobrist
+        tt_move = 0
+        entry = self.tt.probe(key)
+        if entry is not None:
+            tt_move, tt_score, tt_depth, tt_flag = entry
+            if ply and tt_depth >= depth:
+                tt_score = _score_from_tt(tt_score, ply)
+                if tt_flag == EXACT:
+                    return tt_score
+                if tt_flag == LOWER and tt_score >= beta:
+                    return tt_score
+                if tt_flag == UPPER and tt_score <= alpha:
+                    return tt_score
+
+        moves = board.generate_legal_move_codes(board.side)
+        if not moves:
+            # 被將死或困斃皆判負
+            return -(MATE - ply)
+        if board.is_in_check(board.side):
+            # 被將軍時延伸一層，避免殺棋落在搜尋邊界外
+            depth += 1
+        self._order_moves(board, moves, tt_move, ply)
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = 0
+        pv = self._pv
+        for move in moves:
+            captured = board.make_move(move).captured
+            try:
+                if captured & TYPE_MASK == GENERAL:
+                    # 沒有子局面，清掉上一個兄弟節點留下的變例
+                    pv[ply + 1] = []
+                    score = MATE - ply - 1
+                else:
+                    score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move()
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    pv[ply] = [move] + pv[ply + 1]
+                    if score >= beta:
+                        if not captured:
+                            self._record_cutoff(move, depth, ply)
+                        break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, best_move, _score_to_tt(best_score, ply), depth, flag)
+        return best_score
+
+    def _quiesce(self, board: ChineseChessBoard, alpha: int, beta: int, ply: int) -> int:
+        """只搜尋吃子走法，避免在交換途中停下評估"""
+        self.nodes += 1
+        if not self.nodes & 1023:
+            self._check_time()
+        stand_pat = -board.score if board.side else board.score
+        # 增量維護的子力與位置分已遠離視窗時，不必再算需要掃描盤面的機動性與將帥安全
+        if alpha - POSITIONAL_MARGIN < stand_pat < beta + POSITIONAL_MARGIN:
+            stand_pat = self._evaluate(board)
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+        cells = board.cells
+        captures = [m for m in board.generate_legal_move_codes(board.side) if cells[m & 0xFF]]
+        captures.sort(key=lambda m: _ORDER_VALUES[cells[m & 0xFF] & TYPE_MASK] * 16
+                      - _ORDER_VALUES[cells[m >> 8] & TYPE_MASK], reverse=True)
+        for move in captures:
+            captured = board.make_move(move).captured
+            try:
+                if captured & TYPE_MASK == GENERAL:
+                    score = MATE - ply - 1
+                else:
+                    score = -self._quiesce(board, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def _order_moves(self, board: ChineseChessBoard, moves: List[int], tt_move: int, ply: int) -> None:
+        cells = board.cells
+        killer1, killer2 = self.killers[ply]
+        history = self.history
+
+        def score(move: int) -> int:
+            if move == tt_move:
+                return _TT_MOVE_SCORE
+            victim = cells[move & 0xFF]
+            if victim:
+                return (_CAPTURE_SCORE + _ORDER_VALUES[victim & TYPE_MASK] * 16
+                        - _ORDER_VALUES[cells[move >> 8] & TYPE_MASK])
+            if move == killer1:
+                return _KILLER_SCORE
+            if move == killer2:
+                return _KILLER_SCORE - 1
+            return history[move]
+
+        moves.sort(key=score, reverse=True)
+
+    def _record_cutoff(self, move: int, depth: int, ply: int) -> None:
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        self.history[move] = min(self.history[move] + depth * depth, _KILLER_SCORE - 2)
+
+
+def search(
+    board: ChineseChessBoard,
+    depth: Optional[int] = None,
+    time_ms: Optional[int] = None,
+    tt: Optional[TranspositionTable] = None,
+    book: Optional["OpeningBook"] = None,
+) -> SearchResult:
+    """
+    以新的 Searcher 搜尋目前盤面（可傳入置換表以跨次搜尋重用）
+
+    傳入開局庫時，盤面在書中就直接回傳書中 weight 最大的走法（depth 為 0，不搜尋）
+    """
+    if book is not None:
+        move = book.choose(board)
+        if move:
+            return SearchResult(to_positions(move), 0, [to_positions(move)], 0, 0, 0.0, [move])
+    return Searcher(tt=tt).search(board, depth=depth, time_ms=time_ms)
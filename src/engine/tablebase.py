@@ -0,0 +1,475 @@
+"""
+殘局庫：以倒推分析（retrograde analysis）計算少子殘局的勝和負與距殺步數（DTM，以半步計）
+
+子力組合以 FEN 字母表示，紅方在前，例如 "KRvKA"（帥俥對將士）。
+每個棋子依兵種可能出現的格子編號，局面索引為各棋子格子編號的混合進位數再乘上走棋方。
+
+檔案格式：40 bytes 檔頭（magic、子力組合、每局面 bits 數、局面數），之後為 bit-packed 的局面代碼：
+0 = 和棋，1 = 不合法局面，其餘為 DTM + 2；DTM 為偶數表示走棋方負、奇數表示走棋方勝。
+無合法走法在象棋中判負，因此被將死與困斃的 DTM 都是 0。
+"""
+
+import mmap
+import multiprocessing
+import os
+import struct
+import tempfile
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.chinesechess import (
+    BLACK_FLAG, BOARD_SIZE, ELEPHANT, GENERAL, GUARD, ON_BOARD, ChineseChessBoard, _ELEPHANT_JUMPS,
+    _FEN_CODES, _FEN_LETTERS, _GUARD_STEPS, _PALACE, INITIAL_POSITION, TYPE_MASK, piece_code, square_of,
+)
+
+MAGIC = b"XQTB1\0\0\0"
+_HEADER = struct.Struct("<8s16sB7xQ")
+SUFFIX = ".xqtb"
+
+DRAW_CODE = 0
+INVALID_CODE = 1
+WIN, DRAW, LOSS = 1, 0, -1
+
+# 子力組合內每方棋子的排列順序
+_ORDER = "KRCNABP"
+_NONE = 0xFFFF
+# 從暫存檔讀回子局面邊時每批的邊數
+_EDGE_BLOCK = 1 << 16
+
+
+def _reachable(code: int) -> Tuple[int, ...]:
+    """兵種可能出現的格子：將帥限九宮，士、象限從開局位置走得到的格子，其餘為全盤"""
+    side = 1 if code & BLACK_FLAG else 0
+    kind = code & TYPE_MASK
+    if kind == GENERAL:
+        return tuple(sq for sq in ON_BOARD if _PALACE[side][sq])
+    if kind not in (GUARD, ELEPHANT):
+        return ON_BOARD
+    frontier = [square_of(pos) for pt, color, pos in INITIAL_POSITION if piece_code(pt, color) == code]
+    seen = set(frontier)
+    while frontier:
+        sq = frontier.pop()
+        targets = _GUARD_STEPS[side][sq] if kind == GUARD else [t for t, _ in _ELEPHANT_JUMPS[side][sq]]
+        for t in targets:
+            if t not in seen:
+                seen.add(t)
+                frontier.append(t)
+    return tuple(sorted(seen))
+
+
+def normalize_material(material: str) -> str:
+    """'KR vs KA'、'kr-ka' 等寫法統一為 'KRvKA'，棋子依 K R C N A B P 排序"""
+    text = material.replace(" ", "").replace("-", "v").replace("VS", "v").replace("vs", "v")
+    sides = text.split("v")
+    if len(sides) != 2:
+        raise ValueError(f"Material must look like 'KRvKA': {material!r}")
+    names = []
+    for letters in sides:
+        letters = letters.upper().replace("E", "B").replace("H", "N")
+        if letters.count("K") != 1 or any(ch not in _ORDER for ch in letters):
+            raise ValueError(f"Each side needs exactly one K and only KRCNABP pieces: {material!r}")
+        names.append("".join(sorted(letters, key=_ORDER.index)))
+    return "v".join(names)
+
+
+class _Layout:
+    """子力組合的索引方式：每個棋子一個 slot，記錄棋子代碼、可能的格子與權重"""
+
+    def __init__(self, material: str):
+        self.material = normalize_material(material)
+        red, black = self.material.split("v")
+        self.codes = [_FEN_CODES[ch] for ch in red] + [_FEN_CODES[ch.lower()] for ch in black]
+        self.squares = [_reachable(code) for code in self.codes]
+        self.square_index = []
+        for squares in self.squares:
+            lookup = [-1] * BOARD_SIZE
+            for i, sq in enumerate(squares):
+                lookup[sq] = i
+            self.square_index.append(lookup)
+        self.weights = [0] * len(self.codes)
+        weight = 2
+        for k in range(len(self.codes) - 1, -1, -1):
+            self.weights[k] = weight
+            weight *= len(self.squares[k])
+        self.size = weight
+
+    def subset(self, slot: int) -> str:
+        """移除某個 slot 的棋子後的子力組合名稱"""
+        red, black = self.material.split("v")
+        letter = _FEN_LETTERS[self.codes[slot]].upper()
+        if self.codes[slot] & BLACK_FLAG:
+            black = black.replace(letter, "", 1)
+        else:
+            red = red.replace(letter, "", 1)
+        return f"{red}v{black}"
+
+    def decode(self, index: int) -> Tuple[List[int], int]:
+        side = index & 1
+        index >>= 1
+        squares = [0] * len(self.codes)
+        for k in range(len(self.codes) - 1, -1, -1):
+            index, i = divmod(index, len(self.squares[k]))
+            squares[k] = self.squares[k][i]
+        return squares, side
+
+    def encode(self, squares: List[int], side: int) -> int:
+        index = side
+        for k, sq in enumerate(squares):
+            index += self.square_index[k][sq] * self.weights[k]
+        return index
+
+    def index_of(self, board: ChineseChessBoard) -> Optional[int]:
+        """盤面子力與本組合相同時回傳索引，否則回傳 None"""
+        cells = board.cells
+        if len(board.piece_squares[0]) + len(board.piece_squares[1]) != len(self.codes):
+            return None
+        available = sorted(board.piece_squares[0] + board.piece_squares[1])
+        squares = []
+        for k, code in enumerate(self.codes):
+            for sq in available:
+                if cells[sq] == code and self.square_index[k][sq] >= 0:
+                    available.remove(sq)
+                    squares.append(sq)
+                    break
+            else:
+                return None
+        return self.encode(squares, board.side)
+
+
+# ---------------------------------------------------------------------------
+# Bit-packed 代碼讀寫：每 8 個代碼剛好佔 bits 個 bytes
+# ---------------------------------------------------------------------------
+def _pack_codes(codes: array, bits: int) -> bytes:
+    out = bytearray()
+    for start in range(0, len(codes), 8):
+        value = 0
+        for j, code in enumerate(codes[start:start + 8]):
+            value |= code << (j * bits)
+        out += value.to_bytes(bits, "little")
+    # 讀取時一次取 3 bytes，尾端補零避免越界
+    return bytes(out) + bytes(3)
+
+
+def _code_at(data, offset: int, bits: int, index: int) -> int:
+    bit = (index & 7) * bits
+    start = offset + (index >> 3) * bits + (bit >> 3)
+    return (int.from_bytes(data[start:start + 3], "little") >> (bit & 7)) & ((1 << bits) - 1)
+
+
+def _write_table(path: str, material: str, codes: array) -> None:
+    bits = max(1, max(codes, default=0).bit_length())
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, material.encode("ascii"), bits, len(codes)))
+        f.write(_pack_codes(codes, bits))
+
+
+def _read_codes(path: str) -> Tuple[str, array]:
+    with Tablebase(path) as table:
+        return table.material, array("H", (table.code_at(i) for i in range(table.count)))
+
+
+# ---------------------------------------------------------------------------
+# 正向掃描（可由多個行程分段執行）
+# ---------------------------------------------------------------------------
+_forward_layout: Optional[_Layout] = None
+_forward_subsets: Dict[str, Tuple[_Layout, array]] = {}
+
+
+def _init_forward(material: str, subsets: Dict[str, array]) -> None:
+    global _forward_layout, _forward_subsets
+    _forward_layout = _Layout(material)
+    _forward_subsets = {name: (_Layout(name), codes) for name, codes in subsets.items()}
+
+
+def _forward_chunk(bounds: Tuple[int, int]):
+    """
+    對 [start, end) 的每個局面產生合法走法，回傳：
+    valid 旗標、同組合子局面數與索引、吃子後落入子集的結果（可取勝的最小 DTM、是否可和、會輸的最大 DTM，0 表示沒有）
+    """
+    start, end = bounds
+    layout = _forward_layout
+    subsets = _forward_subsets
+    codes = layout.codes
+    lookups = layout.square_index
+    weights = layout.weights
+    board = ChineseChessBoard()
+    valid = bytearray(end - start)
+    counts = array("H", bytes(2 * (end - start)))
+    children = array("I")
+    capture_win = array("H", [_NONE]) * (end - start)
+    capture_draw = bytearray(end - start)
+    capture_loss = array("H", bytes(2 * (end - start)))
+    for offset, index in enumerate(range(start, end)):
+        squares, side = layout.decode(index)
+        if len(set(squares)) != len(squares):
+            continue
+        board.clear()
+        for code, sq in zip(codes, squares):
+            board._put(sq, code)
+        board._set_side(side)
+        # 對方將帥正被攻擊的局面無法由合法走法到達
+        if board._general_attacked(1 - side):
+            continue
+        valid[offset] = 1
+        slot_of = {sq: k for k, sq in enumerate(squares)}
+        base = index - side
+        count = 0
+        for move in board.generate_legal_move_codes(side):
+            from_sq, to_sq = move >> 8, move & 0xFF
+            k = slot_of[from_sq]
+            if board.cells[to_sq]:
+                captured = slot_of[to_sq]
+                name = layout.subset(captured)
+                sub_layout, sub_codes = subsets[name]
+                child_squares = [to_sq if j == k else sq for j, sq in enumerate(squares) if j != captured]
+                code = sub_codes[sub_layout.encode(child_squares, 1 - side)]
+                # 子局面 DTM 為 code - 2，經由這步為 code - 1
+                if code == DRAW_CODE:
+                    capture_draw[offset] = 1
+                elif code & 1:
+                    # 子局面 DTM 為奇數：對方勝
+                    capture_loss[offset] = max(capture_loss[offset], code - 1)
+                else:
+                    capture_win[offset] = min(capture_win[offset], code - 1)
+                continue
+            child = base - lookups[k][from_sq] * weights[k] + lookups[k][to_sq] * weights[k] + (1 - side)
+            children.append(child)
+            count += 1
+        counts[offset] = count
+    return start, bytes(valid), counts, children, capture_win, bytes(capture_draw), capture_loss
+
+
+def _chunks(size: int, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    for start in range(0, size, chunk_size):
+        yield start, min(size, start + chunk_size)
+
+
+def _read_blocks(f) -> Iterator[array]:
+    """由檔案開頭依序讀出 _EDGE_BLOCK 個一批的邊"""
+    f.seek(0)
+    while True:
+        block = array("I", f.read(4 * _EDGE_BLOCK))
+        if not block:
+            return
+        yield block
+
+
+def _solve(material: str, subsets: Dict[str, array], workers: int, chunk_size: int, scratch: str) -> array:
+    """
+    倒推求解一個子力組合
+
+    局面相關的陣列常駐記憶體（倒推時每局面 15 bytes，加上每筆 4 bytes 的 buckets，合計約 20 bytes）；
+    正向掃描的子局面邊逐段寫入 scratch 目錄的暫存檔，反向邊也寫在暫存檔並以 mmap 讀取，
+    因此邊的數量不佔常駐記憶體，每段只需暫存 chunk_size 個局面的邊。
+    """
+    layout = _Layout(material)
+    size = layout.size
+    valid = bytearray(size)
+    counts = array("H", bytes(2 * size))
+    capture_win = array("H", [_NONE]) * size
+    capture_draw = bytearray(size)
+    capture_loss = array("H", bytes(2 * size))
+    pred_start = array("I", bytes(4 * (size + 1)))
+
+    with tempfile.TemporaryFile(dir=scratch) as edge_file, tempfile.TemporaryFile(dir=scratch) as pred_file:
+        def collect(results):
+            for start, chunk_valid, chunk_counts, chunk_children, chunk_win, chunk_draw, chunk_loss in results:
+                end = start + len(chunk_valid)
+                valid[start:end] = chunk_valid
+                counts[start:end] = chunk_counts
+                capture_win[start:end] = chunk_win
+                capture_draw[start:end] = chunk_draw
+                capture_loss[start:end] = chunk_loss
+                for child in chunk_children:
+                    pred_start[child + 1] += 1
+                chunk_children.tofile(edge_file)
+
+        if workers > 1:
+            with multiprocessing.get_context().Pool(workers, _init_forward, (material, subsets)) as pool:
+                collect(pool.imap(_forward_chunk, _chunks(size, chunk_size)))
+        else:
+            _init_forward(material, subsets)
+            collect(map(_forward_chunk, _chunks(size, chunk_size)))
+
+        # 反向邊（CSR）：每個局面的前驅局面，依子局面分組寫入暫存檔
+        for i in range(size):
+            pred_start[i + 1] += pred_start[i]
+        edges = pred_start[size]
+        preds = array("I")
+        mapped = None
+        if edges:
+            pred_file.truncate(4 * edges)
+            mapped = mmap.mmap(pred_file.fileno(), 4 * edges)
+            preds = memoryview(mapped).cast("I")
+            cursor = array("I", pred_start)
+            parent = 0
+            left = counts[0]
+            for block in _read_blocks(edge_file):
+                for child in block:
+                    # 邊依父局面順序寫入，counts 為每個父局面的邊數
+                    while not left:
+                        parent += 1
+                        left = counts[parent]
+                    preds[cursor[child]] = parent
+                    cursor[child] += 1
+                    left -= 1
+            del cursor
+        edge_file.truncate(0)
+
+        try:
+            dtm = _retrograde(size, valid, counts, capture_win, capture_draw, capture_loss, pred_start, preds)
+        finally:
+            if mapped is not None:
+                preds.release()
+                mapped.close()
+
+    # 直接把 DTM 陣列改寫成檔案代碼，不再配置新陣列
+    for position in range(size):
+        if not valid[position]:
+            dtm[position] = INVALID_CODE
+        elif dtm[position] == _NONE:
+            dtm[position] = DRAW_CODE
+        else:
+            dtm[position] += 2
+    return dtm
+
+
+def _retrograde(size, valid, counts, capture_win, capture_draw, capture_loss, pred_start, preds) -> array:
+    """依 DTM 由小到大逐層倒推，回傳每個局面的 DTM（_NONE 為和棋或不合法）"""
+    # buckets[d] 為暫定 DTM 為 d 的局面
+    dtm = array("H", [_NONE]) * size
+    done = bytearray(size)
+    remaining = counts
+    buckets: Dict[int, array] = {}
+
+    def assign(position: int, value: int) -> None:
+        dtm[position] = value
+        bucket = buckets.get(value)
+        if bucket is None:
+            bucket = buckets[value] = array("I")
+        bucket.append(position)
+
+    for position in range(size):
+        if not valid[position]:
+            continue
+        if capture_win[position] != _NONE:
+            assign(position, capture_win[position])
+        elif not remaining[position] and not capture_draw[position]:
+            # 沒有走法（DTM 0）或只有會讓對方勝的吃子
+            assign(position, capture_loss[position])
+
+    level = 0
+    while buckets:
+        for position in buckets.pop(level, ()):
+            if done[position] or dtm[position] != level:
+                continue
+            done[position] = 1
+            for e in range(pred_start[position], pred_start[position + 1]):
+                parent = preds[e]
+                if done[parent]:
+                    continue
+                if not level & 1:
+                    # 子局面走棋方負：前驅可走到這裡取勝
+                    if dtm[parent] == _NONE or dtm[parent] > level + 1:
+                        assign(parent, level + 1)
+                else:
+                    remaining[parent] -= 1
+                    if not remaining[parent] and dtm[parent] == _NONE and not capture_draw[parent]:
+                        assign(parent, max(capture_loss[parent], level + 1))
+        level += 1
+    return dtm
+
+
+def generate_tablebase(material: str, directory: str, workers: int = 1, chunk_size: int = 8192) -> List[str]:
+    """
+    產生子力組合及其所有子集（吃子後的組合）的殘局庫檔案
+
+    已存在於 directory 的子集檔案直接讀取；正向掃描以 chunk_size 個局面為單位分給 workers 個行程。
+    子局面邊與反向邊存放在 directory 的暫存檔，常駐記憶體約為每局面 20 bytes，
+    另加已求解子集每局面 2 bytes 的代碼；暫存檔約為每條邊 8 bytes。
+
+    Returns:
+        List[str]: 本次寫出的檔案路徑（子集在前）
+    """
+    material = normalize_material(material)
+    os.makedirs(directory, exist_ok=True)
+    written: List[str] = []
+    solved: Dict[str, array] = {}
+
+    def build(name: str) -> array:
+        if name in solved:
+            return solved[name]
+        path = os.path.join(directory, name + SUFFIX)
+        if os.path.exists(path):
+            solved[name] = _read_codes(path)[1]
+            return solved[name]
+        layout = _Layout(name)
+        subsets = {}
+        for slot, code in enumerate(layout.codes):
+            if code & TYPE_MASK != GENERAL:
+                sub = layout.subset(slot)
+                subsets[sub] = build(sub)
+        codes = _solve(name, subsets, workers, chunk_size, directory)
+        _write_table(path, name, codes)
+        written.append(path)
+        solved[name] = codes
+        return codes
+
+    build(material)
+    return written
+
+
+class Tablebase:
+    """以 mmap 讀取的殘局庫，probe 只需計算索引並讀取幾個 bytes"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._mm = None
+        size = os.fstat(self._file.fileno()).st_size
+        if size < _HEADER.size:
+            self.close()
+            raise ValueError(f"Not a tablebase file: {path}")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, material, bits, count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or not 1 <= bits <= 16:
+            self.close()
+            raise ValueError(f"Not a tablebase file: {path}")
+        self.material = material.rstrip(b"\0").decode("ascii")
+        self.bits = bits
+        self.count = count
+        self._layout = _Layout(self.material)
+        if self._layout.size != count:
+            self.close()
+            raise ValueError(f"Tablebase size does not match material {self.material}")
+
+    def __enter__(self) -> "Tablebase":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def code_at(self, index: int) -> int:
+        return _code_at(self._mm, _HEADER.size, self.bits, index)
+
+    def probe(self, board: ChineseChessBoard) -> Optional[Tuple[int, int]]:
+        """
+        回傳走棋方角度的 (WIN/DRAW/LOSS, DTM)
+
+        盤面子力與本殘局庫不同，或局面不合法（對方將帥正被攻擊）時回傳 None
+        """
+        index = self._layout.index_of(board)
+        if index is None:
+            return None
+        code = self.code_at(index)
+        if code == INVALID_CODE:
+            return None
+        if code == DRAW_CODE:
+            return DRAW, 0
+        dtm = code - 2
+        return (WIN if dtm & 1 else LOSS), dtm
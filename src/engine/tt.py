@@ -0,0 +1,87 @@
+import struct
+from typing import Optional, Tuple
+
+# 每個 entry 16 bytes：(key ^ data, data)，兩個 uint64
+# data = move(16) | score(16) | depth(8) | flag(8) | generation(8)
+# 以 key ^ data 驗證，多行程共用記憶體時被寫到一半的 entry 會被視為未命中
+_ENTRY = struct.Struct("<QQ")
+ENTRY_SIZE = _ENTRY.size
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+def _pack(move: int, score: int, depth: int, flag: int, generation: int) -> int:
+    return (move & 0xFFFF) | (score & 0xFFFF) << 16 | (depth & 0xFF) << 32 | flag << 40 | (generation & 0xFF) << 48
+
+
+class TranspositionTable:
+    """
+    固定大小的置換表，採 replace-by-depth 取代策略
+    資料存放在單一可寫入的 buffer（bytearray 或共享記憶體）中
+    """
+
+    def __init__(self, size_mb: float = 16, buffer=None):
+        if buffer is None:
+            buffer = bytearray(self.buffer_size(size_mb))
+        entries = len(buffer) // ENTRY_SIZE
+        if not entries or entries & (entries - 1):
+            raise ValueError("Transposition table buffer must hold a power-of-two number of entries")
+        self.buffer = buffer
+        self.entries = entries
+        self._mask = entries - 1
+        # generation 介於 1..255，確保已寫入的 data 不為 0
+        self.generation = 1
+
+    @staticmethod
+    def buffer_size(size_mb: float) -> int:
+        """給定 MB 數時實際使用的 buffer 大小（entry 數取 2 的次方，索引時用 & 取代 %）"""
+        entries = max(1, int(size_mb * 1024 * 1024) // ENTRY_SIZE)
+        return (1 << (entries.bit_length() - 1)) * ENTRY_SIZE
+
+    def new_search(self) -> None:
+        """每次新的搜尋開始時呼叫，讓舊資料在取代時優先被覆蓋"""
+        self.generation = self.generation % 255 + 1
+
+    def set_generation(self, generation: int) -> None:
+        """直接指定 generation（不前進），共享同一個置換表的多個搜尋以此使用相同的 generation"""
+        if not 1 <= generation <= 255:
+            raise ValueError("generation must be between 1 and 255")
+        self.generation = generation
+
+    def clear(self) -> None:
+        self.buffer[:] = bytes(len(self.buffer))
+        self.generation = 1
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, int]]:
+        """回傳 (move, score, depth, flag)，未命中回傳 None"""
+        check, data = _ENTRY.unpack_from(self.buffer, (key & self._mask) * ENTRY_SIZE)
+        if check ^ data != key or not data:
+            return None
+        score = (data >> 16) & 0xFFFF
+        if score >= 0x8000:
+            score -= 0x10000
+        return data & 0xFFFF, score, (data >> 32) & 0xFF, (data >> 40) & 0xFF
+
+    def store(self, key: int, move: int, score: int, depth: int, flag: int) -> None:
+        offset = (key & self._mask) * ENTRY_SIZE
+        check, data = _ENTRY.unpack_from(self.buffer, offset)
+        if data:
+            same_position = check ^ data == key
+            stale = (data >> 48) & 0xFF != self.generation
+            if not stale and depth < (data >> 32) & 0xFF:
+                return
+            if same_position and not move:
+                # 保留原本的最佳走法
+                move = data & 0xFFFF
+        data = _pack(move, score, depth, flag, self.generation)
+        _ENTRY.pack_into(self.buffer, offset, key ^ data, data)
+
+    def usage(self, sample: int = 1000) -> float:
+        """取樣估計本次搜尋寫入的 entry 比例"""
+        sample = min(sample, self.entries)
+        used = 0
+        for i in range(sample):
+            _, data = _ENTRY.unpack_from(self.buffer, i * ENTRY_SIZE)
+            if data and (data >> 48) & 0xFF == self.generation:
+                used += 1
+        return used / sample
@@ -0,0 +1,303 @@
+"""
+UCCI 協定引擎
+
+以 asyncio 讀取 stdin 的指令，搜尋在背景執行緒進行，因此 isready 與 stop 可以立即回應；
+stop 直接以最後一層完成的結果回覆 bestmove，不等搜尋執行緒結束。
+go ponder / go infinite 的結果會保留到 ponderhit 或 stop 才輸出。
+
+執行：python -m src.engine.ucci
+"""
+
+import asyncio
+import sys
+import threading
+from typing import Callable, List, Optional
+
+from src.chinesechess import INITIAL_FEN, ChineseChessBoard, iccs_to_move, move_to_iccs
+from src.engine.book import OpeningBook
+from src.engine.search import MAX_PLY, SearchResult, Searcher
+from src.engine.tt import TranspositionTable
+
+ENGINE_NAME = "ChineseChess"
+DEFAULT_HASH_MB = 16
+# 未指定 movestogo 時假設剩餘的步數
+DEFAULT_MOVES_TO_GO = 30
+
+
+class _SearchJob:
+    """一次 go 指令對應的背景搜尋"""
+
+    def __init__(self, searcher: Searcher, pondering: bool, infinite: bool, time_ms: Optional[int]):
+        self.searcher = searcher
+        self.pondering = pondering
+        self.infinite = infinite
+        self.time_ms = time_ms
+        self.latest: Optional[SearchResult] = None
+        self.finished = False
+        self.reported = False
+        self.thread: Optional[threading.Thread] = None
+
+
+class UcciEngine:
+    """
+    UCCI 指令處理
+
+    handle() 在讀取指令的執行緒中同步處理一行指令，輸出經由 write 送出（需為執行緒安全），
+    方便在測試中不經 stdin 直接驅動。
+    """
+
+    def __init__(self, write: Callable[[str], None] = print):
+        self._write = write
+        self._lock = threading.Lock()
+        self.board = ChineseChessBoard.from_fen(INITIAL_FEN)
+        self.tt = TranspositionTable(DEFAULT_HASH_MB)
+        self.book: Optional[OpeningBook] = None
+        self.use_book = True
+        self._job: Optional[_SearchJob] = None
+
+    # ------------------------------------------------------------------
+    # 指令分派
+    # ------------------------------------------------------------------
+    def handle(self, line: str) -> bool:
+        """處理一行指令，收到 quit 時回傳 False"""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == "ucci":
+            self._write(f"id name {ENGINE_NAME}")
+            self._write("id author AI-100x-SE-Join-Quest")
+            self._write(f"option hashsize type spin min 1 max 1024 default {DEFAULT_HASH_MB}")
+            self._write("option usebook type check default true")
+            self._write("option bookfiles type string default <empty>")
+            self._write("option ponder type check default true")
+            self._write("ucciok")
+        elif command == "isready":
+            self._write("readyok")
+        elif command == "setoption":
+            self._setoption(args)
+        elif command == "position":
+            self._finish_job()
+            self._position(args)
+        elif command == "go":
+            self._finish_job()
+            self._go(args)
+        elif command == "ponderhit":
+            self._ponderhit()
+        elif command == "stop":
+            self._stop()
+        elif command == "quit":
+            self._finish_job()
+            if self.book is not None:
+                self.book.close()
+            self._write("bye")
+            return False
+        return True
+
+    def _setoption(self, args: List[str]) -> None:
+        if args and args[0] == "name":
+            args = args[1:]
+        if "value" in args:
+            args.remove("value")
+        if not args:
+            return
+        name, value = args[0].lower(), " ".join(args[1:])
+        if name == "hashsize" and value.isdigit():
+            self.tt = TranspositionTable(max(1, int(value)))
+        elif name == "usebook":
+            self.use_book = value.lower() in ("true", "on", "1")
+        elif name == "bookfiles":
+            if self.book is not None:
+                self.book.close()
+                self.book = None
+            if value and value != "<empty>":
+                try:
+                    self.book = OpeningBook(value)
+                except (OSError, ValueError) as e:
+                    self._write(f"info string cannot open book {value}: {e}")
+
+    def _position(self, args: List[str]) -> None:
+        """position {fen <FEN> | startpos} [moves <m1> ...]"""
+        moves: List[str] = []
+        if "moves" in args:
+            split = args.index("moves")
+            args, moves = args[:split], args[split + 1:]
+        fen = INITIAL_FEN if not args or args[0] == "startpos" else " ".join(args[1:])
+        try:
+            self.board.set_fen(fen)
+        except ValueError as e:
+            self._write(f"info string {e}")
+            self.board.set_fen(INITIAL_FEN)
+            return
+        for text in moves:
+            try:
+                move = iccs_to_move(text)
+            except ValueError:
+                move = 0
+            if move not in self.board.generate_legal_move_codes(self.board.side):
+                self._write(f"info string illegal move {text}")
+                return
+            self.board.make_move(move)
+
+    # ------------------------------------------------------------------
+    # 搜尋
+    # ------------------------------------------------------------------
+    def _go(self, args: List[str]) -> None:
+        """go [ponder | infinite] [depth <d>] [time <ms> [movestogo <n>] [increment <ms>]]"""
+        options = {}
+        flags = set()
+        i = 0
+        while i < len(args):
+            if args[i] in ("ponder", "infinite", "draw"):
+                flags.add(args[i])
+                i += 1
+            elif i + 1 < len(args) and args[i + 1].lstrip("-").isdigit():
+                options[args[i]] = int(args[i + 1])
+                i += 2
+            else:
+                i += 1
+        time_ms = None
+        if "time" in options:
+            moves_to_go = options.get("movestogo") or DEFAULT_MOVES_TO_GO
+            time_ms = max(1, options["time"] // moves_to_go + options.get("increment", 0) // 2)
+        depth = options.get("depth")
+        infinite = "infinite" in flags or (depth is None and time_ms is None)
+        pondering = "ponder" in flags
+
+        if self.use_book and self.book is not None and not pondering:
+            move = self.book.choose(self.board)
+            if move:
+                self._write(f"bestmove {move_to_iccs(move)}")
+                return
+
+        searcher = Searcher(tt=self.tt)
+        job = _SearchJob(searcher, pondering, infinite and not pondering, time_ms)
+        board = self.board.copy()
+        # ponder 與 infinite 不限時間與深度，直到 ponderhit 或 stop
+        search_depth = depth or (MAX_PLY if pondering or infinite else None)
+        search_time = None if pondering else time_ms
+        job.thread = threading.Thread(target=self._run, args=(job, board, search_depth, search_time), daemon=True)
+        self._job = job
+        job.thread.start()
+
+    def _run(self, job: _SearchJob, board: ChineseChessBoard, depth: Optional[int], time_ms: Optional[int]) -> None:
+        def on_iteration(result: SearchResult) -> None:
+            job.latest = result
+            if result.pv_codes:
+                self._write(
+                    f"info depth {result.depth} score {result.score} time {int(result.seconds * 1000)} "
+                    f"nodes {result.nodes} nps {int(result.nodes_per_second)} "
+                    f"pv {' '.join(move_to_iccs(m) for m in result.pv_codes)}"
+                )
+
+        result = job.searcher.search(board, depth=depth, time_ms=time_ms, on_iteration=on_iteration)
+        with self._lock:
+            job.finished = True
+            if result.pv_codes or job.latest is None:
+                job.latest = result
+            if not job.pondering and not job.infinite:
+                self._report(job)
+
+    def _report(self, job: _SearchJob) -> None:
+        """輸出 bestmove（每個 job 只輸出一次），呼叫時需持有 _lock"""
+        if job.reported:
+            return
+        job.reported = True
+        pv = job.latest.pv_codes if job.latest else []
+        if not pv:
+            self._write("nobestmove")
+        elif len(pv) > 1:
+            self._write(f"bestmove {move_to_iccs(pv[0])} ponder {move_to_iccs(pv[1])}")
+        else:
+            self._write(f"bestmove {move_to_iccs(pv[0])}")
+
+    def _ponderhit(self) -> None:
+        """對手走了預測的那步：改為一般搜尋，以 go 指令的時間限制從現在起計時"""
+        with self._lock:
+            job = self._job
+            if job is None or not job.pondering:
+                return
+            job.pondering = False
+            if job.finished:
+                self._report(job)
+            elif job.time_ms:
+                job.searcher.set_time_limit(job.time_ms)
+
+    def _stop(self) -> None:
+        job = self._job
+        if job is None:
+            return
+        job.searcher.stop()
+        with self._lock:
+            if job.latest is not None:
+                job.pondering = job.infinite = False
+                self._report(job)
+                return
+        # 第一層還沒完成：等到有走法為止（search 開始時會清除停止旗標，因此重複設定）
+        while job.thread.is_alive() and job.latest is None:
+            job.searcher.stop()
+            job.thread.join(0.001)
+        with self._lock:
+            job.pondering = job.infinite = False
+            self._report(job)
+
+    def _finish_job(self) -> None:
+        """新指令前結束上一次搜尋；尚未回報的結果直接捨棄"""
+        job = self._job
+        if job is None:
+            return
+        with self._lock:
+            job.reported = True
+        while job.thread.is_alive():
+            job.searcher.stop()
+            job.thread.join(0.001)
+        self._job = None
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """等待背景搜尋結束（測試用）"""
+        if self._job is not None and self._job.thread is not None:
+            self._job.thread.join(timeout)
+
+
+async def _read_lines(loop: asyncio.AbstractEventLoop):
+    """以 asyncio 讀取 stdin；stdin 不是 pipe 時改用執行緒池逐行讀取"""
+    reader = asyncio.StreamReader()
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    except (ValueError, OSError):
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                return
+            yield line
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        yield line.decode("utf-8", errors="replace")
+
+
+async def serve() -> None:
+    write_lock = threading.Lock()
+
+    def write(text: str) -> None:
+        with write_lock:
+            sys.stdout.write(text + "\n")
+            sys.stdout.flush()
+
+    engine = UcciEngine(write)
+    loop = asyncio.get_running_loop()
+    async for line in _read_lines(loop):
+        if not engine.handle(line):
+            return
+    engine.handle("quit")
+
+
+def main() -> None:
+    # 縮短 GIL 切換間隔，讓搜尋執行緒忙碌時讀取指令的執行緒也能很快取得執行權
+    sys.setswitchinterval(0.0005)
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
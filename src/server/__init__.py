@@ -0,0 +1 @@
+# Asyncio game server built on the Chinese chess rules module
@@ -0,0 +1,395 @@
+"""
+多局對弈伺服器（asyncio）
+
+單一行程以一個事件迴圈管理大量對局，不再每局一個執行緒。協定為每行一個 JSON 的 TCP 連線：
+
+    {"op": "new", "fen": "..."}                   -> {"ok": true, "session": 1, "fen": "...", "ply": 0, "result": null}
+    {"op": "move", "session": 1, "move": "h2e2"}  -> {"ok": true, "fen": "...", "ply": 1, "result": null}
+    {"op": "state", "session": 1}                 -> {"ok": true, "fen": "...", "ply": 1, "result": null}
+    {"op": "close", "session": 1}                 -> {"ok": true}
+
+請求可附帶 "id"，回應會原樣帶回；錯誤時回應 {"ok": false, "error": "..."}。
+
+每局只保存 32 bytes 的局面編碼、步數與結果；處理走法時還原到共用的暫存棋盤
+（事件迴圈單執行緒，同一時間只有一個請求在使用），合法性以 LegalMoveCache 判定，
+熱門局面在各局之間共用快取。
+
+有變動的對局累積在 dirty 集合中，由背景工作定期整批以固定長度的紀錄附加到快照檔
+（寫檔在執行緒池進行，不阻塞事件迴圈），重新啟動時依序讀回、後寫入者為準。
+下一個 session id 也寫入快照，已關閉的對局編號在重新啟動後不會再發給新局。
+
+背壓：
+- 每條連線依序處理請求，回應以 drain() 等待送出，客戶端不讀取時伺服器就不再讀它的請求
+- 尚未寫入快照的對局超過 max_dirty 時，走法請求先等待這一批寫完
+- 對局數達到 max_sessions 時拒絕開新局
+
+執行：python -m src.server.game_server --port 9000 --snapshot sessions.dat
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import struct
+from typing import Dict, Optional, Tuple
+
+from src.analysis.move_cache import LegalMoveCache
+from src.analysis.packing import pack, unpack
+from src.chinesechess import (
+    BLACK_FLAG, GENERAL, INITIAL_FEN, TYPE_MASK, ChineseChessBoard, iccs_to_move, move_from, move_to, position_of,
+)
+from src.engine.history import BLACK_WINS, RED_WINS
+
+DEFAULT_MAX_SESSIONS = 100_000
+DEFAULT_MAX_DIRTY = 4096
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_CACHE_CAPACITY = 1 << 18
+# 單行請求的長度上限
+MAX_LINE = 64 * 1024
+
+# 快照紀錄：session id、局面編碼、步數、狀態
+# 狀態為 NEXT_ID 的紀錄只保存下一個 session id（放在 session id 欄位）
+_RECORD = struct.Struct("<Q32sIB")
+RECORD_SIZE = _RECORD.size
+
+ONGOING, RED_WON, BLACK_WON, CLOSED, NEXT_ID = 0, 1, 2, 3, 4
+_RESULTS = {ONGOING: None, RED_WON: RED_WINS, BLACK_WON: BLACK_WINS}
+
+
+class Session:
+    """一局的精簡狀態"""
+    __slots__ = ("packed", "ply", "status")
+
+    def __init__(self, packed: bytes, ply: int = 0, status: int = ONGOING):
+        self.packed = packed
+        self.ply = ply
+        self.status = status
+
+
+def load_snapshot(path: str) -> Tuple[Dict[int, Session], int]:
+    """
+    讀回快照檔，回傳 (對局, 下一個 session id)
+
+    同一局以最後一筆紀錄為準，已關閉的對局不還原，但它的編號不會再被使用
+    """
+    sessions: Dict[int, Session] = {}
+    next_id = 1
+    if not os.path.exists(path):
+        return sessions, next_id
+    with open(path, "rb") as f:
+        data = f.read()
+    # 寫到一半就中斷的最後一筆紀錄略過
+    for session_id, packed, ply, status in _RECORD.iter_unpack(data[:len(data) - len(data) % RECORD_SIZE]):
+        if status == NEXT_ID:
+            next_id = max(next_id, session_id)
+            continue
+        next_id = max(next_id, session_id + 1)
+        if status == CLOSED:
+            sessions.pop(session_id, None)
+        else:
+            sessions[session_id] = Session(packed, ply, status)
+    return sessions, next_id
+
+
+def _append_records(path: str, records: bytes) -> None:
+    with open(path, "ab") as f:
+        size = f.tell()
+        try:
+            f.write(records)
+            f.flush()
+            os.fsync(f.fileno())
+        except OSError:
+            # 截掉寫了一半的紀錄，重試時才不會錯開紀錄邊界
+            f.truncate(size)
+            raise
+
+
+def _rewrite_snapshot(path: str, records: bytes) -> None:
+    temp = path + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(records)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+def _field(request: dict, name: str, kind: type, required: bool = True):
+    """取出請求欄位並檢查型別（bool 不當作 int）"""
+    value = request.get(name)
+    if value is None and not required:
+        return None
+    if not isinstance(value, kind) or isinstance(value, bool):
+        raise ValueError(f"Field {name!r} must be {kind.__name__}")
+    return value
+
+
+class GameServer:
+    """
+    管理所有對局的伺服器
+
+    new_session / play / state / close_session 為同步方法，可在測試中直接呼叫；
+    serve() 啟動 TCP 伺服器與快照背景工作。
+    """
+
+    def __init__(
+        self,
+        snapshot_path: Optional[str] = None,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        max_dirty: int = DEFAULT_MAX_DIRTY,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        cache_capacity: int = DEFAULT_CACHE_CAPACITY,
+    ):
+        if max_sessions < 1 or max_dirty < 1:
+            raise ValueError("max_sessions and max_dirty must be positive")
+        self.snapshot_path = snapshot_path
+        self.max_sessions = max_sessions
+        self.max_dirty = max_dirty
+        self.flush_interval = flush_interval
+        sessions, next_id = load_snapshot(snapshot_path) if snapshot_path else ({}, 1)
+        self.sessions: Dict[int, Session] = sessions
+        self._next_id = next_id
+        self.moves = 0
+        self.flushes = 0
+        self.cache = LegalMoveCache(cache_capacity, strict=True)
+        # 已寫入快照的下一個 session id
+        self._saved_next_id = self._next_id
+        self._dirty: Dict[int, Optional[Session]] = {}
+        self._board = ChineseChessBoard()
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # ------------------------------------------------------------------
+    # 對局操作
+    # ------------------------------------------------------------------
+    def new_session(self, fen: str = INITIAL_FEN) -> int:
+        if len(self.sessions) >= self.max_sessions:
+            raise ValueError("Server is full")
+        board = self._board
+        board.set_fen(fen)
+        for side in (0, 1):
+            generals = sum(1 for sq in board.piece_squares[side] if board.cells[sq] & TYPE_MASK == GENERAL)
+            if generals != 1:
+                raise ValueError("Each side must have exactly one general")
+        session_id = self._next_id
+        self._next_id += 1
+        session = self.sessions[session_id] = Session(pack(board))
+        session.status = self._status(board)
+        self._dirty[session_id] = session
+        return session_id
+
+    def play(self, session_id: int, iccs: str) -> Tuple[ChineseChessBoard, Session]:
+        """
+        驗證並執行一步 ICCS 走法，回傳暫存棋盤與對局
+
+        暫存棋盤只在下一個請求之前有效；走法不合法或對局已結束時 raise ValueError
+        """
+        session = self._session(session_id)
+        if session.status != ONGOING:
+            raise ValueError(f"Game {session_id} is over")
+        move = iccs_to_move(iccs)
+        board = unpack(session.packed, self._board)
+        cells = board.cells
+        code = cells[move_from(move)]
+        if not code or (1 if code & BLACK_FLAG else 0) != board.side:
+            raise ValueError(f"No piece of the side to move at {iccs[:2]}")
+        if not self.cache.can_move(board, position_of(move_from(move)), position_of(move_to(move))):
+            raise ValueError(f"Illegal move: {iccs}")
+        board.make_move(move)
+        session.packed = pack(board)
+        session.ply += 1
+        session.status = self._status(board)
+        self._dirty[session_id] = session
+        self.moves += 1
+        return board, session
+
+    def state(self, session_id: int) -> Tuple[ChineseChessBoard, Session]:
+        session = self._session(session_id)
+        return unpack(session.packed, self._board), session
+
+    def close_session(self, session_id: int) -> None:
+        self._session(session_id)
+        del self.sessions[session_id]
+        self._dirty[session_id] = None
+
+    def _session(self, session_id) -> Session:
+        session = self.sessions.get(session_id) if isinstance(session_id, int) else None
+        if session is None:
+            raise ValueError(f"Unknown session: {session_id}")
+        return session
+
+    @staticmethod
+    def _status(board: ChineseChessBoard) -> int:
+        """輪走方無合法走法時判負（將死與困斃相同）"""
+        if board.has_legal_move(board.side):
+            return ONGOING
+        return BLACK_WON if board.side == 0 else RED_WON
+
+    # ------------------------------------------------------------------
+    # 請求分派
+    # ------------------------------------------------------------------
+    def handle(self, request: dict) -> dict:
+        """處理一個已解析的請求，回傳回應內容（不含 id）；欄位型別錯誤時 raise ValueError"""
+        op = request.get("op")
+        if op == "new":
+            session_id = self.new_session(_field(request, "fen", str, required=False) or INITIAL_FEN)
+            board, session = self.state(session_id)
+            return {"ok": True, "session": session_id, **self._describe(board, session)}
+        if op == "move":
+            board, session = self.play(_field(request, "session", int), _field(request, "move", str))
+            return {"ok": True, **self._describe(board, session)}
+        if op == "state":
+            board, session = self.state(_field(request, "session", int))
+            return {"ok": True, **self._describe(board, session)}
+        if op == "close":
+            self.close_session(_field(request, "session", int))
+            return {"ok": True}
+        raise ValueError(f"Unknown op: {op}")
+
+    @staticmethod
+    def _describe(board: ChineseChessBoard, session: Session) -> dict:
+        return {"fen": board.to_fen(), "ply": session.ply, "result": _RESULTS[session.status]}
+
+    def respond(self, line: bytes) -> bytes:
+        """一行請求轉為一行回應"""
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+            request_id = request.get("id")
+            response = self.handle(request)
+        except (ValueError, TypeError, AttributeError, KeyError, RecursionError) as e:
+            # 任何格式錯誤的請求都回一行錯誤，不中斷連線
+            response = {"ok": False, "error": str(e)}
+        if request_id is not None:
+            response["id"] = request_id
+        return json.dumps(response, separators=(",", ":")).encode() + b"\n"
+
+    # ------------------------------------------------------------------
+    # 快照
+    # ------------------------------------------------------------------
+    @property
+    def dirty(self) -> int:
+        return len(self._dirty)
+
+    async def flush(self) -> int:
+        """把累積的變動整批附加到快照檔，回傳寫入的紀錄數"""
+        async with self._flush_lock:
+            if not self._dirty or not self.snapshot_path:
+                self._dirty.clear()
+                return 0
+            batch, self._dirty = self._dirty, {}
+            records = b"".join(
+                _RECORD.pack(session_id, b"", 0, CLOSED) if session is None
+                else _RECORD.pack(session_id, session.packed, session.ply, session.status)
+                for session_id, session in batch.items()
+            )
+            next_id = self._next_id
+            if next_id != self._saved_next_id:
+                records += _RECORD.pack(next_id, b"", 0, NEXT_ID)
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, _append_records, self.snapshot_path, records)
+            except OSError:
+                # 寫入失敗時整批放回 dirty；等待期間又有變動的對局以較新的狀態為準
+                for session_id, session in batch.items():
+                    self._dirty.setdefault(session_id, session)
+                raise
+            self._saved_next_id = next_id
+            self.flushes += 1
+            return len(batch)
+
+    async def compact(self) -> None:
+        """以目前所有對局重寫快照檔，捨棄歷史紀錄"""
+        async with self._flush_lock:
+            if not self.snapshot_path:
+                return
+            self._dirty.clear()
+            next_id = self._next_id
+            records = b"".join(
+                _RECORD.pack(session_id, session.packed, session.ply, session.status)
+                for session_id, session in self.sessions.items()
+            ) + _RECORD.pack(next_id, b"", 0, NEXT_ID)
+            await asyncio.get_running_loop().run_in_executor(None, _rewrite_snapshot, self.snapshot_path, records)
+            self._saved_next_id = next_id
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except OSError:
+                # 這一批已放回 dirty，下一輪再重試
+                continue
+
+    # ------------------------------------------------------------------
+    # TCP 伺服器
+    # ------------------------------------------------------------------
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(b'{"ok":false,"error":"Request line too long"}\n')
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                writer.write(self.respond(line))
+                await writer.drain()
+                if len(self._dirty) >= self.max_dirty:
+                    await self.flush()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+        """開始接受連線（port 為 0 時由系統指定，可由 self.port 取得）"""
+        self._server = await asyncio.start_server(self._client, host, port, limit=MAX_LINE)
+        self._flusher = asyncio.create_task(self._flush_periodically())
+        return self._server
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """停止接受連線並寫入最後一批變動"""
+        if self._flusher:
+            self._flusher.cancel()
+            self._flusher = None
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.flush()
+
+
+async def _main(args) -> None:
+    server = GameServer(args.snapshot, max_sessions=args.max_sessions, flush_interval=args.flush_interval)
+    tcp = await server.serve(args.host, args.port)
+    print(f"listening on {args.host}:{server.port} ({len(server.sessions)} sessions restored)", flush=True)
+    try:
+        async with tcp:
+            await tcp.serve_forever()
+    finally:
+        await server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="多局對弈伺服器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--snapshot", help="快照檔路徑（未指定時不保存）")
+    parser.add_argument("--max-sessions", type=int, default=DEFAULT_MAX_SESSIONS)
+    parser.add_argument("--flush-interval", type=float, default=DEFAULT_FLUSH_INTERVAL, help="快照寫入間隔（秒）")
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
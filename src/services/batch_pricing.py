@@ -0,0 +1,225 @@
+"""
+批次訂單計價（NumPy 向量化）
+
+輸入為欄位陣列：每個訂單項目一列，包含訂單編號、數量、單價與類別代碼。
+項目依訂單編號穩定排序後分組，每個促銷策略改寫成對整批訂單的陣列運算，
+套用順序與 OrderService.place_order 完全相同（包括雙十一優先、買一送一改變數量後的連鎖影響）。
+
+浮點運算（雙十一八折、百分比折扣）的運算順序與單筆路徑一致：每個項目先算出相同的 float64，
+再依項目在訂單中的順序逐一累加（以「第 k 個項目」為單位向量化，不使用 pairwise 加總），
+因此結果與逐筆計算逐位元相同。為確保整數轉成 float64 時沒有誤差，金額必須小於 2**53。
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from src.promotions.base import PromotionStrategy
+from src.promotions.examples import CategoryDiscountStrategy, FirstTimeCustomerStrategy
+from src.promotions.strategies import BogoCosmeticsStrategy, Double11Strategy, ThresholdDiscountStrategy
+
+# 整數轉 float64 仍然精確的上限
+_EXACT_LIMIT = 1 << 53
+NO_CATEGORY = -1
+
+SUPPORTED_STRATEGIES = (
+    ThresholdDiscountStrategy, BogoCosmeticsStrategy, Double11Strategy,
+    CategoryDiscountStrategy, FirstTimeCustomerStrategy,
+)
+
+
+@dataclass
+class OrderBatchResult:
+    """
+    批次計價結果
+
+    訂單層級的陣列依 order_ids（排序後不重複）對齊；quantity 依輸入的項目順序，
+    為套用買一送一後的數量。
+    """
+    order_ids: np.ndarray
+    original_amount: np.ndarray
+    discount: np.ndarray
+    total_amount: np.ndarray
+    quantity: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.order_ids)
+
+
+class _Batch:
+    """排序分組後的批次與計價過程中的狀態"""
+
+    def __init__(self, order_ids, quantity, unit_price, category, categories: Sequence[str]):
+        order_ids = np.asarray(order_ids)
+        columns = [np.asarray(column) for column in (quantity, unit_price)]
+        count = len(order_ids)
+        if category is None:
+            category = np.full(count, NO_CATEGORY)
+        category = np.asarray(category)
+        for column in (order_ids, *columns, category):
+            if column.ndim != 1 or len(column) != count:
+                raise ValueError("Batch columns must be 1-D arrays of the same length")
+        if not count:
+            raise ValueError("Batch must contain at least one item")
+        if np.any((category < NO_CATEGORY) | (category >= len(categories))):
+            raise ValueError("Category codes must be -1 or index into categories")
+
+        # 穩定排序：同一訂單內保持輸入順序；已依訂單編號排序的輸入不必再排序
+        if np.all(order_ids[1:] >= order_ids[:-1]):
+            self.order = np.arange(count)
+        else:
+            self.order = np.argsort(order_ids, kind="stable")
+        sorted_ids = order_ids[self.order]
+        starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        self.order_ids = sorted_ids[starts]
+        self.starts = starts
+        self.group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, count]))
+        self.quantity = columns[0].astype(np.int64)[self.order]
+        self.unit_price = columns[1].astype(np.int64)[self.order]
+        self.category = category.astype(np.int64)[self.order]
+        self.categories = list(categories)
+
+        # 每個項目在訂單中的位置，以及依位置分組的項目索引（逐項累加浮點數用）
+        position = np.arange(count) - starts[self.group]
+        # 位置值很小，轉成 uint16 讓穩定排序使用 radix sort
+        if position.max() < 1 << 16:
+            position = position.astype(np.uint16)
+        by_position = np.argsort(position, kind="stable")
+        bounds = np.r_[0, np.cumsum(np.bincount(position))]
+        self.positions: List[np.ndarray] = [by_position[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+
+        self.original = self.sum(self.subtotal())
+        self.discount = np.zeros(len(starts), dtype=np.int64)
+        # 已由雙十一優先處理結束的訂單不再套用其他策略
+        self.active = np.ones(len(starts), dtype=bool)
+
+    def subtotal(self) -> np.ndarray:
+        return self.quantity * self.unit_price
+
+    def sum(self, values: np.ndarray) -> np.ndarray:
+        """整數逐訂單加總（整數加法與順序無關）"""
+        return np.add.reduceat(values, self.starts)
+
+    def any(self, flags: np.ndarray) -> np.ndarray:
+        return np.logical_or.reduceat(flags, self.starts)
+
+    def sequential_sum(self, values: np.ndarray) -> np.ndarray:
+        """float64 依項目順序逐一累加，與 Python 迴圈的 total += value 相同"""
+        total = np.zeros(len(self.starts), dtype=np.float64)
+        for items in self.positions:
+            total[self.group[items]] += values[items]
+        return total
+
+    def category_mask(self, name: str) -> np.ndarray:
+        codes = [code for code, category in enumerate(self.categories) if category == name]
+        return np.isin(self.category, codes)
+
+
+def _check_exact(batch: _Batch, bogo_count: int) -> None:
+    """單筆路徑使用 Python 整數，向量化路徑需確保 int64 與 float64 都不失真"""
+    quantity = np.abs(batch.quantity).max() + bogo_count
+    price = np.abs(batch.unit_price).max()
+    longest = len(batch.positions)
+    if int(quantity) * int(price) * longest >= _EXACT_LIMIT:
+        raise ValueError("Order amounts too large for exact vectorized pricing")
+
+
+def _double11_amount(batch: _Batch) -> np.ndarray:
+    """Double11Strategy.apply 的金額：每 10 件八折，其餘原價，逐項以浮點數累加後取整數"""
+    quantity, price = batch.quantity, batch.unit_price
+    discounted = (quantity // 10 * 10 * price).astype(np.float64) * 0.8
+    rest = (quantity % 10 * price).astype(np.float64)
+    return np.trunc(batch.sequential_sum(discounted + rest)).astype(np.int64)
+
+
+def _apply(strategy: PromotionStrategy, batch: _Batch) -> None:
+    active = batch.active
+    if isinstance(strategy, ThresholdDiscountStrategy):
+        applicable = np.zeros_like(active)
+        total = np.zeros_like(batch.discount)
+        for rule in strategy.rules:
+            reached = batch.original >= rule.threshold
+            applicable |= reached
+            total += np.where(reached, rule.discount, 0)
+        batch.discount += np.where(active & applicable, total, 0)
+    elif isinstance(strategy, BogoCosmeticsStrategy):
+        cosmetics = batch.category_mask("cosmetics")
+        applicable = active & batch.any(cosmetics)
+        batch.quantity += cosmetics & applicable[batch.group]
+    elif isinstance(strategy, Double11Strategy):
+        applicable = active & batch.any(batch.quantity >= 10)
+        batch.original = np.where(applicable, _double11_amount(batch), batch.original)
+        batch.discount[applicable] = 0
+    elif isinstance(strategy, CategoryDiscountStrategy):
+        rule = strategy.rule
+        matched = batch.category_mask(rule.category)
+        applicable = active & batch.any(matched)
+        category_total = batch.sum(np.where(matched, batch.subtotal(), 0)).astype(np.float64)
+        amount = np.trunc(category_total * rule.discount_percentage).astype(np.int64)
+        batch.discount += np.where(applicable, amount, 0)
+    else:
+        rule = strategy.rule
+        amount = np.trunc(batch.original.astype(np.float64) * rule.discount_percentage).astype(np.int64)
+        batch.discount += np.where(active, amount, 0)
+
+
+def price_orders(
+    strategies: Sequence[PromotionStrategy],
+    order_ids,
+    quantity,
+    unit_price,
+    category=None,
+    categories: Sequence[str] = (),
+) -> OrderBatchResult:
+    """
+    以向量化運算對整批訂單套用促銷策略，結果與逐筆呼叫 OrderService.place_order 相同
+
+    category 為類別代碼陣列（-1 表示無類別），代碼 i 對應 categories[i]。
+    策略必須是 SUPPORTED_STRATEGIES 中的類別（不含子類別），否則 raise ValueError。
+    """
+    for strategy in strategies:
+        if type(strategy) not in SUPPORTED_STRATEGIES:
+            raise ValueError(f"{type(strategy).__name__} has no vectorized implementation")
+    batch = _Batch(order_ids, quantity, unit_price, category, categories)
+    _check_exact(batch, sum(type(s) is BogoCosmeticsStrategy for s in strategies))
+
+    # 與 OrderService._apply_promotions 相同：雙十一適用時只套用雙十一，其他策略略過
+    if any(type(s) is Double11Strategy for s in strategies):
+        first = batch.any(batch.quantity >= 10)
+        batch.original = np.where(first, _double11_amount(batch), batch.original)
+        batch.active = ~first
+    for strategy in strategies:
+        _apply(strategy, batch)
+
+    quantity = np.empty_like(batch.quantity)
+    quantity[batch.order] = batch.quantity
+    return OrderBatchResult(
+        order_ids=batch.order_ids,
+        original_amount=batch.original,
+        discount=batch.discount,
+        total_amount=batch.original - batch.discount,
+        quantity=quantity,
+    )
+
+
+def orders_from_batch(
+    order_ids,
+    quantity,
+    unit_price,
+    category=None,
+    categories: Sequence[str] = (),
+    product_names: Optional[Sequence[str]] = None,
+) -> dict:
+    """欄位陣列轉回 place_order 的輸入格式 {訂單編號: [item dict, ...]}（驗證與效能比較用）"""
+    orders: dict = {}
+    for index, order_id in enumerate(np.asarray(order_ids).tolist()):
+        item = {
+            "productName": product_names[index] if product_names is not None else None,
+            "quantity": int(quantity[index]),
+            "unitPrice": int(unit_price[index]),
+        }
+        if category is not None and category[index] != NO_CATEGORY:
+            item["category"] = categories[int(category[index])]
+        orders.setdefault(order_id, []).append(item)
+    return orders
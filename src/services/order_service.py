@@ -1,8 +1,11 @@
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, List, Dict, Mapping, Optional, Sequence
 from src.domain.models import Order, OrderItem
 from src.promotions.base import PromotionStrategy
 from src.promotions.factory import PromotionStrategyFactory
 
+if TYPE_CHECKING:
+    from src.services.batch_pricing import OrderBatchResult
+
 
 class OrderService:
     """
@@ -43,6 +46,29 @@ class OrderService:
         
         return order
     
+    def place_orders(self, batch: Mapping, categories: Sequence[str] = ()) -> 'OrderBatchResult':
+        """
+        批次計價：以欄位陣列一次處理多筆訂單，結果與逐筆 place_order 相同（需要 numpy）
+        
+        Args:
+            batch: 欄位陣列，包含 order_id, quantity, unit_price，以及可省略的 category（類別代碼，-1 為無類別）
+            categories: 類別代碼對應的類別名稱
+            
+        Returns:
+            OrderBatchResult: 依訂單編號排序的原價、折扣、總金額，以及套用促銷後的項目數量
+        """
+        # 只有批次計價需要 numpy，逐筆的 place_order 不受影響
+        from src.services.batch_pricing import price_orders
+
+        return price_orders(
+            self.strategies,
+            batch['order_id'],
+            batch['quantity'],
+            batch['unit_price'],
+            batch.get('category'),
+            categories
+        )
+    
     def _create_order_items(self, items: List[Dict]) -> List[OrderItem]:
         """從字典列表創建訂單項目"""
         has_category = any('category' in item for item in items)
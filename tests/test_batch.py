@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.analysis.batch import encode_board, encode_boards, validate_moves_batch
+from src.chinesechess import ChineseChessBoard
+
+from test_move_generation import ALL_SQUARES, random_board
+
+
+def scalar_rule(board, from_pos, to_pos):
+    piece = board.get_piece(from_pos)
+    if piece is None:
+        return False
+    return board._get_rule_func(piece.piece_type)(piece, to_pos)
+
+
+def random_cases(seed, boards=30, moves_per_board=200):
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(boards):
+        board = random_board(rng, rng.randint(4, 32))
+        occupied = list(board.pieces)
+        for _ in range(moves_per_board):
+            from_pos = rng.choice(occupied) if rng.random() < 0.9 else rng.choice(ALL_SQUARES)
+            to_pos = rng.choice(ALL_SQUARES)
+            cases.append((board, from_pos, to_pos))
+    return cases
+
+
+def as_arrays(cases):
+    boards = np.stack([encode_board(board) for board, _, _ in cases])
+    moves = np.array([from_pos + to_pos for _, from_pos, to_pos in cases])
+    return boards, moves
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_matches_scalar_rules(seed):
+    cases = random_cases(seed)
+    result = validate_moves_batch(*as_arrays(cases))
+    expected = [scalar_rule(board, from_pos, to_pos) for board, from_pos, to_pos in cases]
+    assert result.tolist() == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_full_rules_match_move_piece(seed):
+    cases = random_cases(seed + 100)
+    result = validate_moves_batch(*as_arrays(cases), full_rules=True)
+    expected = [board.copy().move_piece(from_pos, to_pos) for board, from_pos, to_pos in cases]
+    assert result.tolist() == expected
+
+
+def test_single_board_broadcast_and_bounds():
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    encoded = encode_board(board)
+    assert encoded.shape == (10, 9) and encoded.dtype == np.int8
+    moves = np.array([
+        (1, 2, 3, 3),    # 馬
+        (3, 2, 10, 2),   # 炮隔子吃馬
+        (3, 2, 9, 2),    # 炮不能只隔一子移動
+        (1, 1, 0, 1),    # 超出棋盤
+        (5, 5, 6, 5),    # 起點沒有棋子
+        (1, 1, 1, 1),    # 車原地：規則函式允許，move_piece 不允許
+    ])
+    assert validate_moves_batch(encoded, moves).tolist() == [True, True, False, False, False, True]
+    assert validate_moves_batch(encoded, moves, full_rules=True).tolist()[-1] is False
+    assert scalar_rule(board, (1, 1), (1, 1)) is True
+
+
+def test_full_rules_reject_facing_generals():
+    board = ChineseChessBoard.from_fen("3k5/9/9/9/9/9/9/9/9/4K4 w - - 0 1")
+    moves = np.array([(1, 5, 1, 4), (1, 5, 2, 5)])
+    assert validate_moves_batch(encode_board(board), moves).tolist() == [True, True]
+    assert validate_moves_batch(encode_board(board), moves, full_rules=True).tolist() == [False, True]
+
+
+def test_invalid_shapes_raise_value_error():
+    boards = encode_boards([ChineseChessBoard()])
+    with pytest.raises(ValueError):
+        validate_moves_batch(boards, np.zeros((1, 3), dtype=int))
+    with pytest.raises(ValueError):
+        validate_moves_batch(boards, np.zeros((2, 4), dtype=int))
+    assert encode_boards([]).shape == (0, 10, 9)
@@ -0,0 +1,102 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.promotions.examples import BundleDiscountStrategy, CategoryDiscountStrategy, FirstTimeCustomerStrategy
+from src.promotions.strategies import BogoCosmeticsStrategy, Double11Strategy
+from src.services.batch_pricing import orders_from_batch, price_orders
+from src.services.order_service import OrderService
+
+CATEGORIES = ["cosmetics", "electronics", "apparel"]
+THRESHOLDS = [{"threshold": 1000, "discount": 100}, {"threshold": 5000, "discount": 600}]
+
+
+def random_batch(seed, orders=400, max_items=6):
+    """打亂順序的隨機批次，數量涵蓋雙十一門檻（10 件）上下"""
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(1, max_items + 1, orders)
+    order_ids = np.repeat(rng.permutation(orders) * 3 + 7, sizes)
+    shuffle = rng.permutation(len(order_ids))
+    count = len(order_ids)
+    return {
+        "order_id": order_ids[shuffle],
+        "quantity": rng.integers(1, 25, count),
+        "unit_price": rng.integers(1, 5000, count),
+        "category": rng.integers(-1, len(CATEGORIES), count),
+    }
+
+
+def assert_matches_place_order(service, batch):
+    result = service.place_orders(batch, CATEGORIES)
+    orders = orders_from_batch(batch["order_id"], batch["quantity"], batch["unit_price"],
+                               batch["category"], CATEGORIES)
+    assert result.order_ids.tolist() == sorted(orders)
+
+    quantities = {}
+    for index, order_id in enumerate(result.order_ids.tolist()):
+        order = service.place_order(orders[order_id])
+        assert (order.original_amount, order.discount, order.total_amount) == (
+            result.original_amount[index], result.discount[index], result.total_amount[index])
+        quantities[order_id] = [item.quantity for item in order.items]
+    # 項目數量依輸入順序對齊
+    expected = [quantities[order_id].pop(0) for order_id in batch["order_id"].tolist()]
+    assert result.quantity.tolist() == expected
+
+
+class TestBatchPricing:
+    """批次計價與逐筆 place_order 的一致性"""
+
+    @pytest.mark.parametrize("config", [
+        {},
+        {"promotions": THRESHOLDS},
+        {"bogo_cosmetics_active": True},
+        {"double11_active": True},
+        {"promotions": THRESHOLDS, "bogo_cosmetics_active": True, "double11_active": True},
+    ])
+    def test_matches_place_order(self, config):
+        service = OrderService(**config)
+        service.add_promotion_strategy(CategoryDiscountStrategy("electronics", 0.15))
+        service.add_promotion_strategy(FirstTimeCustomerStrategy(0.07))
+        assert_matches_place_order(service, random_batch(len(config)))
+
+    def test_double11_after_bogo(self):
+        """買一送一先讓數量達到 10 件時，雙十一在迴圈中改寫原價並清除折扣"""
+        service = OrderService(promotions=THRESHOLDS)
+        service.strategies = [BogoCosmeticsStrategy(), Double11Strategy()] + service.strategies
+        assert_matches_place_order(service, random_batch(7))
+
+    def test_sorted_input_and_defaults(self):
+        service = OrderService(promotions=THRESHOLDS)
+        result = service.place_orders({"order_id": [1, 1, 2], "quantity": [2, 1, 3], "unit_price": [500, 100, 50]})
+        assert result.order_ids.tolist() == [1, 2]
+        assert result.original_amount.tolist() == [1100, 150]
+        assert result.discount.tolist() == [100, 0]
+        assert result.total_amount.tolist() == [1000, 150]
+        assert len(result) == 2
+
+    def test_invalid_input(self):
+        columns = ([1, 2], [1, 1], [100, 100])
+        with pytest.raises(ValueError):
+            price_orders([BundleDiscountStrategy(["a", "b"], 100)], *columns)
+        with pytest.raises(ValueError):
+            price_orders([], [1, 2], [1], [100, 100])
+        with pytest.raises(ValueError):
+            price_orders([], [], [], [])
+        with pytest.raises(ValueError):
+            price_orders([], *columns, category=[0, 1], categories=["cosmetics"])
+        with pytest.raises(ValueError):
+            price_orders([], [1], [1 << 30], [1 << 30])
+
+
+def test_place_order_does_not_need_numpy():
+    """沒有安裝 numpy 時，逐筆的 place_order 仍可使用"""
+    code = (
+        "import sys; sys.modules['numpy'] = None\n"
+        "from src.services.order_service import OrderService\n"
+        "order = OrderService().place_order([{'productName': 'T-shirt', 'quantity': 2, 'unitPrice': 500}])\n"
+        "assert order.total_amount == 1000\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=Path(__file__).parent.parent)
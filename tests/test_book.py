@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from src.chinesechess import INITIAL_FEN, ChineseChessBoard, iccs_to_move, move_to_iccs, position_of
+from src.engine.book import OpeningBook, build_book, iter_book_moves
+from src.engine.search import search
+
+GAMES = [
+    "h2e2 h9g7 h0g2 i9h9 1-0",
+    "h2e2 b9c7 b0c2",
+    "h2e2 h9g7 b0c2",
+    "b0c2 b9c7",
+    "h2e2 h9h0 b0c2",  # h9h0 不合法，之後略過
+    "# 註解行",
+    "",
+]
+
+
+def test_iccs_round_trip():
+    move = iccs_to_move("H2-E2")
+    assert (position_of(move >> 8), position_of(move & 0xFF)) == ((3, 8), (3, 5))
+    assert move_to_iccs(move) == "h2e2"
+    for text in ("h2e", "j2e2", "h2ex"):
+        with pytest.raises(ValueError):
+            iccs_to_move(text)
+
+
+def test_build_and_probe(tmp_path):
+    path = tmp_path / "book.bin"
+    # chunk_entries 很小，強迫使用多個暫存檔合併
+    count = build_book(GAMES, str(path), chunk_entries=3)
+    assert count == len(set(iter_book_moves(GAMES)))
+    assert list(tmp_path.iterdir()) == [path]
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    with OpeningBook(str(path)) as book:
+        assert len(book) == count
+        root = dict(book.probe(board.zobrist))
+        assert root == {iccs_to_move("h2e2"): 4, iccs_to_move("b0c2"): 1}
+        assert book.choose(board) == iccs_to_move("h2e2")
+        assert book.choose(board, random.Random(1)) in root
+        board.make_move(iccs_to_move("h2e2"))
+        assert dict(book.moves(board)) == {
+            iccs_to_move("h9g7"): 2, iccs_to_move("b9c7"): 1,
+        }
+        board.make_move(iccs_to_move("h9g7"))
+        assert sorted(book.moves(board)) == sorted([(iccs_to_move("h0g2"), 1), (iccs_to_move("b0c2"), 1)])
+        assert book.probe(12345) == []
+
+
+def test_search_uses_book(tmp_path):
+    path = tmp_path / "book.bin"
+    build_book(GAMES, str(path))
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    with OpeningBook(str(path)) as book:
+        result = search(board, depth=2, book=book)
+        assert result.best_move == ((3, 8), (3, 5)) and result.depth == 0
+        board.set_fen("4k4/9/9/9/9/9/9/9/9/4K4 w - - 0 1")
+        assert search(board, depth=1, book=book).depth == 1
+
+
+def test_rejects_non_book_file(tmp_path):
+    path = tmp_path / "junk.bin"
+    path.write_bytes(b"not a book at all")
+    with pytest.raises(ValueError):
+        OpeningBook(str(path))
@@ -0,0 +1,136 @@
+import random
+
+import src.chinesechess as chinesechess
+from src.chinesechess import ChineseChessBoard, Color, STRIDE
+from src.analysis.perft import perft
+
+from test_move_generation import random_board
+
+
+def setup_board(pieces):
+    board = ChineseChessBoard()
+    for piece_type, color, pos in pieces:
+        board.add_piece(piece_type, color, pos)
+    return board
+
+
+def general_captured_by_reply(board, color):
+    """暴力檢查：對方是否有任何走法能吃掉指定顏色的將帥（含將帥對面）"""
+    red, black = board.general_squares
+    if red and black and (black - red) % STRIDE == 0:
+        if all(not board.cells[sq] for sq in range(min(red, black) + STRIDE, max(red, black), STRIDE)):
+            return True
+    general = board.general_squares[0 if color == Color.RED else 1]
+    enemy = Color.BLACK if color == Color.RED else Color.RED
+    return any(m & 0xFF == general for m in board.generate_move_codes(enemy))
+
+
+def test_rook_and_facing_generals_give_check():
+    board = setup_board([('General', 'Red', (1, 5)), ('Rook', 'Black', (1, 9)), ('General', 'Black', (10, 4))])
+    assert board.is_in_check(Color.RED)
+    assert not board.is_in_check(Color.BLACK)
+    board = setup_board([('General', 'Red', (2, 5)), ('General', 'Black', (9, 5))])
+    assert board.is_in_check('Red') and board.is_in_check('Black')
+
+
+def test_cannon_needs_exactly_one_screen():
+    board = setup_board([('General', 'Red', (1, 5)), ('Cannon', 'Black', (7, 5)), ('General', 'Black', (10, 4))])
+    assert not board.is_in_check('Red')
+    board.add_piece('Soldier', 'Red', (4, 5))
+    assert board.is_in_check('Red')
+    board.add_piece('Soldier', 'Black', (5, 5))
+    assert not board.is_in_check('Red')
+
+
+def test_moving_onto_cannon_line_creates_screen():
+    board = setup_board([
+        ('General', 'Red', (1, 5)), ('Rook', 'Red', (4, 1)),
+        ('Cannon', 'Black', (7, 5)), ('General', 'Black', (10, 4)),
+    ])
+    assert ((4, 1), (4, 5)) in board.generate_moves('Red')
+    assert ((4, 1), (4, 5)) not in board.generate_legal_moves('Red')
+
+
+def test_horse_leg_blocks_check_and_discovers_it():
+    board = setup_board([
+        ('General', 'Red', (1, 5)), ('Guard', 'Red', (2, 4)),
+        ('Horse', 'Black', (3, 4)), ('General', 'Black', (10, 4)),
+    ])
+    # 馬腳 (2, 4) 被擋住
+    assert not board.is_in_check('Red')
+    # 士離開馬腳會讓馬將軍，不合法
+    assert (2, 4) not in [from_pos for from_pos, _ in board.generate_legal_moves('Red')]
+    board = setup_board([('General', 'Red', (1, 5)), ('Horse', 'Black', (3, 4)), ('General', 'Black', (10, 4))])
+    assert board.is_in_check('Red')
+
+
+def test_pinned_pieces_and_cannon_screens():
+    # 紅車被黑車牽制，黑車後面還有黑炮：紅車可沿線移動，但吃黑車會成為唯一的炮架
+    board = ChineseChessBoard.from_fen("4k4/9/4c4/4r4/9/4R4/9/9/4K4/9 w")
+    targets = {to_pos for from_pos, to_pos in board.generate_legal_moves('Red') if from_pos == (5, 5)}
+    assert targets == {(3, 5), (4, 5), (6, 5)}
+    # 兩個炮架中的紅車吃掉另一個炮架（黑士）也只剩一個炮架
+    board = ChineseChessBoard.from_fen("3k5/3c5/3a5/9/3R5/9/9/9/3K5/9 w")
+    targets = {to_pos for from_pos, to_pos in board.generate_legal_moves('Red') if from_pos == (6, 4)}
+    assert targets == {(3, 4), (4, 4), (5, 4), (7, 4)}
+    # 第一子就是對方炮時，後面的己方炮架同樣受限
+    board = ChineseChessBoard.from_fen("4k4/4c4/9/4C4/9/9/9/4c4/4K4/9 w")
+    assert all(from_pos != (7, 5) or to_pos[1] == 5 for from_pos, to_pos in board.generate_legal_moves('Red'))
+
+
+def test_checkmate_and_stalemate():
+    # 雙車錯殺
+    board = setup_board([
+        ('General', 'Red', (1, 4)), ('Rook', 'Red', (10, 1)), ('Rook', 'Red', (9, 2)),
+        ('General', 'Black', (10, 5)),
+    ])
+    assert board.is_checkmate('Black')
+    assert not board.is_stalemate('Black')
+    # 未被將軍但無路可走：(9, 4) 被車控制，(10, 5) 會將帥對面
+    board = setup_board([
+        ('General', 'Red', (1, 5)), ('Rook', 'Red', (9, 1)), ('General', 'Black', (10, 4)),
+    ])
+    assert not board.is_in_check('Black')
+    assert board.is_stalemate('Black')
+    assert not board.is_checkmate('Black')
+    assert not board.is_stalemate('Red')
+
+
+def test_legal_moves_match_brute_force():
+    rng = random.Random(3)
+    for _ in range(60):
+        board = random_board(rng, rng.randint(4, 30))
+        for color in Color:
+            # 之後隨機走幾步，涵蓋更多牽制與炮架的組合
+            for _ in range(8):
+                expected = set()
+                for move in board.generate_move_codes(color):
+                    board.make_move(move)
+                    if not general_captured_by_reply(board, color):
+                        expected.add(move)
+                    board.unmake_move()
+                assert set(board.generate_legal_move_codes(color)) == expected
+                assert board.has_legal_move(color) == bool(expected)
+                assert board.is_in_check(color) == general_captured_by_reply(board, color)
+                if not expected:
+                    break
+                board.make_move(rng.choice(sorted(expected)))
+                color = board.side_to_move
+
+
+def test_standard_rules_perft(monkeypatch):
+    """把兵的方向換成標準規則後，perft 應與公開的象棋 perft 數值一致"""
+    steps = ([()] * len(chinesechess._SOLDIER_STEPS[0]), [()] * len(chinesechess._SOLDIER_STEPS[1]))
+    attackers = ([[] for _ in steps[0]], [[] for _ in steps[1]])
+    for sq in chinesechess.ON_BOARD:
+        row = sq // STRIDE - 1
+        for side, forward, crossed in ((0, STRIDE, row >= 6), (1, -STRIDE, row <= 5)):
+            deltas = (forward, 1, -1) if crossed else (forward,)
+            steps[side][sq] = tuple(sq + d for d in deltas if chinesechess._on_board(sq + d))
+            for to_sq in steps[side][sq]:
+                attackers[side][to_sq].append(sq)
+    monkeypatch.setattr(chinesechess, "_SOLDIER_STEPS", steps)
+    monkeypatch.setitem(chinesechess._STEP_ATTACKERS, chinesechess.SOLDIER, attackers)
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    assert [perft(board, depth, 'Red') for depth in (1, 2, 3)] == [44, 1920, 79666]
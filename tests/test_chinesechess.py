@@ -92,4 +92,44 @@ def test_generals_face():
     ])
     board.add_piece(PieceType.ROOK.value, Color.RED.value, (5, 5))
     # 嘗試將 Red General 移到 (2, 5)，有 Rook 阻擋，應合法
-    assert board.move_piece((1, 5), (2, 5)) 
\ No newline at end of file
+    assert board.move_piece((1, 5), (2, 5)) 
+
+def test_array_board_tracks_piece_lists():
+    board = setup_board([
+        (PieceType.ROOK.value, Color.RED.value, (5, 5)),
+        (PieceType.CANNON.value, Color.BLACK.value, (5, 8)),
+        (PieceType.GENERAL.value, Color.BLACK.value, (8, 5))
+    ])
+    assert board.move_piece((5, 5), (5, 8))
+    assert board.get_piece((5, 5)) is None
+    assert board.get_piece((5, 8)).piece_type == PieceType.ROOK
+    assert len(board.piece_squares[0]) == 1
+    assert len(board.piece_squares[1]) == 1
+    assert sorted(board.pieces) == [(5, 8), (8, 5)]
+
+
+def test_array_board_rejects_off_board_moves():
+    board = setup_board([(PieceType.ROOK.value, Color.RED.value, (1, 1))])
+    assert not board.move_piece((1, 1), (1, 10))
+    assert not board.move_piece((1, 1), (0, 1))
+    assert not board.move_piece((1, 1), (1, 1))
+    with pytest.raises(ValueError):
+        board.add_piece(PieceType.ROOK.value, Color.RED.value, (11, 1))
+
+
+def test_generals_face_move_is_restored():
+    board = setup_board([
+        (PieceType.GENERAL.value, Color.RED.value, (2, 4)),
+        (PieceType.GENERAL.value, Color.BLACK.value, (8, 5))
+    ])
+    assert not board.move_piece((2, 4), (2, 5))
+    assert board.get_piece((2, 4)).piece_type == PieceType.GENERAL
+    assert board.get_piece((2, 5)) is None
+
+
+def test_initial_position():
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    assert len(board.pieces) == 32
+    assert board.get_piece((1, 5)).piece_type == PieceType.GENERAL
+    assert board.get_piece((8, 2)).color == Color.BLACK
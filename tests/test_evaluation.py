@@ -0,0 +1,62 @@
+import random
+
+from src.chinesechess import INITIAL_FEN, ChineseChessBoard
+from src.engine.evaluation import POSITIONAL_MARGIN, evaluate, positional_score
+
+from test_move_generation import random_board
+
+
+def flipped(board):
+    """紅黑互換並上下翻轉的盤面，評估分數應該正負相反"""
+    ranks, side = board.to_fen().split()[:2]
+    swapped = "/".join(ranks.split("/")[::-1]).swapcase()
+    return ChineseChessBoard.from_fen(f"{swapped} {'b' if side == 'w' else 'w'}")
+
+
+def test_initial_position_is_balanced():
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    assert evaluate(board) == 0
+
+
+def test_score_is_incremental_and_symmetric():
+    rng = random.Random(17)
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    for _ in range(60):
+        moves = board.generate_legal_move_codes(board.side)
+        if not moves:
+            break
+        board.make_move(rng.choice(moves))
+        assert board.score == board.compute_score()
+        assert evaluate(board) == -evaluate(flipped(board))
+
+
+def test_mobility_and_king_safety_terms():
+    centre = ChineseChessBoard.from_fen("3k5/9/9/9/9/4R4/9/9/9/4K4 w")
+    corner = ChineseChessBoard.from_fen("3k5/9/9/9/9/9/9/9/9/R3K4 w")
+    assert positional_score(centre) > positional_score(corner)
+
+    # 黑方有沒有士象，紅車過河後的分數差
+    guarded = ChineseChessBoard.from_fen("3akab2/9/9/4R4/9/9/9/9/9/4K4 w")
+    bare = ChineseChessBoard.from_fen("3k5/9/9/4R4/9/9/9/9/9/4K4 w")
+    assert positional_score(bare) > positional_score(guarded)
+
+
+def test_positional_score_stays_within_margin():
+    """搜尋的 lazy evaluation 依賴這個上限"""
+    assert POSITIONAL_MARGIN == 350
+    # 車馬炮全部過河、對方只剩將：超過舊的估計值 200
+    attack = ChineseChessBoard.from_fen("4k4/9/R3C3R/9/1H5H1/4C4/9/9/9/3K5 w")
+    assert 200 < positional_score(attack) <= POSITIONAL_MARGIN
+    assert positional_score(flipped(attack)) == -positional_score(attack)
+
+    rng = random.Random(5)
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    for _ in range(200):
+        moves = board.generate_legal_move_codes(board.side)
+        if not moves:
+            break
+        board.make_move(rng.choice(moves))
+        assert abs(positional_score(board)) <= POSITIONAL_MARGIN
+    # 非標準子力的盤面被限制在上限內
+    for _ in range(50):
+        assert abs(positional_score(random_board(rng, 40))) <= POSITIONAL_MARGIN
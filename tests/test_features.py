@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.analysis.features import (
+    MASK_BYTES, PLANES, FeatureWriter, codes_from_packed, encode_positions, iter_chunks, planes_from_codes,
+    unpack_masks,
+)
+from src.analysis.packing import pack_many
+from src.chinesechess import INITIAL_FEN, ON_BOARD, ChineseChessBoard, Color, PieceType, iter_fen_positions
+
+PLANE_ORDER = [PieceType.GENERAL, PieceType.GUARD, PieceType.ROOK, PieceType.HORSE,
+               PieceType.CANNON, PieceType.ELEPHANT, PieceType.SOLDIER]
+
+
+def random_positions(count, seed=5):
+    rng = random.Random(seed)
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    positions = []
+    while len(positions) < count:
+        moves = board.generate_legal_move_codes(board.side)
+        if not moves or board.ply > 60:
+            board.set_fen(INITIAL_FEN)
+            continue
+        board.make_move(rng.choice(moves))
+        positions.append(board.copy())
+    return positions
+
+
+def slow_planes(board):
+    planes = np.zeros((PLANES, 10, 9), dtype=np.uint8)
+    for (row, col), piece in board.pieces.items():
+        plane = PLANE_ORDER.index(piece.piece_type) + (7 if piece.color == Color.BLACK else 0)
+        planes[plane, row - 1, col - 1] = 1
+    return planes
+
+
+def test_planes_side_and_masks_match_board():
+    boards = random_positions(120)
+    planes, side, masks = encode_positions(boards)
+    assert planes.shape == (120, PLANES, 10, 9) and masks.shape == (120, MASK_BYTES)
+    assert (planes == np.stack([slow_planes(board) for board in boards])).all()
+    assert side.tolist() == [board.side for board in boards]
+
+    legal = unpack_masks(masks)
+    for board, mask in zip(boards, legal):
+        expected = {(m >> 8, m & 0xFF) for m in board.generate_legal_move_codes(board.side)}
+        froms, tos = np.nonzero(mask)
+        # 遮罩索引與 ON_BOARD 的格子順序相同
+        assert {(ON_BOARD[f], ON_BOARD[t]) for f, t in zip(froms, tos)} == expected
+
+
+def test_packed_positions_decode_without_boards():
+    boards = random_positions(200, seed=8)
+    codes, side = codes_from_packed(pack_many(boards))
+    planes, expected_side, _ = encode_positions(boards, masks=False)
+    assert (planes_from_codes(codes) == planes).all() and (side == expected_side).all()
+    with pytest.raises(ValueError):
+        planes_from_codes(np.zeros((2, 9, 10)))
+
+
+def test_writer_streams_chunks_and_appends(tmp_path):
+    boards = random_positions(250, seed=13)
+    planes, side, masks = encode_positions(boards)
+    fens = [board.to_fen() for board in boards]
+
+    with FeatureWriter(str(tmp_path), chunk_size=100, batch_size=32) as writer:
+        # iter_fen_positions 每次 yield 同一個棋盤物件
+        writer.extend(iter_fen_positions(fens[:150]))
+        writer.extend_packed(pack_many(boards[150:]))
+    assert writer.count == 250
+    chunks = list(iter_chunks(str(tmp_path)))
+    assert [len(chunk[0]) for chunk in chunks] == [100, 100, 50]
+    assert isinstance(chunks[0][0], np.memmap)
+    assert (np.concatenate([c[0] for c in chunks]) == planes).all()
+    assert (np.concatenate([c[1] for c in chunks]) == side).all()
+    assert (np.concatenate([c[2] for c in chunks]) == masks).all()
+
+    # 再次開啟同一目錄時從下一個區塊編號接續
+    with FeatureWriter(str(tmp_path), chunk_size=100, masks=False) as writer:
+        writer.extend(boards[:10])
+    chunks = list(iter_chunks(str(tmp_path)))
+    assert [len(chunk[0]) for chunk in chunks] == [100, 100, 50, 10]
+    assert chunks[-1][2] is None
+    assert (chunks[-1][0] == planes[:10]).all()
@@ -0,0 +1,65 @@
+import io
+import random
+
+import pytest
+from src.chinesechess import (
+    ChineseChessBoard, Color, INITIAL_FEN, PieceType, iter_fen_positions, load_fen_file,
+)
+
+
+def test_initial_fen_matches_initial_position():
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    assert board.to_fen() == INITIAL_FEN
+    loaded = ChineseChessBoard.from_fen(INITIAL_FEN)
+    assert loaded.zobrist == board.zobrist
+    assert loaded.get_piece((1, 5)).piece_type == PieceType.GENERAL
+    assert loaded.get_piece((10, 2)).color == Color.BLACK
+
+
+def test_fen_round_trip_through_random_game():
+    rng = random.Random(5)
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    for _ in range(60):
+        moves = board.generate_legal_move_codes(board.side)
+        if not moves:
+            break
+        board.make_move(rng.choice(moves))
+        copy = ChineseChessBoard.from_fen(board.to_fen())
+        assert copy.to_fen() == board.to_fen()
+        assert copy.zobrist == board.zobrist
+        assert copy.score == board.score
+
+
+def test_fen_side_and_alias_letters():
+    board = ChineseChessBoard.from_fen("4k4/9/9/9/9/9/9/9/4H4/3AKE3 b - - 0 1")
+    assert board.side_to_move == Color.BLACK
+    assert board.get_piece((2, 5)).piece_type == PieceType.HORSE
+    assert board.get_piece((1, 6)).piece_type == PieceType.ELEPHANT
+    assert board.to_fen() == "4k4/9/9/9/9/9/9/9/4N4/3AKB3 b - - 0 1"
+
+
+@pytest.mark.parametrize("fen", [
+    "",
+    "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/RNBAKABNR w",
+    "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNRR w",
+    "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABN w",
+    "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNX w",
+    "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR x",
+])
+def test_invalid_fen_raises(fen):
+    board = ChineseChessBoard()
+    with pytest.raises(ValueError):
+        board.set_fen(fen)
+    assert board.pieces == {}
+
+
+def test_streaming_loader_reuses_board(tmp_path):
+    fens = [INITIAL_FEN, "", "# comment", "3ak1b2/1c2a4/3P5/5N3/3R5/9/9/9/4K4/9 b - - 0 1"]
+    board = ChineseChessBoard()
+    seen = [(b is board, b.to_fen()) for b in iter_fen_positions(io.StringIO("\n".join(fens)), board)]
+    assert seen == [(True, fens[0]), (True, fens[3])]
+    path = tmp_path / "positions.fen"
+    path.write_text("\n".join(fens), encoding="utf-8")
+    counts = [len(b.pieces) for b in load_fen_file(str(path))]
+    assert counts == [32, 9]
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.chinesechess import INITIAL_FEN
+from src.server import game_server
+from src.server.game_server import RECORD_SIZE, GameServer, load_snapshot
+
+MATE_IN_ONE = "3k5/1R7/9/9/9/9/9/9/9/R3K4 w"
+
+
+def test_sessions_validate_moves_and_detect_mate():
+    server = GameServer()
+    first = server.new_session()
+    second = server.new_session(MATE_IN_ONE)
+    assert (first, second) == (1, 2)
+
+    board, session = server.play(first, "h2e2")
+    assert session.ply == 1 and board.to_fen().startswith("rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C2C4/")
+    for move in ("h2e2", "a0a2", "z9a1"):
+        with pytest.raises(ValueError):
+            server.play(first, move)  # 輪黑方、車被擋、格式錯誤
+    # 每局各自保存局面
+    assert server.state(second)[0].to_fen().startswith("3k5/1R7/")
+
+    board, session = server.play(second, "a0a9")
+    assert server.handle({"op": "state", "session": second})["result"] == "1-0"
+    with pytest.raises(ValueError, match="over"):
+        server.play(second, "d9e9")
+    server.close_session(second)
+    with pytest.raises(ValueError, match="Unknown session"):
+        server.state(second)
+    assert server.moves == 2
+
+
+def test_respond_echoes_ids_and_reports_errors():
+    server = GameServer(max_sessions=1)
+    response = json.loads(server.respond(b'{"op": "new", "id": 7}'))
+    assert response == {"ok": True, "session": 1, "fen": INITIAL_FEN, "ply": 0, "result": None, "id": 7}
+    assert json.loads(server.respond(b'{"op": "new"}')) == {"ok": False, "error": "Server is full"}
+    assert json.loads(server.respond(b"not json"))["ok"] is False
+    assert json.loads(server.respond(b'{"op": "move", "session": [1], "move": "h2e2"}'))["ok"] is False
+    assert json.loads(server.respond(b'{"op": "nope", "id": "x"}'))["id"] == "x"
+
+
+@pytest.mark.parametrize("request_line", [
+    b'{"op": "new", "fen": 5}',
+    b'{"op": "new", "fen": "rnbakabnr w"}',
+    b'{"op": "move", "session": 1, "move": 42}',
+    b'{"op": "move", "session": true, "move": "h2e2"}',
+    b'{"op": "state", "session": "1"}',
+    b'{"op": "close", "session": null}',
+    b'{"op": "move", "session": 1}',
+    b'{"op": ["new"]}',
+    b'"\xff"',
+    b"[" * 60_000,
+    # 每方必須剛好一個將帥
+    b'{"op": "new", "fen": "4kk3/9/9/9/9/9/9/9/9/4K4 w"}',
+    b'{"op": "new", "fen": "3k5/9/9/9/9/9/9/9/4K4/4K4 b"}',
+    b'{"op": "new", "fen": "9/9/9/9/9/9/9/9/9/9 w"}',
+])
+def test_malformed_fields_get_error_responses(request_line):
+    server = GameServer()
+    server.new_session()
+    response = json.loads(server.respond(request_line))
+    assert response["ok"] is False and response["error"]
+    # 錯誤請求不影響既有對局
+    assert server.handle({"op": "move", "session": 1, "move": "h2e2"})["ply"] == 1
+
+
+def test_snapshots_are_batched_and_restored(tmp_path):
+    path = str(tmp_path / "sessions.dat")
+
+    async def scenario():
+        server = GameServer(path, flush_interval=60)
+        for _ in range(3):
+            server.new_session()
+        server.play(1, "h2e2")
+        server.play(1, "h9g7")
+        assert server.dirty == 3
+        assert await server.flush() == 3
+        server.close_session(2)
+        server.play(3, "b0c2")
+        assert await server.flush() == 2
+        assert server.flushes == 2
+        return server
+
+    server = asyncio.run(scenario())
+    # 第一批另有一筆下一個 session id 的紀錄
+    assert (tmp_path / "sessions.dat").stat().st_size == 6 * RECORD_SIZE
+    restored = GameServer(path)
+    assert sorted(restored.sessions) == [1, 3]
+    assert restored.sessions[1].ply == 2
+    assert restored.state(3)[0].to_fen() == server.state(3)[0].to_fen()
+    assert restored.new_session() == 4
+
+    asyncio.run(restored.compact())
+    assert (tmp_path / "sessions.dat").stat().st_size == 4 * RECORD_SIZE
+    sessions, next_id = load_snapshot(path)
+    assert sorted(sessions) == [1, 3, 4] and next_id == 5
+
+
+def test_failed_flush_keeps_the_batch(tmp_path, monkeypatch):
+    path = str(tmp_path / "sessions.dat")
+
+    def disk_full(path, records):
+        raise OSError("No space left on device")
+
+    async def scenario():
+        server = GameServer(path)
+        server.new_session()
+        server.new_session()
+        with monkeypatch.context() as patch:
+            patch.setattr(game_server, "_append_records", disk_full)
+            with pytest.raises(OSError):
+                await server.flush()
+        assert server.dirty == 2 and server.flushes == 0
+        server.play(1, "h2e2")
+        assert await server.flush() == 2
+        return server
+
+    server = asyncio.run(scenario())
+    restored = GameServer(path)
+    assert sorted(restored.sessions) == [1, 2]
+    assert restored.state(1)[0].to_fen() == server.state(1)[0].to_fen()
+    assert restored.new_session() == 3
+
+
+def test_closed_session_ids_are_not_reused(tmp_path):
+    path = str(tmp_path / "sessions.dat")
+
+    async def scenario():
+        server = GameServer(path)
+        server.new_session()
+        server.new_session()
+        await server.flush()
+        server.close_session(2)
+        # 壓縮後快照裡已沒有 2 號對局的紀錄
+        await server.compact()
+
+    asyncio.run(scenario())
+    restored = GameServer(path)
+    assert sorted(restored.sessions) == [1]
+    assert restored.new_session() == 3
+
+
+def test_tcp_round_trip(tmp_path):
+    async def scenario():
+        server = GameServer(str(tmp_path / "sessions.dat"), max_dirty=2)
+        await server.serve()
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        # 一次送出多行，回應依序回來
+        writer.write(b'{"op": "new", "id": 1}\n\n{"op": "move", "session": 1, "move": "h2e2", "id": 2}\n'
+                     b'{"op": "move", "session": 1, "move": "h2e2", "id": 3}\n')
+        await writer.drain()
+        responses = [json.loads(await reader.readline()) for _ in range(3)]
+        writer.close()
+        await server.stop()
+        return server, responses
+
+    server, responses = asyncio.run(scenario())
+    assert [r["id"] for r in responses] == [1, 2, 3]
+    assert responses[1]["ok"] and responses[1]["ply"] == 1
+    assert not responses[2]["ok"]
+    assert server.dirty == 0 and load_snapshot(str(tmp_path / "sessions.dat"))[0][1].ply == 1
+
+
+def test_server_does_not_need_numpy():
+    """伺服器只用標準函式庫，沒有安裝 numpy 也能載入"""
+    code = (
+        "import sys; sys.modules['numpy'] = None\n"
+        "from src.server.game_server import GameServer\n"
+        "server = GameServer()\n"
+        "assert server.play(server.new_session(), 'h2e2')[1].ply == 1\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=Path(__file__).parent.parent)
@@ -0,0 +1,67 @@
+import pytest
+
+from src.chinesechess import INITIAL_FEN, Color
+from src.engine.history import BLACK_WINS, CAPTURE, CHASE, CHECK, DRAW, RED_WINS, GameState
+
+# 紅車在第 9、8 橫列來回將軍，黑將在 d9、d8 之間閃躲
+PERPETUAL_CHECK = ["a0a9"] + ["d9d8", "a9a8", "d8d9", "a8a9"] * 2
+HORSE_SHUFFLE = ["b0c2", "b9c7", "c2b0", "c7b9"]
+
+
+def test_repetition_counts_and_undo():
+    game = GameState.from_fen(INITIAL_FEN)
+    assert game.repetition_count() == 1
+    for move in HORSE_SHUFFLE * 2:
+        game.play_iccs(move)
+    assert game.repetition_count() == 3 and game.is_repetition()
+    assert game.perpetual_offender() is None
+    assert game.result() == DRAW
+
+    game.undo()
+    assert game.repetition_count() == 2 and game.ply == 7
+    while game.ply:
+        game.undo()
+    assert game.repetition_count() == 1 and game.board.to_fen() == INITIAL_FEN
+    with pytest.raises(ValueError):
+        game.undo()
+
+
+def test_perpetual_check_loses():
+    game = GameState.from_fen("3k5/9/9/9/9/9/9/9/9/R3K4 w")
+    flags = [game.play_iccs(move) for move in PERPETUAL_CHECK]
+    assert all(flag & CHECK for flag in flags[::2])
+    assert not any(flag & CHECK for flag in flags[1::2])
+    assert game.repetition_count() == 3
+    assert game.perpetual_offender() is Color.RED
+    assert game.result() == BLACK_WINS
+
+
+def test_chase_flag():
+    # 黑卒已過河且沒有保護，紅馬走到可以吃它的位置即為捉
+    game = GameState.from_fen("3k5/9/9/9/9/5p3/9/9/4N4/4K4 w")
+    assert game.play_iccs("e1d3") == CHASE
+    # 未過河的卒不算被捉
+    game = GameState.from_fen("3k5/9/9/9/5p3/9/9/2N6/9/4K4 w")
+    assert game.play_iccs("c2e3") == 0
+    # 車價值比馬高，即使有保護也算捉
+    game = GameState.from_fen("3k5/9/9/9/5r3/9/9/2N6/9/4K4 w")
+    assert game.play_iccs("c2e3") == CHASE
+
+
+def test_capture_resets_counter_and_mate_result():
+    game = GameState.from_fen("3k5/9/9/9/9/9/9/9/r8/R3K4 w")
+    assert game.play_iccs("a0a1") & CAPTURE
+    assert game.plies_since_capture() == 0
+    game.play_iccs("d9d8")
+    assert game.plies_since_capture() == 1
+    assert game.result(no_capture_plies=1) == DRAW
+
+    game = GameState.from_fen("R3k4/1R7/9/9/9/9/9/9/9/3K5 b")
+    assert game.result() == RED_WINS
+
+
+def test_illegal_move_rejected():
+    game = GameState.from_fen(INITIAL_FEN)
+    with pytest.raises(ValueError):
+        game.play_iccs("a0a5")
+    assert game.ply == 0
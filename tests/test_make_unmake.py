@@ -0,0 +1,77 @@
+import random
+
+import pytest
+from src.chinesechess import ChineseChessBoard, Color, GENERAL, PieceType, TYPE_MASK, piece_code
+
+
+def snapshot(board):
+    return (bytes(board.cells), board.zobrist, board.score, board.side,
+            tuple(board.general_squares), tuple(sorted(board.piece_squares[0])),
+            tuple(sorted(board.piece_squares[1])), tuple(board.rank_bits), tuple(board.file_bits))
+
+
+def test_make_unmake_round_trip_over_long_game():
+    rng = random.Random(11)
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    start = snapshot(board)
+    played = []
+    for _ in range(300):
+        moves = board.generate_move_codes(board.side)
+        if not moves:
+            break
+        undo = board.make_move(rng.choice(moves))
+        played.append(undo.move)
+        assert board.zobrist == board.compute_zobrist()
+        assert board.score == board.compute_score()
+        assert (board.rank_bits, board.file_bits) == board.compute_occupancy()
+        if undo.captured & TYPE_MASK == GENERAL:
+            break
+    assert board.ply == len(played)
+    while board.ply:
+        board.unmake_move()
+    assert snapshot(board) == start
+
+
+def test_undo_info_records_capture_and_deltas():
+    board = ChineseChessBoard()
+    board.add_piece('Rook', 'Red', (5, 5))
+    board.add_piece('Cannon', 'Black', (5, 8))
+    before = snapshot(board)
+    move = next(m for m in board.generate_move_codes('Red') if board.cells[m & 0xFF])
+    undo = board.make_move(move)
+    assert undo.captured == piece_code(PieceType.CANNON, Color.BLACK)
+    # 子力 450 加上位置分數的變化
+    assert undo.eval_delta == board.compute_score() - before[2] > 400
+    assert undo.hash_delta == board.zobrist ^ before[1]
+    board.unmake_move(undo)
+    assert snapshot(board) == before
+
+
+def test_undo_stack_is_reused_and_lifo():
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    first, second = board.generate_move_codes('Red')[:2]
+    undo = board.make_move(first)
+    board.unmake_move(undo)
+    assert board.make_move(second) is undo
+    outer = board.make_move(board.generate_move_codes('Black')[0])
+    with pytest.raises(ValueError):
+        board.unmake_move(undo)
+    board.unmake_move(outer)
+    board.unmake_move(undo)
+    assert board.ply == 0
+
+
+def test_unmake_without_make_raises():
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    start = snapshot(board)
+    with pytest.raises(ValueError):
+        board.unmake_move()
+    board.make_move(board.generate_move_codes('Red')[0])
+    board.unmake_move()
+    with pytest.raises(ValueError):
+        board.unmake_move()
+    assert board.ply == 0
+    assert snapshot(board) == start
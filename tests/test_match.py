@@ -0,0 +1,73 @@
+import math
+
+import pytest
+
+from src.engine.history import DRAW
+from src.engine.match import (
+    SPRT, EngineConfig, TimeControl, elo_estimate, load_openings, play_game, run_match,
+)
+
+FAST = EngineConfig("fast", depth=1)
+SLOW = EngineConfig("slow", depth=2)
+# 紅方第一步的兩個變化（炮二平五、馬八進七），輪黑方走
+OPENINGS = [
+    "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C2C4/9/RNBAKABNR b",
+    "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1CN4C1/9/R1BAKABNR b",
+]
+
+
+def test_elo_and_sprt_statistics():
+    elo, margin = elo_estimate(60, 20, 20)
+    assert elo == pytest.approx(400 * math.log10(0.7 / 0.3))
+    assert 0 < margin < elo
+    assert elo_estimate(5, 0, 0)[0] == math.inf
+
+    sprt = SPRT(elo0=0, elo1=10, alpha=0.05, beta=0.05)
+    lower, upper = sprt.bounds
+    assert lower == pytest.approx(-upper) and upper == pytest.approx(math.log(19))
+    assert sprt.llr(0, 10, 0) == 0.0
+    assert sprt.llr(600, 200, 400) > 0 > sprt.llr(400, 200, 600)
+    assert sprt.decide(600, 200, 400) == "H1"
+    assert sprt.decide(400, 200, 600) == "H0"
+    assert sprt.decide(51, 0, 49) is None
+
+
+def test_play_game_reports_mate_and_limits():
+    result = play_game(FAST, SLOW, "R3k4/1R7/9/9/9/9/9/9/9/3K5 b")
+    assert (result.result, result.reason, result.plies) == ("1-0", "mate", 0)
+    assert result.score_for("fast") == 1.0 and result.score_for("slow") == 0.0
+
+    result = play_game(FAST, EngineConfig("timed", time_control=TimeControl(500, 10)), max_plies=6)
+    assert (result.result, result.reason, result.plies) == (DRAW, "max plies", 6)
+
+
+def test_run_match_pairs_openings_and_streams(tmp_path):
+    path = tmp_path / "openings.txt"
+    path.write_text("# test\n" + "\n".join(OPENINGS) + "\n\n")
+    openings = load_openings(str(path))
+    assert openings == OPENINGS
+
+    seen = []
+    stats = run_match(FAST, SLOW, games=4, openings=openings, max_plies=6, seed=1,
+                      on_result=lambda result, stats: seen.append((result, stats.games)))
+    assert stats.games == 4 and stats.draws == 4 and stats.decision is None
+    assert [games for _, games in seen] == [1, 2, 3, 4]
+    results = [result for result, _ in seen]
+    assert [r.red for r in results] == ["fast", "slow", "fast", "slow"]
+    assert results[0].opening == results[1].opening
+    assert {r.opening for r in results} == {0, 1}
+
+
+def test_run_match_stops_early_in_parallel():
+    # alpha = beta = 0.5 時兩個界線都是 0，第一局結束就會有結論
+    stats = run_match(FAST, SLOW, games=50, workers=2, max_plies=4, sprt=SPRT(alpha=0.5, beta=0.5))
+    assert stats.decision is not None and stats.games < 50
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        run_match(FAST, FAST, games=1)
+    with pytest.raises(ValueError):
+        run_match(FAST, EngineConfig("none"), games=1)
+    with pytest.raises(ValueError):
+        load_openings(__file__)
@@ -0,0 +1,62 @@
+import pytest
+
+from src.analysis.move_cache import LegalMoveCache
+from src.chinesechess import INITIAL_FEN, ChineseChessBoard, iccs_to_move
+
+
+def test_targets_match_board_and_count_hits():
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    cache = LegalMoveCache()
+    for position in board.pieces:
+        assert cache.targets(board, position) == set(board.legal_moves_from(position))
+    assert cache.stats.misses == 32 and cache.stats.hits == 0
+
+    assert cache.targets(board, (1, 2)) == {(3, 1), (3, 3)}
+    assert cache.can_move(board, (1, 2), (3, 3)) and not cache.can_move(board, (1, 2), (2, 2))
+    assert cache.stats.hits == 3 and len(cache) == 32
+    # 空格與棋盤外不查表也不快取
+    assert cache.targets(board, (5, 5)) == set() and cache.targets(board, (0, 1)) == set()
+    assert cache.stats.lookups == 35
+
+
+def test_position_change_uses_new_key():
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    cache = LegalMoveCache()
+    assert (8, 8) not in cache.targets(board, (3, 8))
+    board.make_move(iccs_to_move("h2e2"))
+    board.make_move(iccs_to_move("c6c5"))
+    # 盤面改變後雜湊不同，必須重新計算；走回原局面時再次命中
+    assert cache.targets(board, (3, 5)) == set(board.legal_moves_from((3, 5)))
+    assert cache.stats.misses == 2
+    board.unmake_move()
+    board.unmake_move()
+    cache.targets(board, (3, 8))
+    assert cache.stats.hits == 1
+
+
+def test_lru_eviction():
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    cache = LegalMoveCache(capacity=2)
+    cache.targets(board, (1, 1))
+    cache.targets(board, (1, 2))
+    cache.targets(board, (1, 1))
+    cache.targets(board, (1, 3))
+    assert len(cache) == 2 and cache.stats.evictions == 1
+    # (1, 2) 最久未使用而被淘汰，(1, 1) 仍在
+    cache.targets(board, (1, 1))
+    cache.targets(board, (1, 2))
+    assert cache.stats.snapshot() == {
+        "hits": 2, "misses": 4, "evictions": 2, "lookups": 6, "hit_rate": pytest.approx(1 / 3),
+    }
+    cache.clear()
+    assert len(cache) == 0
+    with pytest.raises(ValueError):
+        LegalMoveCache(capacity=0)
+
+
+def test_strict_excludes_pinned_moves():
+    board = ChineseChessBoard.from_fen("3k5/9/4r4/9/9/9/9/9/4R4/4K4 w")
+    loose = LegalMoveCache().targets(board, (2, 5))
+    strict = LegalMoveCache(strict=True).targets(board, (2, 5))
+    assert (2, 1) in loose and (2, 1) not in strict
+    assert strict == {(row, 5) for row in range(3, 9)}
@@ -0,0 +1,105 @@
+import random
+
+import pytest
+from src.chinesechess import ChineseChessBoard, Color, Piece, PieceType
+
+ALL_SQUARES = [(row, col) for row in range(1, 11) for col in range(1, 10)]
+NON_GENERALS = [pt for pt in PieceType if pt != PieceType.GENERAL]
+
+
+def random_board(rng, piece_count):
+    """隨機擺放棋子（將帥放在九宮內，其餘棋子可在任意格）"""
+    board = ChineseChessBoard()
+    squares = rng.sample(ALL_SQUARES, piece_count)
+    board.add_piece(PieceType.GENERAL, Color.RED, (rng.randint(1, 3), rng.randint(4, 6)))
+    board.add_piece(PieceType.GENERAL, Color.BLACK, (rng.randint(8, 10), rng.randint(4, 6)))
+    for pos in squares:
+        if board.get_piece(pos) is None:
+            board.add_piece(rng.choice(NON_GENERALS), rng.choice(list(Color)), pos)
+    return board
+
+
+def moves_by_probing(board, color):
+    """以 move_piece 逐格嘗試的方式列出所有合法走法"""
+    moves = set()
+    for from_pos, piece in board.pieces.items():
+        if piece.color != color:
+            continue
+        for to_pos in ALL_SQUARES:
+            if board.copy().move_piece(from_pos, to_pos):
+                moves.add((from_pos, to_pos))
+    return moves
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_generate_moves_agrees_with_move_piece(seed):
+    rng = random.Random(seed)
+    board = random_board(rng, rng.randint(4, 30))
+    for color in Color:
+        generated = board.generate_moves(color)
+        assert len(generated) == len(set(generated))
+        assert set(generated) == moves_by_probing(board, color)
+
+
+def test_initial_position_move_count():
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    assert len(board.generate_moves(Color.RED)) == 44
+    assert len(board.generate_moves('Black')) == 44
+
+
+def test_legal_moves_from():
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    assert sorted(board.legal_moves_from((1, 2))) == [(3, 1), (3, 3)]
+    assert sorted(board.legal_moves_from((3, 2))) == [
+        (2, 2), (3, 1), (3, 3), (3, 4), (3, 5), (3, 6), (3, 7), (4, 2), (5, 2), (6, 2), (7, 2), (10, 2)
+    ]
+    assert board.legal_moves_from((5, 5)) == []
+
+
+def test_own_piece_cannot_be_captured():
+    board = ChineseChessBoard()
+    board.add_piece('Rook', 'Red', (1, 1))
+    board.add_piece('Horse', 'Red', (1, 2))
+    assert not board.move_piece((1, 1), (1, 2))
+    assert (1, 2) not in board.legal_moves_from((1, 1))
+
+
+def test_general_cannot_step_into_facing_generals():
+    board = ChineseChessBoard()
+    board.add_piece('General', 'Red', (2, 4))
+    board.add_piece('General', 'Black', (8, 5))
+    assert (2, 5) not in board.legal_moves_from((2, 4))
+    # 向後退開同一路時，原本位置不算阻擋
+    board = ChineseChessBoard()
+    board.add_piece('General', 'Red', (2, 5))
+    board.add_piece('General', 'Black', (9, 5))
+    board.add_piece('Rook', 'Black', (3, 4))
+    assert (1, 5) not in board.legal_moves_from((2, 5))
+
+
+def pieces_between(board, from_pos, to_pos):
+    """逐格數出兩點之間的棋子數（不在同一線上回傳 None）"""
+    (fr, fc), (tr, tc) = from_pos, to_pos
+    if fr == tr:
+        return sum(board.get_piece((fr, c)) is not None for c in range(min(fc, tc) + 1, max(fc, tc)))
+    if fc == tc:
+        return sum(board.get_piece((r, fc)) is not None for r in range(min(fr, tr) + 1, max(fr, tr)))
+    return None
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_sliding_lookup_tables_match_path_walk(seed):
+    rng = random.Random(seed)
+    board = random_board(rng, rng.randint(4, 40))
+    for from_pos in ALL_SQUARES:
+        rook = Piece(PieceType.ROOK, Color.RED, from_pos)
+        cannon = Piece(PieceType.CANNON, Color.RED, from_pos)
+        for to_pos in ALL_SQUARES:
+            if to_pos == from_pos:
+                continue
+            between = pieces_between(board, from_pos, to_pos)
+            target = board.get_piece(to_pos) is not None
+            assert board.is_rook_move_legal(rook, to_pos) == (between == 0)
+            assert board.is_cannon_move_legal(cannon, to_pos) == (between == (1 if target else 0))
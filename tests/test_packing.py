@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from src.analysis.packing import (
+    PACKED_SIZE, as_array, canonical_pack, pack, pack_many, unique_positions, unpack, unpack_many,
+)
+from src.chinesechess import INITIAL_FEN, ChineseChessBoard
+
+from test_move_generation import random_board
+
+
+def mirrored(board):
+    ranks, rest = board.to_fen().split(" ", 1)
+    return ChineseChessBoard.from_fen("/".join(rank[::-1] for rank in ranks.split("/")) + " " + rest)
+
+
+def test_round_trip_random_positions():
+    rng = random.Random(11)
+    target = ChineseChessBoard()
+    for _ in range(200):
+        board = random_board(rng, rng.randint(2, 30))
+        board.side_to_move = rng.choice(["Red", "Black"])
+        data = pack(board)
+        assert len(data) == PACKED_SIZE
+        unpack(data, target)
+        assert target.to_fen() == board.to_fen()
+        assert target.zobrist == board.zobrist and target.score == board.score
+
+
+def test_full_board_fits_and_mirrors_share_key():
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    assert unpack(pack(board)).to_fen() == INITIAL_FEN
+    board.make_move(board.generate_legal_move_codes(0)[0])
+    mirror = mirrored(board)
+    assert pack(board) != pack(mirror)
+    assert pack(board, mirror=True) == pack(mirror)
+    assert canonical_pack(board) == canonical_pack(mirror)
+    # 走棋方不同就是不同的 key
+    mirror.side_to_move = "Red"
+    assert canonical_pack(board) != canonical_pack(mirror)
+
+
+def test_invalid_input():
+    with pytest.raises(ValueError):
+        unpack(b"\0" * 31)
+    with pytest.raises(ValueError):
+        # 有佔用位元但棋子代碼為 0
+        unpack((1 << 1).to_bytes(PACKED_SIZE, "little"))
+    board = ChineseChessBoard()
+    for col in range(1, 10):
+        for row in range(1, 5):
+            board.add_piece("Rook", "Red", (row, col))
+    with pytest.raises(ValueError):
+        pack(board)
+
+
+def test_bulk_codec_and_dedup():
+    rng = random.Random(5)
+    boards = [random_board(rng, rng.randint(2, 30)) for _ in range(50)]
+    boards += [mirrored(b) for b in boards[:20]] + boards[:10]
+    buffer = pack_many(boards, canonical=True)
+    assert len(buffer) == PACKED_SIZE * 80
+    for decoded, original in zip(unpack_many(memoryview(buffer)), boards):
+        assert canonical_pack(decoded) == canonical_pack(original)
+    assert as_array(buffer).shape == (80, PACKED_SIZE)
+    unique = unique_positions(buffer)
+    assert unique.shape == (50, PACKED_SIZE)
+    assert len(list(unpack_many(unique))) == 50
+    with pytest.raises(ValueError):
+        list(unpack_many(b"\0" * 33))
@@ -0,0 +1,70 @@
+import multiprocessing
+import os
+
+import pytest
+
+from src.chinesechess import INITIAL_FEN, ChineseChessBoard, Color
+from src.engine import parallel
+from src.engine.parallel import ParallelSearcher
+from src.engine.search import MATE_BOUND, Searcher
+from src.engine.tt import TranspositionTable
+
+
+def test_parallel_search_finds_mate_and_shares_tt():
+    board = ChineseChessBoard()
+    board.add_piece('General', 'Red', (1, 4))
+    board.add_piece('Rook', 'Red', (5, 6))
+    board.add_piece('General', 'Black', (10, 6))
+    board.add_piece('Guard', 'Black', (9, 5))
+    board.side_to_move = Color.RED
+    key = board.zobrist
+    with ParallelSearcher(workers=2, tt_size_mb=1) as searcher:
+        result = searcher.search(board, depth=3)
+        assert result.best_move == ((5, 6), (10, 6))
+        assert result.score > MATE_BOUND
+        # worker 寫入的置換表可由主行程讀到
+        assert searcher.tt.probe(key) is not None
+    assert board.zobrist == key
+
+
+def test_parallel_search_reuses_pool():
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    with ParallelSearcher(workers=2, tt_size_mb=1) as searcher:
+        first = searcher.search(board, depth=2)
+        second = searcher.search(board, depth=3)
+    assert first.depth == 2 and second.depth >= 3
+    assert second.best_move is not None and second.nodes > 0
+
+
+def test_invalid_worker_count():
+    with pytest.raises(ValueError):
+        ParallelSearcher(workers=0)
+
+
+def test_worker_tasks_reset_history_and_keep_generation():
+    """同一個行程先跑輔助搜尋再跑主搜尋，結果與全新行程相同；generation 不被搜尋推進"""
+    shared = multiprocessing.RawArray("B", TranspositionTable.buffer_size(1))
+    parallel._init_worker(shared, multiprocessing.Event())
+    searcher = parallel._worker_searcher
+    _, fresh = parallel._worker_search(INITIAL_FEN, 3, None, 0, 7)
+    assert searcher.tt.generation == 7
+
+    searcher.tt.clear()
+    parallel._worker_search(INITIAL_FEN, 2, None, 3, 7)
+    searcher.tt.clear()
+    _, reused = parallel._worker_search(INITIAL_FEN, 3, None, 0, 7)
+    assert (reused.nodes, reused.pv_codes) == (fresh.nodes, fresh.pv_codes)
+    with pytest.raises(ValueError):
+        searcher.tt.set_generation(0)
+
+
+@pytest.mark.skipif((os.cpu_count() or 1) < 2, reason="需要至少 2 個 CPU")
+def test_parallel_search_scales_nodes_per_second():
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    single = Searcher(tt_size_mb=4).search(board, depth=4)
+    with ParallelSearcher(workers=2, tt_size_mb=4) as searcher:
+        searcher.search(board, depth=1)
+        searcher.tt.clear()
+        result = searcher.search(board, depth=4)
+    assert result.nodes_per_second > 1.3 * single.nodes_per_second
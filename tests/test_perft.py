@@ -0,0 +1,50 @@
+import pytest
+
+try:
+    import pytest_benchmark
+except ImportError:  # pragma: no cover
+    pytest_benchmark = None
+
+from src.analysis.perft import build_board, divide, load_reference, perft, run_reference
+
+REFERENCE = load_reference()
+
+
+def _cases(max_nodes):
+    return [
+        pytest.param(entry, depth, expected, id=f"{entry['name']}-d{depth}")
+        for entry in REFERENCE
+        for depth, expected in enumerate(entry["counts"], start=1)
+        if expected <= max_nodes
+    ]
+
+
+@pytest.mark.parametrize("entry,depth,expected", _cases(max_nodes=200_000))
+def test_perft_matches_reference(entry, depth, expected):
+    board = build_board(entry)
+    assert perft(board, depth, board.side) == expected
+
+
+def test_perft_leaves_board_unchanged():
+    board = build_board(REFERENCE[1])
+    before = board.pieces
+    perft(board, 3, board.side)
+    assert {pos: repr(p) for pos, p in board.pieces.items()} == {pos: repr(p) for pos, p in before.items()}
+
+
+def test_divide_sums_to_perft():
+    board = build_board(REFERENCE[0])
+    assert sum(divide(board, 2, "Red").values()) == perft(board, 2, "Red")
+
+
+def test_run_reference_reports_nodes_per_second():
+    reports = run_reference(max_depth=2)
+    assert reports and all(r.ok for r in reports)
+    assert all(r.nodes_per_second > 0 for r in reports)
+
+
+@pytest.mark.skipif(pytest_benchmark is None, reason="需要 pytest-benchmark")
+def test_perft_benchmark(benchmark):
+    board = build_board(REFERENCE[0])
+    nodes = benchmark(perft, board, 3, "Red")
+    assert nodes == REFERENCE[0]["counts"][2]
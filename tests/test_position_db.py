@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+
+from src.analysis.position_db import (
+    PositionDB, file_mask, material_signature, normalize_signature, rank_mask, squares_mask,
+)
+from src.analysis.records import GameRecord
+from src.chinesechess import INITIAL_FEN, ChineseChessBoard
+
+# 炮二平五、馬8進7、馬二進三、車9平8
+OPENING = ["h2e2", "h9g7", "h0g2", "i9h9"]
+ENDGAME = "3ak4/9/4b4/9/9/9/9/2C6/4R4/4K4 w"
+
+
+def test_signature_and_masks():
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    assert material_signature(board) == "RRHHCCAAEEPPPPP vs RRHHCCAAEEPPPPP"
+    assert material_signature(ChineseChessBoard.from_fen(ENDGAME)) == "RC vs AE"
+    assert normalize_signature("chr vs k CCR") == "RHC vs RCC"
+    assert normalize_signature("vs R") == " vs R"
+    with pytest.raises(ValueError):
+        normalize_signature("RXC vs R")
+
+    assert file_mask(1) & rank_mask(1) == squares_mask([(1, 1)]) == 1
+    assert squares_mask([(10, 9)]) == 1 << 89
+    assert bin(file_mask(5)).count("1") == 10
+    with pytest.raises(ValueError):
+        squares_mask([(0, 5)])
+
+
+def test_games_are_indexed_once_and_deduplicated():
+    db = PositionDB()
+    first = db.add_game(GameRecord(0, OPENING, {"Event": "test"}, "1-0"))
+    second = db.add_game(GameRecord(1, OPENING[:2]))
+    assert len(db) == 5
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    start = db.search(key=board.zobrist)
+    assert len(start) == 1 and start[0].occurrences == 2 and start[0].fen == board.to_fen()
+    assert db.games_for(start[0].id) == [(first, 0), (second, 0)]
+
+    with pytest.raises(ValueError):
+        db.add_game(GameRecord(2, ["h2e2", "h2e2"]))
+    assert len(db) == 5
+    assert db.add_games([GameRecord(3, ["b0c2"]), GameRecord(4, ["z0z0"])]) == (1, 1)
+
+
+def test_search_by_material_and_squares(tmp_path):
+    path = str(tmp_path / "positions.db")
+    with PositionDB(path) as db:
+        db.add_game(GameRecord(0, OPENING))
+        db.add_position(ChineseChessBoard.from_fen(ENDGAME))
+
+    with PositionDB(path) as db:
+        # 中炮之後的 4 個局面
+        assert db.count(any_of={"red_cannon": file_mask(5)}) == 4
+        # 紅車在第 5 行且黑方缺一象
+        records = db.search(any_of={"red_rook": file_mask(5)}, counts={"black_elephant": 1})
+        assert [r.signature for r in records] == ["RC vs AE"]
+        assert db.count(signature="cr vs ea", side=0) == 1
+        assert db.count(signature="RC vs AE", side=1) == 0
+        # 黑車從 i9 平到 h9 後，i9 就沒有黑車
+        assert db.count(none_of={"black_rook": squares_mask([(10, 9)])}) == 2
+        assert db.count(all_of={"red_rook": squares_mask([(1, 1), (1, 9)])}) == 5
+        assert db.count(all_of={"red_rook": squares_mask([(1, 1), (1, 9)])},
+                        none_of={"red_horse": squares_mask([(1, 8)])}) == 2
+        assert len(db.search(limit=3)) == 3
+        with pytest.raises(ValueError):
+            db.search(counts={"red_king": 1})
+
+
+def test_mask_queries_use_the_piece_index():
+    db = PositionDB()
+    db.add_game(GameRecord(0, OPENING))
+    conditions = {
+        "any_of": {"red_cannon": file_mask(5)},
+        "all_of": {"red_rook": squares_mask([(1, 1), (1, 9)])},
+        "none_of": {"black_rook": squares_mask([(10, 9)])},
+    }
+    plan = db.query_plan(**conditions)
+    assert sum("SEARCH pieces USING PRIMARY KEY (piece=? AND square=?)" in step for step in plan) == 3
+    assert not any(step.startswith("SCAN pieces") for step in plan)
+    assert db.count(**conditions) == 1
+    # 空點陣：any_of 不成立，all_of 與 none_of 恆成立
+    assert db.count(any_of={"red_rook": 0}) == 0
+    assert db.count(all_of={"red_rook": 0}, none_of={"red_horse": 0}) == len(db)
+
+
+def test_old_database_format_is_rejected(tmp_path):
+    path = str(tmp_path / "old.db")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE positions (id INTEGER PRIMARY KEY)")
+    connection.close()
+    with pytest.raises(ValueError, match="re-import"):
+        PositionDB(path)
@@ -0,0 +1,47 @@
+import json
+
+from src.analysis.perft import perft
+from src.chinesechess import INITIAL_FEN, ChineseChessBoard, RulesProfiler
+
+
+def test_counters_are_installed_only_while_enabled():
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    expected = perft(board, 2, "Red")
+    with RulesProfiler(board) as profiler:
+        assert "make_move" in board.__dict__
+        assert perft(board, 2, "Red") == expected
+    assert not {"make_move", "move_piece", "_rook_rule", "generate_move_codes"} & set(board.__dict__)
+    assert board._rules[3].__func__ is ChineseChessBoard._rook_rule
+
+    snapshot = profiler.snapshot()
+    legal = snapshot["enumeration"]["generate_legal_move_codes"]
+    # 根節點 1 次加上 44 個子節點各 1 次
+    assert legal["calls"] == 45 and legal["moves"] == expected + 44
+    # perft 只在內部節點 make_move（葉節點直接計數），另含合法性檢查時試走的步數
+    assert snapshot["nodes"] >= 44 and snapshot["nodes_per_second"] > 0
+    assert snapshot["generals_facing"]["checks"] > 0
+    # 停用後不再計數
+    perft(board, 1, "Red")
+    assert profiler.snapshot()["nodes"] == snapshot["nodes"]
+
+
+def test_rule_calls_and_rejection_reasons():
+    board = ChineseChessBoard.from_fen("4k4/9/9/9/9/9/9/9/5A3/3K5 w")
+    with RulesProfiler(board, timed=False) as profiler:
+        assert not board.move_piece((0, 4), (1, 4))
+        assert not board.move_piece((1, 4), (1, 4))
+        assert not board.move_piece((5, 5), (6, 5))
+        assert not board.move_piece((1, 4), (2, 6))
+        assert not board.move_piece((1, 4), (3, 4))
+        assert not board.move_piece((1, 4), (1, 5))
+        assert board.move_piece((1, 4), (2, 4))
+    snapshot = json.loads(profiler.to_json())
+    assert snapshot["rejections"] == {
+        "off_board": 1, "same_square": 1, "empty_square": 1, "own_piece": 1,
+        "piece_rule": 1, "generals_facing": 1,
+    }
+    assert snapshot["rules"]["is_general_move_legal"] == {"calls": 3, "seconds": 0.0, "rejected": 1}
+    assert snapshot["rules"]["is_guard_move_legal"]["calls"] == 0
+
+    profiler.reset()
+    assert profiler.snapshot()["rules"]["is_general_move_legal"]["calls"] == 0
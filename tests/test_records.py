@@ -0,0 +1,85 @@
+import io
+import json
+
+import pytest
+
+from src.analysis.records import GameRecord, iter_games, parse_move, replay_game, replay_games
+from src.chinesechess import INITIAL_FEN, ChineseChessBoard
+
+ARCHIVE = """\
+[Event "測試"]
+[Red "甲"]
+
+1. h2e2 h9g7 2. h0g2 {中炮對屏風馬} i9h9 1-0
+
+[Event "WXF"]
+1. C2.5 H8+7 2. H2+3 R9.8
+3. R1.2 *
+
+h2e2 h9h0 0-1
+[FEN "4k4/9/9/9/9/9/9/9/9/4K4 w - - 0 1"]
+1. e0d0 e9e8
+"""
+
+
+def test_iter_games_streams_records():
+    games = list(iter_games(io.StringIO(ARCHIVE)))
+    assert [g.index for g in games] == [0, 1, 2, 3]
+    assert games[0].headers == {"Event": "測試", "Red": "甲"}
+    assert games[0].moves == ["h2e2", "h9g7", "h0g2", "i9h9"] and games[0].result == "1-0"
+    assert games[1].moves == ["C2.5", "H8+7", "H2+3", "R9.8", "R1.2"] and games[1].result == "*"
+    assert games[2].moves == ["h2e2", "h9h0"] and games[2].headers == {}
+    assert games[3].fen.startswith("4k4") and games[3].result is None
+    one_per_line = list(iter_games(["h2e2 h9g7", "b0c2"], line_per_game=True))
+    assert [g.moves for g in one_per_line] == [["h2e2", "h9g7"], ["b0c2"]]
+
+
+def test_wxf_matches_iccs():
+    board = ChineseChessBoard.from_fen(INITIAL_FEN)
+    assert parse_move(board, "C2.5", 0) == ((3, 8), (3, 5))
+    assert parse_move(board, "H2+3", 0) == ((1, 8), (3, 7))
+    assert parse_move(board, "E3+5", 0) == ((1, 7), (3, 5))
+    assert parse_move(board, "A4+5", 0) == ((1, 6), (2, 5))
+    assert parse_move(board, "H8+7", 1) == ((10, 8), (8, 7))
+    assert parse_move(board, "R1+1", 1) == ((10, 1), (9, 1))
+    assert parse_move(board, "h2-e2", 0) == ((3, 8), (3, 5))
+    # 同一路兩個車以前/後區分
+    board.set_fen("4k4/9/9/9/9/9/R8/9/R8/4K4 w - - 0 1")
+    assert parse_move(board, "+R.5", 0) == ((4, 1), (4, 5))
+    assert parse_move(board, "R-+1", 0) == ((2, 1), (3, 1))
+    # 沒有標前/後時兩個車都符合，不能默默選一個
+    for ambiguous in ("R9+1", "R9.5"):
+        with pytest.raises(ValueError, match="Ambiguous"):
+            parse_move(board, ambiguous, 0)
+    # 同一路的兩個士只有一個能走到目標，WXF 不需標前後
+    board.set_fen("4k4/9/9/9/9/9/9/3A5/9/3AK4 w - - 0 1")
+    assert parse_move(board, "A6+5", 0) == ((1, 4), (2, 5))
+    for bad in ("X2.5", "C2.0", "C25", "C1.5"):
+        with pytest.raises(ValueError):
+            parse_move(ChineseChessBoard.from_fen(INITIAL_FEN), bad, 0)
+
+
+def test_replay_flags_illegal_moves():
+    board = ChineseChessBoard()
+    games = list(iter_games(io.StringIO(ARCHIVE)))
+    assert replay_game(board, games[0]) == {
+        "game": 0, "moves": 4, "ok": True, "headers": games[0].headers, "result": "1-0",
+    }
+    assert replay_game(board, games[1])["ok"]
+    bad = replay_game(board, games[2])
+    assert bad["ok"] is False and bad["ply"] == 2 and bad["move"] == "h9h0" and bad["moves"] == 1
+    # 輪到黑方時走紅子
+    wrong_side = replay_game(board, GameRecord(9, moves=["h2e2", "h0g2"]))
+    assert wrong_side["ok"] is False and wrong_side["ply"] == 2
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_replay_games_writes_jsonl(workers):
+    archive = ARCHIVE * 20
+    out = io.StringIO()
+    stats = replay_games(io.StringIO(archive), out, workers=workers, chunk_size=3)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["game"] for r in records] == list(range(80))
+    assert stats.games == 80 and stats.illegal == 20
+    assert stats.moves == sum(r["moves"] for r in records) == 20 * (4 + 5 + 1 + 2)
+    assert stats.games_per_second > 0 and stats.moves_per_second > 0
@@ -0,0 +1,99 @@
+import time
+
+from src.chinesechess import ChineseChessBoard, Color
+from src.engine.search import MATE_BOUND, Searcher, search
+from src.engine.tt import TranspositionTable, EXACT, LOWER
+
+
+def setup_board(pieces, side=Color.RED):
+    board = ChineseChessBoard()
+    for piece_type, color, pos in pieces:
+        board.add_piece(piece_type, color, pos)
+    board.side_to_move = side
+    return board
+
+
+def test_search_captures_general_for_win():
+    board = setup_board([
+        ('General', 'Red', (1, 4)),
+        ('Rook', 'Red', (5, 6)),
+        ('General', 'Black', (10, 6)),
+        ('Guard', 'Black', (9, 5)),
+    ])
+    result = search(board, depth=3)
+    assert result.best_move == ((5, 6), (10, 6))
+    assert result.score > MATE_BOUND
+
+
+def test_general_capture_pv_ends_with_the_capture():
+    """吃將的走法沒有子局面，主要變例不可接上先前搜尋留下的走法"""
+    searcher = Searcher()
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    searcher.search(board, depth=3)
+    board = setup_board([
+        ('General', 'Red', (1, 4)),
+        ('Rook', 'Red', (5, 6)),
+        ('General', 'Black', (10, 6)),
+        ('Guard', 'Black', (9, 5)),
+    ])
+    result = searcher.search(board, depth=1)
+    assert result.pv == [((5, 6), (10, 6))]
+
+
+def test_search_wins_free_rook_for_black():
+    board = setup_board([
+        ('General', 'Red', (1, 4)),
+        ('Rook', 'Red', (5, 2)),
+        ('General', 'Black', (10, 6)),
+        ('Horse', 'Black', (7, 3)),
+    ], side=Color.BLACK)
+    result = search(board, depth=2)
+    assert result.best_move == ((7, 3), (5, 2))
+    assert result.score > 0
+
+
+def test_search_restores_board_and_pv_is_playable():
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    key = board.zobrist
+    result = search(board, depth=3)
+    assert board.zobrist == key and len(board.pieces) == 32
+    assert result.depth == 3 and len(result.pv) >= 1
+    replay = board.copy()
+    for from_pos, to_pos in result.pv:
+        assert replay.move_piece(from_pos, to_pos)
+
+
+def test_search_respects_time_limit():
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    start = time.perf_counter()
+    result = search(board, time_ms=200)
+    assert time.perf_counter() - start < 1.5
+    assert result.best_move is not None and result.depth >= 1
+
+
+def test_searcher_reuses_transposition_table():
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    searcher = Searcher(tt_size_mb=1)
+    first = searcher.search(board, depth=3)
+    assert searcher.tt.usage(sample=searcher.tt.entries) > 0
+    second = searcher.search(board, depth=3)
+    assert second.nodes < first.nodes
+
+
+def test_transposition_table_replace_by_depth():
+    tt = TranspositionTable(size_mb=0.01)
+    key = 0x1234_5678_9ABC_DEF0
+    tt.store(key, 0x1722, -150, 5, EXACT)
+    assert tt.probe(key) == (0x1722, -150, 5, EXACT)
+    # 同一次搜尋中較淺的結果不覆蓋較深的
+    tt.store(key, 0x1723, 90, 2, LOWER)
+    assert tt.probe(key) == (0x1722, -150, 5, EXACT)
+    # 新的搜尋世代時舊資料可被取代
+    tt.new_search()
+    tt.store(key, 0x1723, 90, 2, LOWER)
+    assert tt.probe(key) == (0x1723, 90, 2, LOWER)
+    assert tt.probe(key ^ 1 << 40) is None
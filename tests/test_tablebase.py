@@ -0,0 +1,100 @@
+import pytest
+
+from src.chinesechess import ChineseChessBoard
+from src.engine.tablebase import DRAW, LOSS, WIN, Tablebase, _Layout, generate_tablebase, normalize_material
+
+
+@pytest.fixture(scope="module")
+def tables(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("tb")
+    paths = generate_tablebase("KR vs K", str(directory))
+    assert [p.rsplit("/", 1)[-1] for p in paths] == ["KvK.xqtb", "KRvK.xqtb"]
+    opened = {name: Tablebase(str(directory / f"{name}.xqtb")) for name in ("KvK", "KRvK")}
+    yield directory, opened
+    for table in opened.values():
+        table.close()
+
+
+def probe_any(tables, board):
+    for table in tables.values():
+        if table._layout.index_of(board) is not None:
+            return table.probe(board)
+    raise AssertionError(board.to_fen())
+
+
+def test_normalize_material():
+    assert normalize_material("kr vs ka") == "KRvKA"
+    assert normalize_material("KAHR-KE") == "KRNAvKB"
+    for bad in ("KR", "RvK", "KKvK", "KXvK"):
+        with pytest.raises(ValueError):
+            normalize_material(bad)
+
+
+def test_values_agree_with_one_ply_minimax(tables):
+    _, opened = tables
+    layout = _Layout("KRvK")
+    board = ChineseChessBoard()
+    checked = 0
+    for index in range(0, layout.size, 7):
+        squares, side = layout.decode(index)
+        if len(set(squares)) != len(squares):
+            continue
+        board.clear()
+        for code, sq in zip(layout.codes, squares):
+            board._put(sq, code)
+        board._set_side(side)
+        value = opened["KRvK"].probe(board)
+        if board._general_attacked(1 - side):
+            assert value is None
+            continue
+        children = []
+        for move in board.generate_legal_move_codes(side):
+            board.make_move(move)
+            children.append(probe_any(opened, board))
+            board.unmake_move()
+        wins = [dtm for result, dtm in children if result == LOSS]
+        if not children:
+            expected = (LOSS, 0)
+        elif wins:
+            expected = (WIN, min(wins) + 1)
+        elif any(result == DRAW for result, _ in children):
+            expected = (DRAW, 0)
+        else:
+            expected = (LOSS, max(dtm for _, dtm in children) + 1)
+        assert value == expected, board.to_fen()
+        checked += 1
+    assert checked > 1000
+
+
+def test_probe_positions(tables):
+    _, opened = tables
+    table = opened["KRvK"]
+    board = ChineseChessBoard.from_fen("4k4/9/9/9/9/R8/9/9/9/3K5 w - - 0 1")
+    result, dtm = table.probe(board)
+    assert result == WIN and dtm % 2 == 1
+    board.side_to_move = "Black"
+    assert table.probe(board)[0] == LOSS
+    # 黑將可以吃掉俥，之後是和棋
+    board.set_fen("4k4/4R4/9/9/9/9/9/9/9/3K5 b - - 0 1")
+    assert table.probe(board) == (DRAW, 0)
+    # 子力不同或對方將帥正被攻擊
+    assert table.probe(ChineseChessBoard.from_fen("4k4/9/9/9/9/9/9/9/9/3K5 w - - 0 1")) is None
+    assert table.probe(ChineseChessBoard.from_fen("4k4/9/9/9/9/4R4/9/9/9/3K5 w - - 0 1")) is None
+
+
+def test_multiprocess_generation_is_identical(tables, tmp_path):
+    directory, _ = tables
+    generate_tablebase("KRvK", str(tmp_path), workers=2, chunk_size=1000)
+    for name in ("KvK", "KRvK"):
+        assert (tmp_path / f"{name}.xqtb").read_bytes() == (directory / f"{name}.xqtb").read_bytes()
+    # 暫存的邊檔案在求解後移除
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["KRvK.xqtb", "KvK.xqtb"]
+    # 已存在的檔案不會重新產生
+    assert generate_tablebase("KRvK", str(tmp_path)) == []
+
+
+def test_rejects_non_tablebase_file(tmp_path):
+    path = tmp_path / "junk.xqtb"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        Tablebase(str(path))
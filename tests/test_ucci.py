@@ -0,0 +1,102 @@
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from src.chinesechess import iccs_to_move
+from src.engine.ucci import UcciEngine
+
+
+def make_engine():
+    output = []
+    engine = UcciEngine(output.append)
+    return engine, output
+
+
+def bestmoves(output):
+    return [line for line in output if line.startswith(("bestmove", "nobestmove"))]
+
+
+def test_handshake_and_position():
+    engine, output = make_engine()
+    engine.handle("ucci")
+    assert output[0].startswith("id name") and output[-1] == "ucciok"
+    engine.handle("isready")
+    assert output[-1] == "readyok"
+    engine.handle("position startpos moves h2e2 h9g7")
+    assert engine.board.to_fen() == "rnbakab1r/9/1c4nc1/p1p1p1p1p/9/9/P1P1P1P1P/1C2C4/9/RNBAKABNR w - - 0 1"
+    assert engine.board.side == 0
+    engine.handle("position fen 4k4/9/9/9/9/9/9/9/9/3K5 b - - 0 1 moves e9e8")
+    assert engine.board.to_fen().startswith("9/4k4/")
+    engine.handle("position startpos moves h2e2 h2e2")
+    assert output[-1] == "info string illegal move h2e2"
+    assert engine.handle("quit") is False and output[-1] == "bye"
+
+
+def test_go_depth_reports_one_legal_bestmove():
+    engine, output = make_engine()
+    engine.handle("position startpos")
+    engine.handle("go depth 2")
+    engine.wait(10)
+    moves = bestmoves(output)
+    assert len(moves) == 1
+    best = moves[0].split()[1]
+    assert iccs_to_move(best) in engine.board.generate_legal_move_codes(0)
+    assert any(line.startswith("info depth 2") for line in output)
+
+
+def test_isready_and_stop_answer_while_searching():
+    engine, output = make_engine()
+    engine.handle("position startpos")
+    engine.handle("go infinite")
+    time.sleep(0.2)
+    start = time.perf_counter()
+    engine.handle("isready")
+    assert output[-1] == "readyok"
+    assert time.perf_counter() - start < 0.05
+    assert bestmoves(output) == []
+    engine.handle("stop")
+    assert len(bestmoves(output)) == 1
+    engine.wait(5)
+    assert len(bestmoves(output)) == 1
+
+
+def test_ponder_waits_for_ponderhit():
+    engine, output = make_engine()
+    engine.handle("position startpos moves h2e2")
+    engine.handle("go ponder time 200 movestogo 1")
+    time.sleep(0.3)
+    assert bestmoves(output) == []
+    engine.handle("ponderhit")
+    engine.wait(5)
+    assert len(bestmoves(output)) == 1
+
+
+def test_no_legal_moves_reports_nobestmove():
+    engine, output = make_engine()
+    # 雙車錯殺，黑方無合法走法
+    engine.handle("position fen R3k4/1R7/9/9/9/9/9/9/9/3K5 b - - 0 1")
+    engine.handle("go depth 2")
+    engine.wait(5)
+    assert bestmoves(output) == ["nobestmove"]
+
+
+def test_module_runs_as_engine_process():
+    root = Path(__file__).parent.parent
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "src.engine.ucci"], cwd=root, text=True,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+    )
+    try:
+        proc.stdin.write("ucci\nisready\nposition startpos\ngo depth 1\n")
+        proc.stdin.flush()
+        lines = []
+        while not lines or not lines[-1].startswith("bestmove"):
+            lines.append(proc.stdout.readline().strip())
+        assert "ucciok" in lines and "readyok" in lines
+        proc.stdin.write("quit\n")
+        proc.stdin.flush()
+        assert proc.stdout.readline().strip() == "bye"
+        assert proc.wait(5) == 0
+    finally:
+        proc.kill()
@@ -0,0 +1,74 @@
+import random
+
+from src.chinesechess import ChineseChessBoard, Color, ZOBRIST_SIDE
+
+
+def initial_board():
+    board = ChineseChessBoard()
+    board.setup_initial_position()
+    return board
+
+
+def test_incremental_hash_matches_full_recompute():
+    rng = random.Random(7)
+    board = initial_board()
+    assert board.zobrist == board.compute_zobrist()
+    for _ in range(200):
+        moves = board.generate_moves(board.side_to_move)
+        if not moves:
+            break
+        from_pos, to_pos = rng.choice(moves)
+        assert board.move_piece(from_pos, to_pos)
+        assert board.zobrist == board.compute_zobrist()
+
+
+def test_transposed_move_orders_share_hash():
+    a = initial_board()
+    a.move_piece((1, 2), (3, 3))
+    a.move_piece((10, 2), (8, 3))
+    a.move_piece((1, 8), (3, 7))
+    a.move_piece((10, 8), (8, 7))
+    b = initial_board()
+    b.move_piece((1, 8), (3, 7))
+    b.move_piece((10, 8), (8, 7))
+    b.move_piece((1, 2), (3, 3))
+    b.move_piece((10, 2), (8, 3))
+    assert a.zobrist == b.zobrist
+    assert a.zobrist != initial_board().zobrist
+
+
+def test_side_to_move_changes_hash():
+    board = initial_board()
+    key = board.zobrist
+    assert board.side_to_move == Color.RED
+    board.move_piece((4, 1), (3, 1))
+    assert board.side_to_move == Color.BLACK
+    board.side_to_move = Color.RED
+    assert board.zobrist == board.compute_zobrist()
+    board.side_to_move = 'Black'
+    assert board.zobrist ^ ZOBRIST_SIDE != key
+
+
+def test_make_and_unmake_restore_hash():
+    board = initial_board()
+    key = board.zobrist
+    for move in board.generate_move_codes(Color.RED):
+        board.make_move(move)
+        assert board.side_to_move == Color.BLACK
+        assert board.zobrist == board.compute_zobrist()
+        board.unmake_move()
+        assert board.zobrist == key
+        assert board.side_to_move == Color.RED
+
+
+def test_add_piece_clear_and_copy():
+    board = ChineseChessBoard()
+    assert board.zobrist == 0
+    board.add_piece('Rook', 'Red', (1, 1))
+    key = board.zobrist
+    board.add_piece('Horse', 'Black', (1, 1))
+    assert board.zobrist != key
+    assert board.zobrist == board.compute_zobrist()
+    assert board.copy().zobrist == board.zobrist
+    board.clear()
+    assert board.zobrist == 0